@@ -1,46 +1,239 @@
-from typing import Dict
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from typing import Any, Dict, List, Literal, Optional
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, BackgroundTasks
+from fastapi import FastAPI, BackgroundTasks, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
 
 from app.models.JiraTaskRequest import JiraTaskRequest
-from app.models.MeetingRequest import MeetingRequest
+from app.models.MeetingLedger import COST_FIELDS, LedgerRollup, MeetingLedger
+from app.models.MeetingRequest import MeetingRequest, ScheduledMeetingRequest
 from app.models.MeetingStatusResponse import (
     MeetingStatusResponse,
     MeetingStatus,
     MeetingState,
+    add_status_listener,
+    MeetingStatusEvent,
+)
+from app.models.NodeInfo import NodeHeartbeat, NodeStatus
+from app.models.OutboxEntry import OutboxEntry
+from app.models.SearchHit import SearchResponse
+from app.models.StoredRecording import StoredRecording
+from app.models.TranscriptChunk import (
+    TranscriptChunksRequest,
+    TranscriptChunksResponse,
+)
+from app.services.artifact_service.artifact_service import (
+    ArtifactTokenError,
+    artifact_store,
+)
+from app.services.dispatch_service.dispatch_service import (
+    NoCapacityError,
+    forward_request,
+    is_coordinator,
+    is_worker_node,
+    node_registry,
+    run_heartbeat,
+    run_node_expiry,
+    stream_from_nodes,
+)
+from app.services.jira_service import (
+    DUPLICATE_POLICY,
+    process_jira_response,
+    run_issue_index_sync,
+)
+from app.services.ledger_service.ledger_store import ledger_store, merge_ledgers, merge_rollups
+from app.services.outbox_service.callback_outbox import callback_outbox
+from app.services.search_service.transcript_index import merge_by_rank, transcript_index
+from app.services.scheduler_service.scheduler_service import (
+    cancel_meeting_join,
+    recording_deadline_s,
+    schedule_meeting_join,
+)
+from app.services.scheduler_service.timer_wheel import meeting_scheduler
+from app.services.storage_service.recording_store import recording_store
+from app.services.status_service.status_service import stream_status_events
+from app.services.transcription_service.transcript_chunker import chunk_segments
+from app.services.transcription_service.transcript_store import (
+    TRANSCRIPTS_DIR,
+    load_transcript,
 )
-from app.services.jira_service import process_jira_response
 from app.services.transcription_service.transcription_service import (
+    AUDIO_HANDOFF,
     send_audio_for_transcription,
 )
-from app.utils import get_logger
-from app.workers.meeting_worker import join_and_record_meeting
+from app.utils import close_open_scopes, get_logger, loop_monitor
+
+
+def report_background_failure(task: asyncio.Task):
+    # Background loops run for the life of the server; one that ends early is a node silently losing a duty.
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Background task %s stopped: %r", task.get_name(), task.exception(), exc_info=task.exception())
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    if not is_coordinator() and AUDIO_HANDOFF == "reference" and not artifact_store.shared_secret:
+        # A per-process key would break every link handed to n8n at the next restart or on another node.
+        raise RuntimeError("AUDIO_HANDOFF=reference requires ARTIFACT_SECRET")
+    loop_monitor.start()
+    background = []
+    if not is_coordinator() and not is_api_only():
+        # Before anything records: jobs left active by a crash become evictable again.
+        await asyncio.get_running_loop().run_in_executor(None, recording_store.recover_orphans)
+        meeting_scheduler.start()
+        background.append(
+            asyncio.create_task(
+                recording_store.run_maintenance(float(os.getenv("RECORDINGS_MAINTENANCE_S", "300")))
+            )
+        )
+
+    if not is_coordinator():
+        asyncio.get_running_loop().run_in_executor(None, transcript_index.index_missing, TRANSCRIPTS_DIR)
+        background.append(asyncio.create_task(callback_outbox.run()))
+        if DUPLICATE_POLICY != "off" and os.getenv("JIRA_SERVICE_URL"):
+            background.append(
+                asyncio.create_task(run_issue_index_sync(float(os.getenv("JIRA_INDEX_SYNC_S", "900"))))
+            )
+
+    if is_coordinator():
+        background.append(asyncio.create_task(run_node_expiry()))
+    elif is_worker_node():
+        background.append(
+            asyncio.create_task(
+                run_heartbeat(active_sessions, interval_s=float(os.getenv("NODE_HEARTBEAT_S", "5")))
+            )
+        )
+
+    for task in background:
+        task.add_done_callback(report_background_failure)
+
+    yield
+
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+    await meeting_scheduler.stop()
+    # Browsers, drivers and recorders of meetings still running when the server stops.
+    await close_open_scopes()
+    await loop_monitor.stop()
+
 
-app = FastAPI(title="n8n Teams Meeting")
+app = FastAPI(title="n8n Teams Meeting", lifespan=lifespan)
 load_dotenv()
 logger = get_logger()
 
 active_sessions: Dict[str, MeetingState] = {}
 
 
+def persist_ledger(event: MeetingStatusEvent):
+    # Every stage ends in a status change, so the stored ledger never lags a stage behind.
+    state = active_sessions.get(event.meeting_id)
+    if state is None:
+        return
+    try:
+        asyncio.get_running_loop().run_in_executor(None, ledger_store.save, state.ledger)
+    except RuntimeError:
+        # Status set from a threadpool background task (e.g. the multipart upload).
+        try:
+            ledger_store.save(state.ledger)
+        except Exception as e:
+            logger.error("Failed to save cost ledger of %s: %s", event.meeting_id, e)
+
+
+add_status_listener(persist_ledger)
+
+
+def is_api_only() -> bool:
+    # The "api" profile never loads the browser/recorder stack; it cannot host meetings itself.
+    return os.getenv("APP_PROFILE", "full").lower() == "api"
+
+
+async def dispatch_to_node(
+    meeting_id: str,
+    method: str,
+    path: str,
+    *,
+    params: Optional[Dict[str, Any]] = None,
+    json: Any = None,
+    place: bool = False,
+):
+    try:
+        node = node_registry.place(meeting_id) if place else node_registry.node_for(meeting_id)
+    except NoCapacityError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    if node is None:
+        raise HTTPException(
+            status_code=503, detail=f"No live node holds meeting {meeting_id}"
+        )
+
+    try:
+        status_code, body = await forward_request(node, method, path, params=params, json=json)
+    except Exception as e:
+        # The node may or may not have accepted it; its next heartbeat reports the meeting again if it did.
+        if place:
+            node_registry.release(meeting_id)
+        logger.error("%s %s on node %s failed: %s", method, path, node.node_id, e)
+        raise HTTPException(status_code=502, detail=f"Node {node.node_id} did not answer: {e}")
+
+    if status_code >= 400:
+        if place:
+            node_registry.release(meeting_id)
+        raise HTTPException(status_code=status_code, detail=body)
+    return body
+
+
+async def gather_from_nodes(path: str, params: Dict[str, Any]) -> List[Any]:
+    # For data spread over the nodes (transcripts, ledgers): ask every live node, skip the ones that fail.
+    nodes = [n for n in node_registry.nodes.values() if n.alive]
+    query = {k: v for k, v in params.items() if v is not None}
+    results = await asyncio.gather(
+        *(forward_request(n, "GET", path, params=query) for n in nodes), return_exceptions=True
+    )
+    bodies = []
+    for node, result in zip(nodes, results):
+        if isinstance(result, Exception) or result[0] >= 400:
+            logger.warning("GET %s on node %s failed: %s", path, node.node_id, result)
+            continue
+        bodies.append(result[1])
+    return bodies
+
+
 @app.post("/join-meeting", response_model=MeetingStatusResponse)
 async def join_meeting_endpoint(
     request: MeetingRequest, background_tasks: BackgroundTasks
 ):
     meeting_id = request.meeting_id
+    if is_coordinator():
+        return await dispatch_to_node(
+            meeting_id, "POST", "/join-meeting", json=request.model_dump(), place=True
+        )
+
+    if is_api_only():
+        raise HTTPException(
+            status_code=503, detail="This instance runs the API-only profile"
+        )
+
+    from app.workers.meeting_worker import join_and_record_meeting
+
     active_sessions[meeting_id] = MeetingState(
         status=MeetingStatus.STARTING,
         resume_url=request.resume_url,
+        meeting_id=meeting_id,
     )
-    # 5 min
-    batch_duration = 5 * 60
+    batch_duration = recording_deadline_s(request.estimated_duration)
 
     background_tasks.add_task(
         join_and_record_meeting,
         meeting_id,
         active_sessions,
         batch_duration=batch_duration,
+        transcript_mode=request.transcript_mode,
     )
 
     return MeetingStatusResponse(
@@ -48,20 +241,95 @@ async def join_meeting_endpoint(
     )
 
 
+@app.post("/schedule-meeting", response_model=MeetingStatusResponse)
+async def schedule_meeting_endpoint(request: ScheduledMeetingRequest):
+    meeting_id = request.meeting_id
+    if is_coordinator():
+        return await dispatch_to_node(
+            meeting_id,
+            "POST",
+            "/schedule-meeting",
+            json=request.model_dump(mode="json"),
+            place=True,
+        )
+
+    if is_api_only():
+        raise HTTPException(
+            status_code=503, detail="This instance runs the API-only profile"
+        )
+
+    active_sessions[meeting_id] = MeetingState(
+        status=MeetingStatus.SCHEDULED,
+        resume_url=request.resume_url,
+        meeting_id=meeting_id,
+    )
+    schedule_meeting_join(request, active_sessions)
+
+    return MeetingStatusResponse(status=MeetingStatus.SCHEDULED, meeting_id=meeting_id)
+
+
+@app.delete("/schedule-meeting/{meeting_id}", response_model=MeetingStatusResponse)
+async def cancel_scheduled_meeting_endpoint(meeting_id: str):
+    if is_coordinator():
+        return await dispatch_to_node(meeting_id, "DELETE", f"/schedule-meeting/{meeting_id}")
+
+    state = active_sessions.get(meeting_id)
+    if state is None or state.status != MeetingStatus.SCHEDULED or not cancel_meeting_join(meeting_id):
+        raise HTTPException(
+            status_code=404, detail=f"No pending scheduled join for meeting {meeting_id}"
+        )
+
+    del active_sessions[meeting_id]
+    return MeetingStatusResponse(status=state.status, meeting_id=meeting_id)
+
+
 @app.get("/download-file", response_model=MeetingStatusResponse)
-async def download_file_endpoint(meeting_id: str, background_tasks: BackgroundTasks):
+async def download_file_endpoint(
+    meeting_id: str,
+    background_tasks: BackgroundTasks,
+    mode: Optional[Literal["multipart", "reference"]] = None,
+):
+    if is_coordinator():
+        params = {"meeting_id": meeting_id}
+        if mode is not None:
+            params["mode"] = mode
+        return await dispatch_to_node(meeting_id, "GET", "/download-file", params=params)
+    if mode == "reference" and not artifact_store.shared_secret:
+        raise HTTPException(status_code=409, detail="Reference handoff requires ARTIFACT_SECRET on this node")
 
-    background_tasks.add_task(send_audio_for_transcription, active_sessions, meeting_id)
+    background_tasks.add_task(
+        send_audio_for_transcription, active_sessions, meeting_id, None, mode
+    )
 
     return MeetingStatusResponse(
         status=active_sessions.get(meeting_id).status, meeting_id=meeting_id
     )
 
 
+@app.get("/artifacts/{token}")
+async def artifact_endpoint(token: str):
+    # Links point straight at the node holding the file; FileResponse answers Range requests itself.
+    try:
+        path, content_type = artifact_store.resolve(token)
+    except ArtifactTokenError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Artifact no longer available")
+    return FileResponse(path, media_type=content_type, filename=path.name)
+
+
 @app.post("/create-tasks", response_model=MeetingStatusResponse)
 async def create_jira_tasks(
     meeting_id: str, request: JiraTaskRequest, background_tasks: BackgroundTasks
 ):
+    if is_coordinator():
+        return await dispatch_to_node(
+            meeting_id,
+            "POST",
+            "/create-tasks",
+            params={"meeting_id": meeting_id},
+            json=request.model_dump(),
+        )
 
     background_tasks.add_task(
         process_jira_response, active_sessions, meeting_id, request
@@ -70,3 +338,281 @@ async def create_jira_tasks(
     return MeetingStatusResponse(
         status=active_sessions.get(meeting_id).status, meeting_id=meeting_id
     )
+
+
+@app.get("/meetings", response_model=List[MeetingStatusResponse])
+async def list_meetings_endpoint(
+    status: Optional[List[MeetingStatus]] = Query(None),
+    meeting_id: Optional[List[str]] = Query(None),
+):
+    if is_coordinator():
+        params = {"status": [s.value for s in status] if status else None, "meeting_id": meeting_id}
+        bodies = await gather_from_nodes("/meetings", params)
+        return [MeetingStatusResponse.model_validate(m) for body in bodies for m in body]
+
+    ids = meeting_id if meeting_id else list(active_sessions.keys())
+    wanted = set(status) if status else None
+
+    result = []
+    for mid in ids:
+        state = active_sessions.get(mid)
+        if state is None or (wanted is not None and state.status not in wanted):
+            continue
+        result.append(MeetingStatusResponse(status=state.status, meeting_id=mid))
+    return result
+
+
+@app.get("/meetings/events")
+async def meeting_events_endpoint(meeting_id: Optional[List[str]] = Query(None)):
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if is_coordinator():
+        nodes = [n for n in node_registry.nodes.values() if n.alive]
+        return StreamingResponse(
+            stream_from_nodes(nodes, "/meetings/events", {"meeting_id": meeting_id} if meeting_id else None),
+            media_type="text/event-stream",
+            headers=headers,
+        )
+
+    def snapshot():
+        ids = meeting_id if meeting_id else list(active_sessions.keys())
+        return [
+            MeetingStatusEvent(meeting_id=mid, status=active_sessions[mid].status)
+            for mid in ids
+            if mid in active_sessions
+        ]
+
+    return StreamingResponse(
+        stream_status_events(snapshot, meeting_id),
+        media_type="text/event-stream",
+        headers=headers,
+    )
+
+
+@app.get("/meetings/{meeting_id}", response_model=MeetingStatusResponse)
+async def get_meeting_endpoint(meeting_id: str):
+    if is_coordinator():
+        return await dispatch_to_node(meeting_id, "GET", f"/meetings/{meeting_id}")
+
+    state = active_sessions.get(meeting_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"Meeting {meeting_id} does not exist")
+
+    return MeetingStatusResponse(status=state.status, meeting_id=meeting_id)
+
+
+@app.get("/meetings/{meeting_id}/recordings", response_model=List[StoredRecording])
+async def meeting_recordings_endpoint(meeting_id: str):
+    if is_coordinator():
+        return await dispatch_to_node(meeting_id, "GET", f"/meetings/{meeting_id}/recordings")
+
+    return recording_store.list_for_meeting(meeting_id)
+
+
+@app.get(
+    "/meetings/{meeting_id}/transcript/chunks", response_model=TranscriptChunksResponse
+)
+async def transcript_chunks_endpoint(
+    meeting_id: str,
+    max_tokens: int = Query(2000, gt=0),
+    overlap_tokens: int = Query(200, ge=0),
+):
+    if is_coordinator():
+        return await dispatch_to_node(
+            meeting_id,
+            "GET",
+            f"/meetings/{meeting_id}/transcript/chunks",
+            params={"max_tokens": max_tokens, "overlap_tokens": overlap_tokens},
+        )
+
+    transcript = load_transcript(meeting_id)
+    if transcript is None:
+        raise HTTPException(
+            status_code=404, detail=f"No transcript stored for meeting {meeting_id}"
+        )
+
+    chunks = chunk_segments(
+        transcript.get("segments") or [],
+        max_tokens=max_tokens,
+        overlap_tokens=overlap_tokens,
+    )
+    return TranscriptChunksResponse(
+        meeting_id=meeting_id,
+        max_tokens=max_tokens,
+        overlap_tokens=overlap_tokens,
+        chunk_count=len(chunks),
+        chunks=chunks,
+    )
+
+
+@app.post("/transcript/chunks", response_model=TranscriptChunksResponse)
+async def chunk_transcript_endpoint(request: TranscriptChunksRequest):
+    chunks = chunk_segments(
+        [s.model_dump() for s in request.segments],
+        max_tokens=request.max_tokens,
+        overlap_tokens=request.overlap_tokens,
+    )
+    return TranscriptChunksResponse(
+        max_tokens=request.max_tokens,
+        overlap_tokens=request.overlap_tokens,
+        chunk_count=len(chunks),
+        chunks=chunks,
+    )
+
+
+@app.get("/search", response_model=SearchResponse)
+async def search_transcripts_endpoint(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, gt=0, le=200),
+    meeting_id: Optional[str] = None,
+    speaker: Optional[str] = None,
+):
+    started = time.perf_counter()
+    params = {"q": q, "limit": limit, "meeting_id": meeting_id, "speaker": speaker}
+
+    if is_coordinator():
+        # Transcripts live on the nodes that recorded them; each node ranks its own hits and scores stay per node.
+        hits, ranking = merge_by_rank(
+            [(body["hits"], body["ranking"]) for body in await gather_from_nodes("/search", params)], limit
+        )
+    else:
+        hits, ranking = await asyncio.get_running_loop().run_in_executor(
+            None,
+            lambda: transcript_index.search(q, limit=limit, meeting_id=meeting_id, speaker=speaker),
+        )
+
+    return SearchResponse(
+        query=q, ranking=ranking, took_ms=round((time.perf_counter() - started) * 1000, 2), hits=hits
+    )
+
+
+@app.get("/meetings/{meeting_id}/ledger", response_model=MeetingLedger)
+async def meeting_ledger_endpoint(meeting_id: str):
+    if is_coordinator():
+        return await dispatch_to_node(meeting_id, "GET", f"/meetings/{meeting_id}/ledger")
+
+    state = active_sessions.get(meeting_id)
+    if state is not None:
+        return state.ledger
+    ledger = await asyncio.get_running_loop().run_in_executor(None, ledger_store.get, meeting_id)
+    if ledger is None:
+        raise HTTPException(status_code=404, detail=f"No cost ledger for meeting {meeting_id}")
+    return ledger
+
+
+@app.get("/meetings/{meeting_id}/callbacks", response_model=List[OutboxEntry])
+async def meeting_callbacks_endpoint(meeting_id: str):
+    if is_coordinator():
+        return await dispatch_to_node(meeting_id, "GET", f"/meetings/{meeting_id}/callbacks")
+
+    return await asyncio.get_running_loop().run_in_executor(None, callback_outbox.entries, meeting_id)
+
+
+@app.post("/meetings/{meeting_id}/callbacks/retry", response_model=List[OutboxEntry])
+async def retry_meeting_callbacks_endpoint(meeting_id: str):
+    if is_coordinator():
+        return await dispatch_to_node(meeting_id, "POST", f"/meetings/{meeting_id}/callbacks/retry")
+
+    loop = asyncio.get_running_loop()
+    revived = await loop.run_in_executor(None, callback_outbox.retry_dead, meeting_id)
+    logger.info("Re-queued %d dead callbacks of meeting %s", revived, meeting_id)
+    return await loop.run_in_executor(None, callback_outbox.entries, meeting_id)
+
+
+@app.get("/ledger/rollup", response_model=List[LedgerRollup])
+async def ledger_rollup_endpoint(
+    group_by: Literal["day", "status"] = "day",
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+):
+    if is_coordinator():
+        bodies = await gather_from_nodes("/ledger/rollup", {"group_by": group_by, "since": since, "until": until})
+        return merge_rollups(LedgerRollup.model_validate(g) for body in bodies for g in body)
+
+    return await asyncio.get_running_loop().run_in_executor(
+        None, lambda: ledger_store.rollup(group_by=group_by, since=since, until=until)
+    )
+
+
+@app.get("/ledger/top", response_model=List[MeetingLedger])
+async def ledger_top_endpoint(
+    metric: str = Query("browser_cpu_s"),
+    limit: int = Query(10, gt=0, le=500),
+    since: Optional[float] = None,
+):
+    if metric not in COST_FIELDS:
+        raise HTTPException(status_code=422, detail=f"metric must be one of {COST_FIELDS}")
+
+    if is_coordinator():
+        bodies = await gather_from_nodes("/ledger/top", {"metric": metric, "limit": limit, "since": since})
+        # A rejoined meeting may have takes on several nodes; each node only summed its own.
+        runs: Dict[Optional[str], List[MeetingLedger]] = {}
+        for body in bodies:
+            for l in body:
+                ledger = MeetingLedger.model_validate(l)
+                runs.setdefault(ledger.meeting_id, []).append(ledger)
+        ledgers = [merge_ledgers(r) for r in runs.values()]
+        return sorted(ledgers, key=lambda l: getattr(l, metric), reverse=True)[:limit]
+
+    return await asyncio.get_running_loop().run_in_executor(
+        None, lambda: ledger_store.top(metric, limit=limit, since=since)
+    )
+
+
+def _audio_device_registry():
+    if is_coordinator() or is_api_only():
+        raise HTTPException(status_code=503, detail="This instance does not record audio")
+    from app.services.recording_service.recording_service import device_registry
+
+    return device_registry
+
+
+async def _describe_audio_devices(registry) -> Dict[str, Any]:
+    loop = asyncio.get_running_loop()
+    inventory = await loop.run_in_executor(None, registry.inventory)
+    try:
+        resolved = await loop.run_in_executor(None, registry.resolve_loopback)
+    except RuntimeError as e:
+        resolved, error = None, str(e)
+    else:
+        error = None
+    return {
+        "generation": inventory.generation,
+        "enumerated_at": inventory.enumerated_at,
+        "enumeration_ms": round(inventory.took_s * 1000, 2),
+        "enumerations": registry.enumerations,
+        "devices": [asdict(d) for d in inventory.devices],
+        "loopback": {**asdict(resolved.device), "loopback": resolved.loopback} if resolved else None,
+        "error": error,
+    }
+
+
+@app.get("/audio-devices")
+async def audio_devices_endpoint():
+    return await _describe_audio_devices(_audio_device_registry())
+
+
+@app.post("/audio-devices/refresh")
+async def refresh_audio_devices_endpoint():
+    # For hotplug: PortAudio cannot report new devices by itself, so plugging in a sink is followed by this call.
+    registry = _audio_device_registry()
+    registry.invalidate("refresh requested")
+    return await _describe_audio_devices(registry)
+
+
+@app.get("/metrics/loop")
+async def loop_metrics_endpoint():
+    return loop_monitor.metrics()
+
+
+@app.post("/nodes/heartbeat", response_model=NodeStatus)
+async def node_heartbeat_endpoint(heartbeat: NodeHeartbeat):
+    if not is_coordinator():
+        raise HTTPException(status_code=404, detail="This node is not a coordinator")
+
+    return node_registry.heartbeat(heartbeat)
+
+
+@app.get("/nodes", response_model=List[NodeStatus])
+async def list_nodes_endpoint():
+    node_registry.expire()
+    return list(node_registry.nodes.values())
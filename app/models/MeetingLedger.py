@@ -0,0 +1,44 @@
+import time
+import uuid
+from typing import Dict, Optional
+
+from pydantic import BaseModel, Field
+
+
+class MeetingLedger(BaseModel):
+    # One ledger per take: rejoining a meeting starts a new run instead of overwriting the earlier one.
+    run_id: str = Field(default_factory=lambda: uuid.uuid4().hex)
+    meeting_id: Optional[str] = None
+    job_id: Optional[str] = None
+    status: Optional[str] = None
+    started_at: float = Field(default_factory=time.time)
+    updated_at: float = Field(default_factory=time.time)
+
+    browser_cpu_s: float = 0.0
+    browser_peak_rss_mb: float = 0.0
+    audio_recorded_s: float = 0.0
+    audio_sent_to_stt_s: float = 0.0
+    stt_attempts: int = 0
+    stt_wall_s: float = 0.0
+    stt_upload_bytes: int = 0
+    resume_posts: int = 0
+    resume_payload_bytes: int = 0
+    jira_calls: int = 0
+    jira_errors: int = 0
+    jira_latency_s: float = 0.0
+    jira_latency_max_s: float = 0.0
+
+
+# Rollups add these up across meetings, except the peaks, which keep the maximum.
+COST_FIELDS = [
+    name for name, field in MeetingLedger.model_fields.items() if field.annotation in (int, float)
+    and name not in ("started_at", "updated_at")
+]
+PEAK_FIELDS = {"browser_peak_rss_mb", "jira_latency_max_s"}
+
+
+class LedgerRollup(BaseModel):
+    key: str
+    meetings: int
+    runs: int = 0
+    totals: Dict[str, float]
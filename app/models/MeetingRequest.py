@@ -1,7 +1,17 @@
-from pydantic import BaseModel
+from typing import Literal
+
+from pydantic import AwareDatetime, BaseModel
 
 
 class MeetingRequest(BaseModel):
     meeting_id: str
     estimated_duration: int
     resume_url: str
+    # "captions" sends the scraped live captions instead of running STT; "draft" stores them (and sends them to
+    # CAPTION_DRAFT_URL, if set) right after the call, then runs STT as usual.
+    transcript_mode: Literal["stt", "captions", "draft"] = "stt"
+
+
+class ScheduledMeetingRequest(MeetingRequest):
+    # Must carry an offset ("2026-03-02T09:00:00Z"); a naive time would be read as the server's local time.
+    start_at: AwareDatetime
@@ -1,14 +1,20 @@
+import time
 from enum import Enum
+from typing import Any, Callable, List, Optional, Tuple
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from app.models.MeetingLedger import MeetingLedger
 
 
 class MeetingStatus(str, Enum):
+    SCHEDULED = "scheduled"
     STARTING = "starting"
     CONNECTED = "connected"
     RECORDING = "recording"
     FINISHED = "finished"
     CRASHED = "crashed"
+    NO_AUDIO = "no_audio"
     TRANSCRIBED = "transcribed"
     PROCESSING = "processing"
     PROCESSED = "processed"
@@ -19,6 +25,59 @@ class MeetingStatusResponse(BaseModel):
     meeting_id: str
 
 
+class MeetingStatusEvent(BaseModel):
+    meeting_id: str
+    status: MeetingStatus
+    previous: Optional[MeetingStatus] = None
+    timestamp: float = Field(default_factory=time.time)
+
+
+StatusListener = Callable[[MeetingStatusEvent], None]
+_status_listeners: List[StatusListener] = []
+
+
+def add_status_listener(listener: StatusListener):
+    _status_listeners.append(listener)
+
+
+def remove_status_listener(listener: StatusListener):
+    if listener in _status_listeners:
+        _status_listeners.remove(listener)
+
+
 class MeetingState(BaseModel):
     status: MeetingStatus
     resume_url: str
+    audio_path: Optional[str] = None
+    # Recording store job of the latest take; its path changes once the recording moves to the cold tier.
+    job_id: Optional[str] = None
+    meeting_id: Optional[str] = None
+    # (pre-warm start, recording deadline) of a scheduled join, as epoch seconds.
+    join_window: Optional[Tuple[float, float]] = None
+    ledger: MeetingLedger = Field(default_factory=MeetingLedger)
+
+    def model_post_init(self, __context: Any):
+        self.ledger.meeting_id = self.meeting_id
+        self.ledger.status = self.status.value
+        self._notify(None)
+
+    def __setattr__(self, name: str, value: Any):
+        if name != "status":
+            super().__setattr__(name, value)
+            return
+
+        previous = self.status
+        super().__setattr__(name, value)
+        self.ledger.status = self.status.value
+        if self.status != previous:
+            self._notify(previous)
+
+    def _notify(self, previous: Optional[MeetingStatus]):
+        if self.meeting_id is None or not _status_listeners:
+            return
+
+        event = MeetingStatusEvent(
+            meeting_id=self.meeting_id, status=self.status, previous=previous
+        )
+        for listener in list(_status_listeners):
+            listener(event)
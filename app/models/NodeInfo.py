@@ -0,0 +1,24 @@
+from typing import List
+
+from pydantic import BaseModel
+
+
+class NodeCapacity(BaseModel):
+    browser_slots: int
+    free_browser_slots: int
+    audio_sinks: int
+    free_audio_sinks: int
+    load: float
+
+
+class NodeHeartbeat(BaseModel):
+    node_id: str
+    url: str
+    capacity: NodeCapacity
+    meetings: List[str] = []
+
+
+class NodeStatus(NodeHeartbeat):
+    last_seen: float
+    alive: bool
+    reserved: int = 0
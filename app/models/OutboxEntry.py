@@ -0,0 +1,18 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class OutboxEntry(BaseModel):
+    id: int
+    meeting_id: str
+    kind: str
+    dedupe_key: str
+    url: str
+    status: str
+    size_bytes: int
+    attempts: int
+    created_at: float
+    next_attempt_at: float
+    delivered_at: Optional[float] = None
+    last_error: Optional[str] = None
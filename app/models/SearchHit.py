@@ -0,0 +1,22 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class SearchHit(BaseModel):
+    meeting_id: str
+    speaker: Optional[str] = None
+    start: Optional[float] = None
+    end: Optional[float] = None
+    text: str
+    snippet: str
+    # bm25 from the node's own index: lower is better, comparable only between hits of one node.
+    score: float
+
+
+class SearchResponse(BaseModel):
+    query: str
+    # "relevance", "recent" (a common term fell back to newest-first) or, across nodes, "mixed".
+    ranking: str
+    took_ms: float
+    hits: List[SearchHit]
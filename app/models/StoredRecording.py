@@ -0,0 +1,15 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class StoredRecording(BaseModel):
+    job_id: str
+    meeting_id: str
+    path: str
+    tier: str
+    size_bytes: int
+    sha256: Optional[str] = None
+    created_at: float
+    last_access: float
+    active: bool
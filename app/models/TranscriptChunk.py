@@ -0,0 +1,33 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class TranscriptSegment(BaseModel):
+    speaker: Optional[str] = None
+    text: str
+    start: Optional[float] = None
+    end: Optional[float] = None
+
+
+class TranscriptChunk(BaseModel):
+    index: int
+    start: Optional[float] = None
+    end: Optional[float] = None
+    speakers: List[str]
+    token_estimate: int
+    segments: List[TranscriptSegment]
+
+
+class TranscriptChunksRequest(BaseModel):
+    segments: List[TranscriptSegment]
+    max_tokens: int = 2000
+    overlap_tokens: int = 200
+
+
+class TranscriptChunksResponse(BaseModel):
+    meeting_id: Optional[str] = None
+    max_tokens: int
+    overlap_tokens: int
+    chunk_count: int
+    chunks: List[TranscriptChunk]
@@ -1,7 +1,26 @@
-from .meeting_service.meeting_service import *
-from .recording_service.recording import *
-from .recording_service.recording_service import *
-from .transcription_service.transcription_service import *
+import importlib
+
+# Service modules pull in Playwright, PortAudio, numpy and the STT SDK; resolve names on
+# first access so importing the package (e.g. for the API-only profile) stays cheap.
+_lazy_exports = {
+    "connect_meeting": ".meeting_service.meeting_service",
+    "select_recording_device": ".meeting_service.meeting_service",
+    "ask_to_join": ".meeting_service.meeting_service",
+    "wait_for_meeting_end": ".meeting_service.meeting_service",
+    "wait_for_approve": ".meeting_service.meeting_service",
+    "stop_recording": ".recording_service.recording_service",
+    "start_recording": ".recording_service.recording_service",
+    "RecordingHandle": ".recording_service.recording",
+}
 
 __all__ = ["connect_meeting", "select_recording_device", "ask_to_join", "wait_for_meeting_end", "wait_for_approve",
            "stop_recording", "start_recording", "RecordingHandle"]
+
+
+def __getattr__(name: str):
+    module = _lazy_exports.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,160 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import re
+import secrets
+import time
+import wave
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import BinaryIO, Optional, Tuple, Union
+
+from app.services.recording_service.chunked_recording import open_recording_stream
+from app.utils import get_logger
+
+logger = get_logger("artifact-service")
+
+CONTENT_TYPES = {".mp3": "audio/mpeg", ".wav": "audio/wav"}
+_ARTIFACT_NAME = re.compile(r"^[0-9a-f]{64}\.(mp3|wav)$")
+
+
+class ArtifactTokenError(ValueError):
+    pass
+
+
+@dataclass
+class ArtifactRef:
+    url: str
+    size: int
+    sha256: str
+    duration: Optional[float]
+    content_type: str
+    expires_at: int
+
+    def to_payload(self) -> dict:
+        return asdict(self)
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _unb64(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def wav_duration(path: Union[str, Path]) -> Optional[float]:
+    try:
+        with open_recording_stream(path) as stream, wave.open(stream, "rb") as w:
+            return round(w.getnframes() / w.getframerate(), 3)
+    except Exception:
+        return None
+
+
+class ArtifactStore:
+    def __init__(
+        self,
+        root: str = "./app/data/artifacts",
+        *,
+        secret: Optional[str] = None,
+        ttl_s: float = 86400.0,
+        base_url: str = "http://localhost:8000",
+    ):
+        self.root = Path(root)
+        self.ttl_s = ttl_s
+        self.base_url = base_url.rstrip("/")
+        self._key = secret.encode() if secret else None
+        self.shared_secret = bool(secret)
+
+    def _sign(self, body: str) -> str:
+        if self._key is None:
+            # Links then only work until this process restarts; nodes behind a load balancer need a shared secret.
+            logger.warning("ARTIFACT_SECRET not set; using a per-process secret for artifact links")
+            self._key = secrets.token_hex(32).encode()
+        return _b64(hmac.new(self._key, body.encode(), hashlib.sha256).digest())
+
+    def token_for(self, name: str, expires_at: int) -> str:
+        body = _b64(json.dumps({"n": name, "e": expires_at}, separators=(",", ":")).encode())
+        return f"{body}.{self._sign(body)}"
+
+    def resolve(self, token: str) -> Tuple[Path, str]:
+        body, _, signature = token.partition(".")
+        if not signature or not hmac.compare_digest(signature, self._sign(body)):
+            raise ArtifactTokenError("invalid artifact token")
+        try:
+            claims = json.loads(_unb64(body))
+            name, expires_at = claims["n"], int(claims["e"])
+        except Exception:
+            raise ArtifactTokenError("malformed artifact token")
+        if expires_at < time.time():
+            raise ArtifactTokenError("artifact link expired")
+        if not _ARTIFACT_NAME.match(name):
+            raise ArtifactTokenError("invalid artifact name")
+
+        path = self.root / name
+        if not path.exists():
+            raise FileNotFoundError(name)
+        return path, CONTENT_TYPES[path.suffix]
+
+    def _store(self, source: BinaryIO, suffix: str) -> Tuple[str, int, str]:
+        # Content-addressed: publishing the same recording again replaces the file rather than adding another.
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f".{secrets.token_hex(8)}.part"
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(tmp, "wb") as out:
+                while True:
+                    data = source.read(1 << 20)
+                    if not data:
+                        break
+                    digest.update(data)
+                    out.write(data)
+                    size += len(data)
+            sha = digest.hexdigest()
+            name = f"{sha}{suffix}"
+            os.replace(tmp, self.root / name)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        return name, size, sha
+
+    def publish(
+        self, source: BinaryIO, suffix: str, *, duration: Optional[float] = None
+    ) -> ArtifactRef:
+        self.prune()
+        name, size, sha = self._store(source, suffix)
+        expires_at = int(time.time() + self.ttl_s)
+        # The file outlives its newest link; prune() goes by mtime.
+        os.utime(self.root / name)
+        return ArtifactRef(
+            url=f"{self.base_url}/artifacts/{self.token_for(name, expires_at)}",
+            size=size,
+            sha256=sha,
+            duration=duration,
+            content_type=CONTENT_TYPES[suffix],
+            expires_at=expires_at,
+        )
+
+    def prune(self) -> int:
+        if not self.root.exists():
+            return 0
+        cutoff = time.time() - self.ttl_s
+        removed = 0
+        for path in self.root.iterdir():
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+
+artifact_store = ArtifactStore(
+    secret=os.getenv("ARTIFACT_SECRET"),
+    ttl_s=float(os.getenv("ARTIFACT_TTL_H", "24")) * 3600,
+    base_url=os.getenv("ARTIFACT_BASE_URL") or os.getenv("NODE_URL") or "http://localhost:8000",
+)
@@ -0,0 +1,209 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from app.models.MeetingStatusResponse import MeetingState, MeetingStatus
+from app.services.outbox_service.callback_outbox import callback_outbox
+from app.services.transcription_service.transcript_store import save_transcript
+from app.utils import get_logger
+
+logger = get_logger("caption-service")
+
+# The resume URL is single-use, so drafts never go there; this optional webhook receives them instead.
+CAPTION_DRAFT_URL = os.getenv("CAPTION_DRAFT_URL")
+
+# Meet renames its classes from time to time; these are the only DOM assumptions the scraper makes.
+CAPTION_SELECTORS = {
+    "region": '[role="region"][aria-label*="Captions" i]',
+    "entry": ".nMcdL",
+    "speaker": ".NWpY1d",
+    "text": ".ygicle",
+}
+# Meet labels the captions button with what it would do next.
+CAPTION_TOGGLES = {
+    "on": '[aria-label*="Turn on captions" i]',
+    "off": '[aria-label*="Turn off captions" i]',
+}
+
+# Runs in the page: waits for the caption region, then watches only that subtree and pushes the latest
+# text of every changed caption entry to Python in small batches, never the whole DOM.
+CAPTION_OBSERVER_JS = """
+(sel) => {
+  if (window.__captionObserver) return;
+  const ids = new WeakMap();
+  const pending = new Map();
+  let nextId = 0;
+  let timer = null;
+
+  const flush = () => {
+    if (timer !== null) { clearTimeout(timer); timer = null; }
+    if (!pending.size) return;
+    const batch = Array.from(pending.values());
+    pending.clear();
+    window.__captionSink(batch);
+  };
+
+  const read = (entry) => {
+    const textEl = entry.querySelector(sel.text);
+    const text = textEl ? textEl.textContent.trim() : "";
+    if (!text) return;
+    const speakerEl = entry.querySelector(sel.speaker);
+    let id = ids.get(entry);
+    if (id === undefined) { id = nextId++; ids.set(entry, id); }
+    pending.set(id, { id, speaker: speakerEl ? speakerEl.textContent.trim() : null, text, t: Date.now() });
+    if (timer === null) timer = setTimeout(flush, sel.flushMs);
+  };
+
+  const observer = new MutationObserver((mutations) => {
+    for (const m of mutations) {
+      const node = m.target.nodeType === 1 ? m.target : m.target.parentElement;
+      const entry = node && node.closest(sel.entry);
+      if (entry) read(entry);
+      for (const added of m.addedNodes) {
+        if (added.nodeType !== 1) continue;
+        if (added.matches(sel.entry)) read(added);
+        else added.querySelectorAll(sel.entry).forEach(read);
+      }
+    }
+  });
+
+  const attach = (region) => {
+    region.querySelectorAll(sel.entry).forEach(read);
+    observer.observe(region, { childList: true, subtree: true, characterData: true });
+  };
+
+  const region = document.querySelector(sel.region);
+  if (region) {
+    attach(region);
+  } else {
+    const finder = new MutationObserver(() => {
+      const found = document.querySelector(sel.region);
+      if (found) { finder.disconnect(); attach(found); }
+    });
+    finder.observe(document.body, { childList: true, subtree: true });
+  }
+
+  window.__captionObserver = observer;
+  window.__captionFlush = flush;
+}
+"""
+
+
+class CaptionCollector:
+    def __init__(self, *, started_at: Optional[float] = None, flush_ms: int = 250):
+        self.started_at = started_at if started_at is not None else time.time()
+        self.flush_ms = flush_ms
+        self.entries: Dict[int, dict] = {}
+
+    def on_batch(self, _source: Any, batch: List[dict]):
+        for update in batch:
+            at = update["t"] / 1000 - self.started_at
+            entry = self.entries.get(update["id"])
+            if entry is None:
+                self.entries[update["id"]] = {
+                    "speaker": update.get("speaker"),
+                    "text": update["text"],
+                    "start": max(0.0, at),
+                    "end": max(0.0, at),
+                }
+                continue
+            # Meet rewrites a caption in place as recognition firms up; the latest text wins.
+            entry["text"] = update["text"]
+            entry["end"] = max(entry["end"], at)
+            if update.get("speaker"):
+                entry["speaker"] = update["speaker"]
+
+    async def attach(self, page):
+        await page.page.expose_binding("__captionSink", self.on_batch)
+        await page.page.evaluate(CAPTION_OBSERVER_JS, {**CAPTION_SELECTORS, "flushMs": self.flush_ms})
+        logger.info("Caption observer attached")
+
+    async def drain(self, page):
+        try:
+            await page.page.evaluate("() => window.__captionFlush && window.__captionFlush()")
+        except Exception as e:
+            logger.warning("Could not drain pending captions: %s", e)
+
+    def segments(self) -> List[dict]:
+        segments: List[dict] = []
+        for entry in sorted(self.entries.values(), key=lambda e: e["start"]):
+            last = segments[-1] if segments else None
+            if last is not None and last["speaker"] == entry["speaker"]:
+                last["text"] = f"{last['text']} {entry['text']}"
+                last["end"] = round(max(last["end"], entry["end"]), 3)
+            else:
+                segments.append(
+                    {
+                        "speaker": entry["speaker"],
+                        "text": entry["text"],
+                        "start": round(entry["start"], 3),
+                        "end": round(entry["end"], 3),
+                    }
+                )
+        return segments
+
+
+async def captions_on(page) -> bool:
+    return await page.page.locator(f'{CAPTION_SELECTORS["region"]}, {CAPTION_TOGGLES["off"]}').count() > 0
+
+
+async def enable_captions(page) -> bool:
+    if await captions_on(page):
+        logger.info("Captions already on")
+        return True
+    if await page.safe_click(selector=CAPTION_TOGGLES["on"], timeout=3000):
+        return True
+    # "c" is Meet's captions shortcut, used when the toolbar button is hidden behind the overflow menu. It toggles,
+    # so it is pressed only once captions are known to be off, and the result is checked.
+    try:
+        await page.page.keyboard.press("c")
+        await page.page.wait_for_selector(
+            f'{CAPTION_SELECTORS["region"]}, {CAPTION_TOGGLES["off"]}', state="attached", timeout=3000
+        )
+        return True
+    except Exception as e:
+        logger.warning("Could not turn on captions: %s", e)
+        return False
+
+
+async def deliver_caption_transcript(
+    active_sessions: Dict[str, MeetingState],
+    meeting_id: str,
+    segments: List[dict],
+    *,
+    draft: bool,
+):
+    state = active_sessions.get(meeting_id)
+    loop = asyncio.get_running_loop()
+    payload = {
+        "meeting_id": meeting_id,
+        "full_text": " ".join(s["text"] for s in segments),
+        "segments": segments,
+        "speaker_stats": [],
+        "source": "captions",
+        "draft": draft,
+    }
+
+    # Stored and searchable right away; in draft mode the STT transcript replaces it once it is ready.
+    await loop.run_in_executor(None, save_transcript, meeting_id, payload)
+
+    if draft:
+        if CAPTION_DRAFT_URL:
+            logger.info("Sending draft caption transcript with %d segments", len(segments))
+            await loop.run_in_executor(
+                None,
+                lambda: callback_outbox.enqueue(
+                    meeting_id, CAPTION_DRAFT_URL, payload, kind="caption-draft", ledger=state.ledger
+                ),
+            )
+        return
+
+    logger.info("Sending caption transcript with %d segments", len(segments))
+    await loop.run_in_executor(
+        None,
+        lambda: callback_outbox.enqueue(
+            meeting_id, state.resume_url, payload, kind="captions", ledger=state.ledger
+        ),
+    )
+    state.status = MeetingStatus.TRANSCRIBED
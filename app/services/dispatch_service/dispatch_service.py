@@ -0,0 +1,260 @@
+import asyncio
+import os
+import socket
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.models.MeetingStatusResponse import MeetingState, MeetingStatus
+from app.models.NodeInfo import NodeCapacity, NodeHeartbeat, NodeStatus
+from app.utils import get_logger
+
+logger = get_logger("dispatch-service")
+
+BUSY_BROWSER_STATUSES = {
+    MeetingStatus.STARTING,
+    MeetingStatus.CONNECTED,
+    MeetingStatus.RECORDING,
+}
+
+
+def node_role() -> str:
+    return os.getenv("NODE_ROLE", "standalone").lower()
+
+
+def is_coordinator() -> bool:
+    return node_role() == "coordinator"
+
+
+def is_worker_node() -> bool:
+    return node_role() == "worker"
+
+
+class NoCapacityError(RuntimeError):
+    pass
+
+
+class NodeRegistry:
+    def __init__(self, *, node_timeout_s: float = 15.0):
+        self.node_timeout_s = node_timeout_s
+        self.nodes: Dict[str, NodeStatus] = {}
+        self.placements: Dict[str, str] = {}
+
+    def heartbeat(self, heartbeat: NodeHeartbeat) -> NodeStatus:
+        known = self.nodes.get(heartbeat.node_id)
+        if known is None or not known.alive:
+            logger.info("Node %s is up at %s", heartbeat.node_id, heartbeat.url)
+
+        # A node reports the meetings it really holds; that also repairs placements after a coordinator restart.
+        reported = set(heartbeat.meetings)
+        for meeting_id in set(known.meetings if known else ()) - reported:
+            if self.placements.get(meeting_id) == heartbeat.node_id:
+                del self.placements[meeting_id]
+        for meeting_id in reported:
+            self.placements[meeting_id] = heartbeat.node_id
+
+        # A heartbeat sent while a placement was in flight does not count it yet; it stays reserved until one does.
+        reserved = sum(1 for m, n in self.placements.items() if n == heartbeat.node_id and m not in reported)
+        status = NodeStatus(
+            **heartbeat.model_dump(), last_seen=time.monotonic(), alive=True, reserved=reserved
+        )
+        self.nodes[heartbeat.node_id] = status
+        return status
+
+    def expire(self) -> List[str]:
+        now = time.monotonic()
+        expired = []
+        for node in self.nodes.values():
+            if node.alive and now - node.last_seen > self.node_timeout_s:
+                node.alive = False
+                expired.append(node.node_id)
+                logger.error(
+                    "Node %s missed heartbeats for %.1fs; marking it down", node.node_id, now - node.last_seen
+                )
+        return expired
+
+    def _score(self, node: NodeStatus) -> float:
+        cap = node.capacity
+        used = cap.browser_slots - cap.free_browser_slots + node.reserved
+        return used / max(cap.browser_slots, 1) + cap.load
+
+    def _has_room(self, node: NodeStatus) -> bool:
+        cap = node.capacity
+        return (
+            cap.free_browser_slots - node.reserved > 0
+            and cap.free_audio_sinks - node.reserved > 0
+        )
+
+    def place(self, meeting_id: str) -> NodeStatus:
+        sticky = self.node_for(meeting_id)
+        if sticky is not None:
+            return sticky
+
+        candidates = [n for n in self.nodes.values() if n.alive and self._has_room(n)]
+        if not candidates:
+            raise NoCapacityError("No worker node has a free browser slot and audio sink")
+
+        node = min(candidates, key=self._score)
+        # Counted until the node's next heartbeat reports the meeting itself.
+        node.reserved += 1
+        self.placements[meeting_id] = node.node_id
+        logger.info("Placed meeting %s on node %s", meeting_id, node.node_id)
+        return node
+
+    def node_for(self, meeting_id: str) -> Optional[NodeStatus]:
+        node_id = self.placements.get(meeting_id)
+        if node_id is None:
+            return None
+        node = self.nodes.get(node_id)
+        if node is None or not node.alive:
+            return None
+        return node
+
+    def release(self, meeting_id: str):
+        self.placements.pop(meeting_id, None)
+
+
+node_registry = NodeRegistry(node_timeout_s=float(os.getenv("NODE_TIMEOUT_S", "15")))
+
+
+async def forward_request(
+    node: NodeStatus,
+    method: str,
+    path: str,
+    *,
+    params: Optional[Dict[str, Any]] = None,
+    json: Any = None,
+    timeout_s: float = 30.0,
+) -> Tuple[int, Any]:
+    async with httpx.AsyncClient(timeout=timeout_s) as client:
+        response = await client.request(
+            method, f"{node.url.rstrip('/')}{path}", params=params, json=json
+        )
+    if not response.content:
+        return response.status_code, None
+    try:
+        return response.status_code, response.json()
+    except ValueError:
+        # A proxy or a crashing node can answer with plain text or HTML.
+        return response.status_code, response.text
+
+
+async def stream_from_nodes(
+    nodes: List[NodeStatus],
+    path: str,
+    params: Optional[Dict[str, Any]] = None,
+    *,
+    heartbeat_s: float = 15.0,
+) -> AsyncIterator[str]:
+    # Merges the server-sent events of several nodes. Events pass through whole; the nodes' own keep-alives
+    # are dropped in favour of one from the coordinator. Ends once every node stream has ended.
+    queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+
+    async def pump(client: httpx.AsyncClient, node: NodeStatus):
+        try:
+            async with client.stream("GET", f"{node.url.rstrip('/')}{path}", params=params) as response:
+                response.raise_for_status()
+                lines: List[str] = []
+                async for line in response.aiter_lines():
+                    if line:
+                        lines.append(line)
+                        continue
+                    if any(not l.startswith(":") for l in lines):
+                        await queue.put("\n".join(lines) + "\n\n")
+                    lines = []
+        except httpx.HTTPError as e:
+            logger.warning("Event stream from node %s ended: %s", node.node_id, e)
+        finally:
+            await queue.put(None)
+
+    async with httpx.AsyncClient(timeout=httpx.Timeout(10.0, read=None)) as client:
+        pumps = [asyncio.create_task(pump(client, n)) for n in nodes]
+        running = len(pumps)
+        try:
+            while running:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=heartbeat_s)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    running -= 1
+                else:
+                    yield event
+        finally:
+            for task in pumps:
+                task.cancel()
+            await asyncio.gather(*pumps, return_exceptions=True)
+
+
+async def run_node_expiry(interval_s: float = 5.0):
+    while True:
+        await asyncio.sleep(interval_s)
+        node_registry.expire()
+
+
+def _booked(state: MeetingState, now: float, horizon_s: float) -> bool:
+    # A meeting joined now would still be running when a scheduled one pre-warms, so a scheduled join holds
+    # its slot from the moment its window comes within the horizon.
+    if state.status != MeetingStatus.SCHEDULED or state.join_window is None:
+        return False
+    starts, ends = state.join_window
+    return starts < now + horizon_s and ends > now
+
+
+def local_capacity(active_sessions: Dict[str, MeetingState]) -> NodeCapacity:
+    browser_slots = int(os.getenv("MAX_BROWSER_SLOTS", "2"))
+    audio_sinks = int(os.getenv("MAX_AUDIO_SINKS", "1"))
+    horizon_s = float(os.getenv("CAPACITY_HORIZON_S", "3600"))
+
+    now = time.time()
+    booked = sum(1 for s in active_sessions.values() if _booked(s, now, horizon_s))
+    busy_browsers = booked + sum(1 for s in active_sessions.values() if s.status in BUSY_BROWSER_STATUSES)
+    busy_sinks = booked + sum(1 for s in active_sessions.values() if s.status == MeetingStatus.RECORDING)
+
+    try:
+        load = os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        load = 0.0
+
+    return NodeCapacity(
+        browser_slots=browser_slots,
+        free_browser_slots=max(0, browser_slots - busy_browsers),
+        audio_sinks=audio_sinks,
+        free_audio_sinks=max(0, audio_sinks - busy_sinks),
+        load=load,
+    )
+
+
+async def run_heartbeat(
+    active_sessions: Dict[str, MeetingState],
+    *,
+    interval_s: float = 5.0,
+    capacity: Callable[[Dict[str, MeetingState]], NodeCapacity] = local_capacity,
+):
+    coordinator_url = os.getenv("COORDINATOR_URL")
+    node_url = os.getenv("NODE_URL")
+    if not coordinator_url or not node_url:
+        raise RuntimeError("Worker node requires COORDINATOR_URL and NODE_URL")
+
+    node_id = os.getenv("NODE_ID") or f"{socket.gethostname()}-{os.getpid()}"
+    url = f"{coordinator_url.rstrip('/')}/nodes/heartbeat"
+
+    async with httpx.AsyncClient(timeout=5.0) as client:
+        while True:
+            try:
+                heartbeat = NodeHeartbeat(
+                    node_id=node_id,
+                    url=node_url,
+                    capacity=capacity(active_sessions),
+                    meetings=list(active_sessions.keys()),
+                )
+                response = await client.post(url, json=heartbeat.model_dump())
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                logger.warning("Heartbeat to coordinator %s failed: %s", coordinator_url, e)
+            except Exception as e:
+                # A malformed URL or a failing capacity probe; the coordinator would drop this node if it stopped.
+                logger.exception("Heartbeat to coordinator %s failed: %s", coordinator_url, e)
+            await asyncio.sleep(interval_s)
@@ -0,0 +1,213 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import zlib
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.utils import get_logger
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = get_logger("duplicate-index")
+
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+
+_WORD = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it of on or that the this to was were will with "
+    "i w z na do nie sie się oraz jest to że jak po za".split()
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS issues (
+    key TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    signature BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    synced_at REAL NOT NULL
+);
+"""
+
+
+@dataclass
+class DuplicateMatch:
+    key: str
+    summary: str
+    similarity: float
+
+
+@dataclass
+class IssueText:
+    key: str
+    summary: str
+    description: str
+    open: bool = True
+
+
+def features(text: str) -> Set[str]:
+    # Words plus adjacent word pairs: rephrasings keep most words, while pairs keep word order meaningful.
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(c for c in folded if not unicodedata.combining(c)).replace("ł", "l")
+    words = [w for w in _WORD.findall(folded) if w not in STOPWORDS]
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+@lru_cache(maxsize=1)
+def _permutations() -> Tuple["np.ndarray", "np.ndarray"]:
+    # numpy is only loaded once the index is used; importing the Jira service must stay cheap.
+    import numpy as np
+
+    rng = np.random.default_rng(1729)
+    # Multiply-shift hashing: (a*h + b) wraps modulo 2^64 and the high 32 bits act as one permutation per (a, b).
+    a = rng.integers(0, 1 << 63, NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 1 << 63, NUM_PERM, dtype=np.uint64)
+    return a, b
+
+
+def signature(feats: Iterable[str]) -> Optional["np.ndarray"]:
+    import numpy as np
+
+    hashes = np.fromiter((zlib.crc32(f.encode()) for f in feats), dtype=np.uint64)
+    if hashes.size == 0:
+        return None
+    a, b = _permutations()
+    permuted = (hashes[:, None] * a + b) >> np.uint64(32)
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+class DuplicateIndex:
+    def __init__(self, path: str = "./app/data/jira/issues.db", *, threshold: float = 0.5, min_features: int = 3):
+        self.path = Path(path)
+        self.threshold = threshold
+        self.min_features = min_features
+        self.synced_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._signatures: Dict[str, "np.ndarray"] = {}
+        self._summaries: Dict[str, str] = {}
+        self._buckets: List[Dict[bytes, Set[str]]] = [{} for _ in range(BANDS)]
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            import numpy as np
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+            self._db = db
+            for key, summary, blob in db.execute("SELECT key, summary, signature FROM issues"):
+                self._insert(key, summary, np.frombuffer(blob, dtype=np.uint32))
+            row = db.execute("SELECT synced_at FROM sync_state WHERE id = 1").fetchone()
+            self.synced_at = row[0] if row else None
+        return self._db
+
+    @staticmethod
+    def _bands(sig: "np.ndarray") -> List[bytes]:
+        return [sig[i * ROWS:(i + 1) * ROWS].tobytes() for i in range(BANDS)]
+
+    def _insert(self, key: str, summary: str, sig: "np.ndarray"):
+        self._remove(key)
+        self._signatures[key] = sig
+        self._summaries[key] = summary
+        for band, bucket_key in zip(self._buckets, self._bands(sig)):
+            band.setdefault(bucket_key, set()).add(key)
+
+    def _remove(self, key: str):
+        sig = self._signatures.pop(key, None)
+        if sig is None:
+            return
+        self._summaries.pop(key, None)
+        for band, bucket_key in zip(self._buckets, self._bands(sig)):
+            bucket = band.get(bucket_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del band[bucket_key]
+
+    def _signature_for(self, text: str) -> Optional["np.ndarray"]:
+        feats = features(text)
+        if len(feats) < self.min_features:
+            return None
+        return signature(feats)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._conn()
+            return len(self._signatures)
+
+    def apply(self, issues: Iterable[IssueText], *, synced_at: Optional[float] = None) -> Tuple[int, int]:
+        # Signatures are computed outside the lock; an initial sync of a large backlog must not stall lookups.
+        prepared = []
+        for issue in issues:
+            sig = self._signature_for(f"{issue.summary}\n{issue.description}") if issue.open else None
+            prepared.append((issue, sig))
+
+        upserted = removed = 0
+        with self._lock:
+            db = self._conn()
+            with db:
+                for issue, sig in prepared:
+                    if sig is None:
+                        db.execute("DELETE FROM issues WHERE key = ?", (issue.key,))
+                        removed += issue.key in self._signatures
+                        self._remove(issue.key)
+                        continue
+                    db.execute(
+                        "INSERT OR REPLACE INTO issues (key, summary, signature) VALUES (?, ?, ?)",
+                        (issue.key, issue.summary, sig.tobytes()),
+                    )
+                    self._insert(issue.key, issue.summary, sig)
+                    upserted += 1
+                if synced_at is not None:
+                    db.execute("INSERT OR REPLACE INTO sync_state (id, synced_at) VALUES (1, ?)", (synced_at,))
+                    self.synced_at = synced_at
+        return upserted, removed
+
+    def add(self, key: str, summary: str, description: str):
+        self.apply([IssueText(key, summary, description)])
+
+    def find(self, summary: str, description: str = "", *, limit: int = 3) -> List[DuplicateMatch]:
+        import numpy as np
+
+        sig = self._signature_for(f"{summary}\n{description}")
+        if sig is None:
+            return []
+
+        with self._lock:
+            self._conn()
+            candidates: Set[str] = set()
+            for band, bucket_key in zip(self._buckets, self._bands(sig)):
+                bucket = band.get(bucket_key)
+                if bucket:
+                    candidates |= bucket
+            if not candidates:
+                return []
+            keys = list(candidates)
+            # Share of equal MinHash slots estimates the Jaccard similarity of the two feature sets.
+            similarity = (np.stack([self._signatures[k] for k in keys]) == sig).mean(axis=1)
+            matches = [
+                DuplicateMatch(key, self._summaries[key], round(float(s), 3))
+                for key, s in zip(keys, similarity)
+                if s >= self.threshold
+            ]
+        return sorted(matches, key=lambda m: -m.similarity)[:limit]
+
+    def sync_age_s(self) -> Optional[float]:
+        with self._lock:
+            self._conn()
+            return None if self.synced_at is None else time.time() - self.synced_at
+
+
+duplicate_index = DuplicateIndex(threshold=float(os.getenv("JIRA_DUPLICATE_THRESHOLD", "0.5")))
@@ -1,8 +1,15 @@
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Tuple, Union
 import asyncio
+import time
 
 from app.models.JiraTaskRequest import JiraTaskRequest, JiraFeature, JiraTask, JiraBug
 from app.models.MeetingStatusResponse import MeetingState, MeetingStatus
+from app.services.issue_index_service.duplicate_index import (
+    DuplicateMatch,
+    IssueText,
+    duplicate_index,
+)
+from app.services.ledger_service.ledger_store import charge, charge_peak, charge_to
 from app.utils import get_logger
 
 import os
@@ -21,6 +28,19 @@ issue_type = {"Story": "10001", "Sub-task": "10005", "Bug": "10004"}
 
 SPACE_KEY = os.getenv("JIRA_SPACE_KEY")
 
+# "skip" drops near-duplicates of open issues, "flag" creates them with a note, "off" disables the check.
+DUPLICATE_POLICY = os.getenv("JIRA_DUPLICATE_POLICY", "skip").lower()
+INDEX_SYNC_MIN_INTERVAL_S = float(os.getenv("JIRA_INDEX_SYNC_MIN_INTERVAL_S", "60"))
+_index_sync_lock: Optional[asyncio.Lock] = None
+
+
+def _sync_lock() -> asyncio.Lock:
+    # Created inside the loop that awaits it, not when the module is imported.
+    global _index_sync_lock
+    if _index_sync_lock is None:
+        _index_sync_lock = asyncio.Lock()
+    return _index_sync_lock
+
 
 async def jira_request(method: str, url: str = "/rest/api/3/issues", json: Union[Dict, None] = None) -> dict:
     base_url = os.getenv("JIRA_SERVICE_URL")
@@ -34,19 +54,26 @@ async def jira_request(method: str, url: str = "/rest/api/3/issues", json: Union
 
     full_url = f"{base_url.rstrip('/')}{url}"
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.request(
-            method=method,
-            url=full_url,
-            auth=(email, token),
-            headers={
-                "Accept": "application/json",
-                "Content-Type": "application/json",
-            },
-            json=json,
-        )
+    started = time.perf_counter()
+    try:
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            response = await client.request(
+                method=method,
+                url=full_url,
+                auth=(email, token),
+                headers={
+                    "Accept": "application/json",
+                    "Content-Type": "application/json",
+                },
+                json=json,
+            )
+    finally:
+        latency = time.perf_counter() - started
+        charge(jira_calls=1, jira_latency_s=latency)
+        charge_peak(jira_latency_max_s=latency)
 
     if response.status_code >= 400:
+        charge(jira_errors=1)
         logger.error(
             "Jira API error %s %s -> %s: %s",
             method,
@@ -62,6 +89,87 @@ async def jira_request(method: str, url: str = "/rest/api/3/issues", json: Union
     return {}
 
 
+def adf_text(node: Union[Dict, List, None]) -> str:
+    if isinstance(node, list):
+        return " ".join(adf_text(n) for n in node)
+    if not isinstance(node, dict):
+        return ""
+    if node.get("type") == "text":
+        return node.get("text", "")
+    return " ".join(adf_text(n) for n in node.get("content") or [])
+
+
+async def sync_issue_index(*, force: bool = False) -> None:
+    loop = asyncio.get_running_loop()
+    async with _sync_lock():
+        # The first call loads the persisted index from disk, so it stays off the event loop.
+        age = await loop.run_in_executor(None, duplicate_index.sync_age_s)
+        if not force and age is not None and age < INDEX_SYNC_MIN_INTERVAL_S:
+            return
+
+        # The first sync loads every open story and bug; later ones only fetch what changed since, with a
+        # few minutes of overlap. Relative JQL dates avoid depending on the Jira user's time zone.
+        jql = f'project = "{SPACE_KEY}" AND issuetype in (Story, Bug)'
+        if age is None:
+            jql += " AND statusCategory != Done"
+        else:
+            jql += f' AND updated >= "-{int(age // 60) + 5}m"'
+        jql += " ORDER BY updated ASC"
+
+        started = time.time()
+        issues: List[IssueText] = []
+        page_token: Optional[str] = None
+        while True:
+            body = {"jql": jql, "fields": ["summary", "description", "status"], "maxResults": 100}
+            if page_token:
+                body["nextPageToken"] = page_token
+            response = await jira_request(method="POST", url="/rest/api/3/search/jql", json=body)
+            for issue in response.get("issues", []):
+                fields = issue.get("fields") or {}
+                category = ((fields.get("status") or {}).get("statusCategory") or {}).get("key")
+                issues.append(
+                    IssueText(
+                        key=issue["key"],
+                        summary=fields.get("summary") or "",
+                        description=adf_text(fields.get("description")),
+                        open=category != "done",
+                    )
+                )
+            page_token = response.get("nextPageToken")
+            if response.get("isLast", True) or not page_token:
+                break
+
+        upserted, removed = await loop.run_in_executor(
+            None, lambda: duplicate_index.apply(issues, synced_at=started)
+        )
+        logger.info(f"Synced issue index: {upserted} updated, {removed} removed, {len(duplicate_index)} open issues")
+
+
+async def run_issue_index_sync(interval_s: float):
+    while True:
+        try:
+            await sync_issue_index(force=True)
+        except Exception as e:
+            logger.warning(f"Issue index sync failed: {e}")
+        await asyncio.sleep(interval_s)
+
+
+def find_duplicates(summary: str, description: str) -> List[DuplicateMatch]:
+    if DUPLICATE_POLICY == "off":
+        return []
+    matches = duplicate_index.find(summary, description)
+    for m in matches:
+        logger.info(f"'{summary}' looks like {m.key} '{m.summary}' (similarity {m.similarity})")
+    return matches
+
+
+def duplicate_note(matches: List[DuplicateMatch]) -> List[Dict]:
+    if not matches:
+        return []
+    text = "Possible duplicate of: " + ", ".join(f"{m.key} ({m.similarity:.0%})" for m in matches)
+    return [{"type": "paragraph", "content": [{"type": "text", "text": text}]}]
+
+
 async def process_jira_response(
     active_sessions: Dict[str, MeetingState], meeting_id: str, request: JiraTaskRequest
 ):
@@ -74,20 +182,51 @@ async def process_jira_response(
 
     logger.info(f"Processing jira tickets for meeting {meeting_id}")
 
-    if len(request.features) > 0:
-        await create_jira_features(features=request.features)
+    with charge_to(state.ledger):
+        await _create_issues(request)
+
+    logger.info("Finished processing jira tickets.")
+    active_sessions[meeting_id].status = MeetingStatus.PROCESSED
+    return None
+
+
+async def _create_issues(request: JiraTaskRequest):
+    if DUPLICATE_POLICY != "off":
+        try:
+            await sync_issue_index()
+        except Exception as e:
+            logger.warning(f"Issue index sync failed, checking duplicates against the last synced state: {e}")
+
+    def check_all():
+        features = [
+            (f, find_duplicates(f.feature_name, f"{f.feature_description}\n{f.acceptance_criteria}"))
+            for f in request.features
+        ]
+        bugs = [
+            (b, find_duplicates(b.bug_name, f"{b.bug_description}\n{b.reproduction_steps}"))
+            for b in request.bugs
+        ]
+        return features, bugs
+
+    # Signatures, LSH lookups and the first load of the index from SQLite all block; one executor hop covers them.
+    features, bugs = await asyncio.get_running_loop().run_in_executor(None, check_all)
+    if DUPLICATE_POLICY == "skip":
+        skipped = [item.feature_name for item, m in features if m] + [item.bug_name for item, m in bugs if m]
+        if skipped:
+            logger.info(f"Skipping {len(skipped)} issues that already exist: {skipped}")
+        features = [(item, m) for item, m in features if not m]
+        bugs = [(item, m) for item, m in bugs if not m]
+
+    if len(features) > 0:
+        await create_jira_features(features=features)
     else:
         logger.info("No features to be created")
 
-    if len(request.bugs) > 0:
-        await create_jira_bugs(request.bugs)
+    if len(bugs) > 0:
+        await create_jira_bugs(bugs)
     else:
         logger.info("No bugs to be created")
 
-    logger.info("Finished processing jira tickets.")
-    active_sessions[meeting_id].status = MeetingStatus.PROCESSED
-    return None
-
 
 async def create_subtask(task: JiraTask, parent_key: str):
     task_payload = {
@@ -116,7 +255,7 @@ async def create_subtask(task: JiraTask, parent_key: str):
     return await jira_request(method="POST", url="/rest/api/3/issue", json=task_payload)
 
 
-async def create_single_feature(feature: JiraFeature):
+async def create_single_feature(feature: JiraFeature, duplicates: Optional[List[DuplicateMatch]] = None):
     feature_payload = {
         "fields": {
             "project": {"key": SPACE_KEY},
@@ -142,6 +281,7 @@ async def create_single_feature(feature: JiraFeature):
                             {"type": "text", "text": feature.acceptance_criteria}
                         ],
                     },
+                    *duplicate_note(duplicates or []),
                 ],
             },
         }
@@ -165,13 +305,22 @@ async def create_single_feature(feature: JiraFeature):
             f"Failed to create feature {feature.feature_name}: {response}"
         )
 
+    # Indexed right away so the next meeting sees it even before the next sync.
+    await asyncio.get_running_loop().run_in_executor(
+        None,
+        duplicate_index.add,
+        issue_key,
+        feature.feature_name,
+        f"{feature.feature_description}\n{feature.acceptance_criteria}",
+    )
+
     if feature.tasks:
         await asyncio.gather(*(create_subtask(t, issue_key) for t in feature.tasks))
 
     logger.info(f"Created Jira feature {issue_key} with {len(feature.tasks)} sub-tasks")
 
 
-async def create_single_bug(bug: JiraBug):
+async def create_single_bug(bug: JiraBug, duplicates: Optional[List[DuplicateMatch]] = None):
     bug_payload = {
         "fields": {
             "project": {"key": SPACE_KEY},
@@ -193,6 +342,7 @@ async def create_single_bug(bug: JiraBug):
                         "type": "paragraph",
                         "content": [{"type": "text", "text": bug.reproduction_steps}],
                     },
+                    *duplicate_note(duplicates or []),
                 ],
             },
         }
@@ -214,16 +364,20 @@ async def create_single_bug(bug: JiraBug):
     if not issue_key:
         raise RuntimeError(f"Failed to create bug {bug.bug_name}: {response}")
 
+    await asyncio.get_running_loop().run_in_executor(
+        None, duplicate_index.add, issue_key, bug.bug_name, f"{bug.bug_description}\n{bug.reproduction_steps}"
+    )
+
 
-async def create_jira_features(features: List[JiraFeature]) -> None:
+async def create_jira_features(features: List[Tuple[JiraFeature, List[DuplicateMatch]]]) -> None:
     logger.info(f"Processing jira [{len(features)}] features ")
-    await asyncio.gather(*(create_single_feature(f) for f in features))
+    await asyncio.gather(*(create_single_feature(f, d) for f, d in features))
     logger.info(f"Finished processing jira features ")
     return None
 
 
-async def create_jira_bugs(bugs: List[JiraBug]) -> None:
+async def create_jira_bugs(bugs: List[Tuple[JiraBug, List[DuplicateMatch]]]) -> None:
     logger.info(f"Processing jira [{len(bugs)}] bugs ")
-    await asyncio.gather(*(create_single_bug(b) for b in bugs))
+    await asyncio.gather(*(create_single_bug(b, d) for b, d in bugs))
     logger.info(f"Processing jira [{len(bugs)}] bugs ")
     return None
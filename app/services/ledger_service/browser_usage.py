@@ -0,0 +1,48 @@
+import asyncio
+from typing import Dict, Optional
+
+from app.models.MeetingLedger import MeetingLedger
+from app.utils import get_logger
+
+logger = get_logger("browser-usage")
+
+
+def process_rss_mb(pid: int) -> Optional[float]:
+    # Linux only (the bot runs in the Linux image); elsewhere the RSS column just stays empty.
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+class BrowserUsageSampler:
+    def __init__(self, ledger: MeetingLedger, *, interval_s: float = 15.0):
+        self.ledger = ledger
+        self.interval_s = interval_s
+        self._cpu_by_pid: Dict[int, float] = {}
+        self._cdp = None
+
+    async def sample(self, browser):
+        # Chromium reports CPU time for each of its processes; renderers that already exited keep their last value.
+        if self._cdp is None:
+            self._cdp = await browser.new_browser_cdp_session()
+        info = await self._cdp.send("SystemInfo.getProcessInfo")
+        rss = 0.0
+        for process in info.get("processInfo", []):
+            pid = process["id"]
+            self._cpu_by_pid[pid] = max(self._cpu_by_pid.get(pid, 0.0), process.get("cpuTime", 0.0))
+            rss += process_rss_mb(pid) or 0.0
+        self.ledger.browser_cpu_s = round(sum(self._cpu_by_pid.values()), 3)
+        self.ledger.browser_peak_rss_mb = round(max(self.ledger.browser_peak_rss_mb, rss), 1)
+
+    async def run(self, browser):
+        while True:
+            try:
+                await self.sample(browser)
+            except Exception as e:
+                logger.debug("Browser usage sample failed: %s", e)
+            await asyncio.sleep(self.interval_s)
@@ -0,0 +1,199 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from app.models.MeetingLedger import COST_FIELDS, PEAK_FIELDS, LedgerRollup, MeetingLedger
+from app.utils import get_logger
+
+logger = get_logger("ledger")
+
+# Code deep in a call chain (Jira requests, STT attempts) charges whichever meeting it is working for.
+current_ledger: ContextVar[Optional[MeetingLedger]] = ContextVar("meeting_ledger", default=None)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ledger_runs (
+    run_id TEXT PRIMARY KEY,
+    meeting_id TEXT,
+    started_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    status TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ledger_runs_meeting ON ledger_runs (meeting_id, started_at);
+CREATE INDEX IF NOT EXISTS ledger_runs_started ON ledger_runs (started_at);
+"""
+
+# Databases from before ledgers were kept per take: each meeting's single row becomes one run.
+MIGRATE_MEETING_ROWS = """
+BEGIN;
+INSERT OR IGNORE INTO ledger_runs (run_id, meeting_id, started_at, updated_at, status, data)
+SELECT meeting_id, meeting_id, started_at, updated_at, status, json_set(data, '$.run_id', meeting_id) FROM ledgers;
+DROP TABLE ledgers;
+COMMIT;
+"""
+
+
+def charge(**amounts: float):
+    ledger = current_ledger.get()
+    if ledger is None:
+        return
+    for name, amount in amounts.items():
+        setattr(ledger, name, getattr(ledger, name) + amount)
+
+
+def charge_peak(**values: float):
+    ledger = current_ledger.get()
+    if ledger is None:
+        return
+    for name, value in values.items():
+        setattr(ledger, name, max(getattr(ledger, name), value))
+
+
+@contextmanager
+def charge_to(ledger: Optional[MeetingLedger]):
+    token = current_ledger.set(ledger)
+    try:
+        yield ledger
+    finally:
+        current_ledger.reset(token)
+
+
+def _accumulate(totals: Dict[str, float], values: Dict[str, float]):
+    for name, value in values.items():
+        current = totals.get(name, 0.0)
+        totals[name] = max(current, value) if name in PEAK_FIELDS else current + value
+
+
+def merge_ledgers(runs: List[MeetingLedger]) -> MeetingLedger:
+    # A meeting's cost over all its takes; identity and status come from the latest take.
+    runs = sorted(runs, key=lambda r: r.started_at)
+    totals: Dict[str, float] = {}
+    for run in runs:
+        _accumulate(totals, {name: getattr(run, name) for name in COST_FIELDS})
+    return MeetingLedger.model_validate({**runs[-1].model_dump(), **totals, "started_at": runs[0].started_at})
+
+
+def merge_rollups(groups: Iterable[LedgerRollup]) -> List[LedgerRollup]:
+    merged: Dict[str, LedgerRollup] = {}
+    for group in groups:
+        target = merged.get(group.key)
+        if target is None:
+            merged[group.key] = LedgerRollup(
+                key=group.key, meetings=group.meetings, runs=group.runs, totals=dict(group.totals)
+            )
+            continue
+        target.meetings += group.meetings
+        target.runs += group.runs
+        _accumulate(target.totals, group.totals)
+    return sorted(merged.values(), key=lambda g: g.key)
+
+
+class LedgerStore:
+    def __init__(self, path: str = "./app/data/ledger.db"):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(SCHEMA)
+            if db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ledgers'").fetchone():
+                db.executescript(MIGRATE_MEETING_ROWS)
+            self._db = db
+        return self._db
+
+    def save(self, ledger: MeetingLedger):
+        ledger.updated_at = time.time()
+        row = (
+            ledger.run_id, ledger.meeting_id, ledger.started_at, ledger.updated_at, ledger.status,
+            ledger.model_dump_json(),
+        )
+        with self._lock:
+            db = self._conn()
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO ledger_runs (run_id, meeting_id, started_at, updated_at, status, data)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    row,
+                )
+
+    def get(self, meeting_id: str) -> Optional[MeetingLedger]:
+        # The latest take, like the live state the endpoint answers from while the meeting runs.
+        with self._lock:
+            row = self._conn().execute(
+                "SELECT data FROM ledger_runs WHERE meeting_id = ? ORDER BY started_at DESC LIMIT 1", (meeting_id,)
+            ).fetchone()
+        return MeetingLedger.model_validate_json(row[0]) if row else None
+
+    def runs(self, meeting_id: str) -> List[MeetingLedger]:
+        with self._lock:
+            rows = self._conn().execute(
+                "SELECT data FROM ledger_runs WHERE meeting_id = ? ORDER BY started_at", (meeting_id,)
+            ).fetchall()
+        return [MeetingLedger.model_validate_json(r[0]) for r in rows]
+
+    def _load(self, since: Optional[float], until: Optional[float]) -> List[MeetingLedger]:
+        with self._lock:
+            rows = self._conn().execute(
+                "SELECT data FROM ledger_runs WHERE started_at >= ? AND started_at < ?",
+                (since or 0.0, until or float("inf")),
+            ).fetchall()
+        return [MeetingLedger.model_validate_json(r[0]) for r in rows]
+
+    def rollup(
+        self, *, group_by: str = "day", since: Optional[float] = None, until: Optional[float] = None
+    ) -> List[LedgerRollup]:
+        groups: Dict[str, LedgerRollup] = {}
+        meetings: Dict[str, Set[Optional[str]]] = {}
+        for ledger in self._load(since, until):
+            if group_by == "status":
+                key = ledger.status or "unknown"
+            else:
+                key = datetime.fromtimestamp(ledger.started_at).strftime("%Y-%m-%d")
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = LedgerRollup(key=key, meetings=0, totals=dict.fromkeys(COST_FIELDS, 0.0))
+            # Takes of one meeting add up their costs but count as a single meeting.
+            meetings.setdefault(key, set()).add(ledger.meeting_id or ledger.run_id)
+            group.runs += 1
+            _accumulate(group.totals, {name: getattr(ledger, name) for name in COST_FIELDS})
+        for key, group in groups.items():
+            group.meetings = len(meetings[key])
+        return sorted(groups.values(), key=lambda g: g.key)
+
+    def top(self, metric: str, *, limit: int = 10, since: Optional[float] = None) -> List[MeetingLedger]:
+        if metric not in COST_FIELDS:
+            raise ValueError(f"Unknown ledger metric {metric!r}")
+        combine = "MAX" if metric in PEAK_FIELDS else "SUM"
+        with self._lock:
+            db = self._conn()
+            meeting_ids = [
+                r[0]
+                for r in db.execute(
+                    f"SELECT meeting_id FROM ledger_runs WHERE started_at >= ? GROUP BY meeting_id"
+                    f" ORDER BY {combine}(json_extract(data, '$.{metric}')) DESC LIMIT ?",
+                    (since or 0.0, limit),
+                )
+            ]
+            runs: Dict[Optional[str], List[MeetingLedger]] = {}
+            for meeting_id in meeting_ids:
+                runs[meeting_id] = [
+                    MeetingLedger.model_validate_json(r[0])
+                    for r in db.execute(
+                        "SELECT data FROM ledger_runs WHERE meeting_id IS ? AND started_at >= ?",
+                        (meeting_id, since or 0.0),
+                    )
+                ]
+        return [merge_ledgers(runs[meeting_id]) for meeting_id in meeting_ids]
+
+
+ledger_store = LedgerStore()
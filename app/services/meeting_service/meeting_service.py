@@ -1,8 +1,10 @@
-from typing import Tuple
+import time
+from typing import Optional, Tuple
 from playwright.async_api import async_playwright, Playwright, Page, Browser
 import re
 
-from app.utils import get_logger, PlaywrightWrapper
+from app.utils import get_logger, PlaywrightWrapper, ResourceScope
+from app.utils.diagnostics import DiagnosticsRing
 
 logger = get_logger("meeting-service")
 
@@ -24,13 +26,29 @@ async def create_browser() -> Tuple[Playwright, Browser]:
     return playwright, context
 
 
-async def connect_meeting(meeting_url: str) -> Tuple[PlaywrightWrapper, Browser]:
+async def connect_meeting(
+    meeting_url: str,
+    diagnostics: Optional[DiagnosticsRing] = None,
+    resources: Optional[ResourceScope] = None,
+) -> Tuple[PlaywrightWrapper, Browser]:
+    started = time.perf_counter()
     playwright, browser = await create_browser()
     logger.info("Starting browser")
+    if resources is not None:
+        # Registered before anything else can fail, so a half-opened browser is still torn down.
+        resources.add("playwright", playwright.stop)
+        resources.add("browser", browser.close)
+    if diagnostics is not None:
+        diagnostics.record("launch", None, True, (time.perf_counter() - started) * 1000)
 
     page: Page = await browser.new_page()
-    pageWrapper = PlaywrightWrapper(page=page, default_timeout=5000)
+    if resources is not None:
+        resources.add("page", page.close, timeout_s=5.0)
+    pageWrapper = PlaywrightWrapper(page=page, default_timeout=5000, diagnostics=diagnostics)
+    started = time.perf_counter()
     await page.goto(f"{meeting_url}?hl=en")
+    if diagnostics is not None:
+        diagnostics.record("goto", meeting_url, True, (time.perf_counter() - started) * 1000)
     logger.info(f"Entering {meeting_url}")
     await pageWrapper.wait(500)
     try:
@@ -39,7 +57,7 @@ async def connect_meeting(meeting_url: str) -> Tuple[PlaywrightWrapper, Browser]
         await pageWrapper.safe_fill(value="N8N TranscribeBot", label="Your name")
         return pageWrapper, browser
     except Exception:
-        await page.screenshot(path="app/logs/error.png")
+        await pageWrapper.capture_failure("connect")
         raise
 
 
@@ -48,7 +66,7 @@ async def ask_to_join(page: PlaywrightWrapper, connection_timeout: int = 5000):
         await page.safe_click(text="Ask to join")
         await page.wait(connection_timeout)
     except Exception:
-        await page.screenshot(path="app/logs/error.png")
+        await page.capture_failure("ask_to_join")
         logger.error("Error while attempting to join meeting")
         raise
 
@@ -101,7 +119,7 @@ async def select_recording_device(page: PlaywrightWrapper, device_name: str):
         return page
 
     except Exception:
-        await page.page.screenshot(path="app/logs/error.png")
+        await page.capture_failure("select_device")
         logger.error("Error while selecting recording device")
         raise
 
@@ -110,11 +128,18 @@ async def mute_microphone(page:PlaywrightWrapper):
     try:
         await page.safe_click(selector='[aria-label*="Turn off microphone"]')
     except Exception:
-        await page.page.screenshot(path="app/logs/error.png")
+        await page.capture_failure("mute")
         logger.error("Error while muting microphone")
         raise
 
 
+async def leave_meeting(page: PlaywrightWrapper) -> bool:
+    left = await page.safe_click(selector='[aria-label*="Leave call"]', timeout=3000)
+    if not left:
+        logger.warning("Leave call button not found; the browser will be closed instead")
+    return left
+
+
 async def wait_for_approve(
     page: PlaywrightWrapper, *, timeout_s: int = 120, poll_ms: int = 1000
 ) -> bool:
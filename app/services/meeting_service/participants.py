@@ -0,0 +1,146 @@
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from app.utils import get_logger
+
+logger = get_logger("participants")
+
+# Every tile in the call grid carries a participant id (presenting adds a second tile with the same id);
+# the People button badge is the fallback while tiles are hidden, e.g. when someone pins a presentation.
+PARTICIPANT_SELECTORS = {
+    "tile": "[data-participant-id]",
+    "badge": '[aria-label*="Show everyone" i], [aria-label*="People" i][role="button"]',
+}
+
+# Runs in the page: one debounced MutationObserver recounts participants after DOM changes and pushes the
+# count to Python only when it changed, instead of Python polling selectors.
+PARTICIPANT_OBSERVER_JS = """
+(sel) => {
+  if (window.__participantObserver) return;
+  let last = null;
+  let timer = null;
+
+  const count = () => {
+    const ids = new Set();
+    document.querySelectorAll(sel.tile).forEach((el) => ids.add(el.getAttribute("data-participant-id")));
+    if (ids.size) return ids.size;
+    const badge = document.querySelector(sel.badge);
+    const n = badge ? parseInt((badge.textContent || "").replace(/\\D+/g, ""), 10) : NaN;
+    return Number.isNaN(n) ? null : n;
+  };
+
+  const report = () => {
+    timer = null;
+    const n = count();
+    if (n === null || n === last) return;
+    last = n;
+    window.__participantSink(n);
+  };
+
+  const observer = new MutationObserver(() => {
+    if (timer === null) timer = setTimeout(report, sel.debounceMs);
+  });
+  observer.observe(document.body, {
+    childList: true,
+    subtree: true,
+    characterData: true,
+    attributes: true,
+    attributeFilter: ["data-participant-id"],
+  });
+
+  window.__participantObserver = observer;
+  report();
+}
+"""
+
+
+@dataclass
+class AlonePolicy:
+    leave_after_s: float = 60.0
+    empty_room_leave_after_s: float = 900.0
+
+    @classmethod
+    def from_env(cls) -> "AlonePolicy":
+        return cls(
+            leave_after_s=float(os.getenv("ALONE_LEAVE_AFTER_S", "60")),
+            empty_room_leave_after_s=float(os.getenv("EMPTY_ROOM_LEAVE_AFTER_S", "900")),
+        )
+
+
+class ParticipantTracker:
+    def __init__(self, *, debounce_ms: int = 500):
+        self.debounce_ms = debounce_ms
+        self.count: Optional[int] = None
+        self.peak = 0
+        self.attached_at = time.monotonic()
+        self.alone_since: Optional[float] = None
+        self.with_others_since: Optional[float] = None
+        self.with_others_total_s = 0.0
+        self._changed = asyncio.Event()
+
+    @property
+    def others_seen(self) -> bool:
+        return self.peak > 1
+
+    def on_count(self, _source: Any, count: int):
+        now = time.monotonic()
+        if count != self.count:
+            logger.info("Participants in call: %s -> %d", self.count, count)
+        self.count = count
+        self.peak = max(self.peak, count)
+        # The bot itself is one of the tiles.
+        if count <= 1:
+            if self.alone_since is None:
+                self.alone_since = now
+            if self.with_others_since is not None:
+                self.with_others_total_s += now - self.with_others_since
+                self.with_others_since = None
+        else:
+            self.alone_since = None
+            if self.with_others_since is None:
+                self.with_others_since = now
+        self._changed.set()
+
+    async def attach(self, page):
+        self.attached_at = time.monotonic()
+        await page.page.expose_binding("__participantSink", self.on_count)
+        await page.page.evaluate(PARTICIPANT_OBSERVER_JS, {**PARTICIPANT_SELECTORS, "debounceMs": self.debounce_ms})
+        logger.info("Participant observer attached")
+
+    def with_others_s(self) -> Optional[float]:
+        # None while the count is unknown.
+        if self.count is None:
+            return None
+        running = 0.0 if self.with_others_since is None else time.monotonic() - self.with_others_since
+        return self.with_others_total_s + running
+
+    def alone_for_s(self) -> float:
+        return 0.0 if self.alone_since is None else time.monotonic() - self.alone_since
+
+    def _remaining_s(self, policy: AlonePolicy) -> Optional[float]:
+        # Once someone else was in the call, being left alone ends it quickly; a room nobody ever showed up
+        # in gets a much longer grace period, since the bot may simply have joined early. An unknown count
+        # (selectors no longer match) never ends the call.
+        if self.count is None:
+            return None
+        if self.others_seen:
+            if self.alone_since is None or policy.leave_after_s <= 0:
+                return None
+            return policy.leave_after_s - self.alone_for_s()
+        if policy.empty_room_leave_after_s <= 0:
+            return None
+        return policy.empty_room_leave_after_s - (time.monotonic() - self.attached_at)
+
+    async def wait_until_alone(self, policy: AlonePolicy) -> float:
+        while True:
+            remaining = self._remaining_s(policy)
+            if remaining is not None and remaining <= 0:
+                return self.alone_for_s() if self.others_seen else time.monotonic() - self.attached_at
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,324 @@
+import asyncio
+import hashlib
+import os
+import random
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+
+from app.models.MeetingLedger import MeetingLedger
+from app.models.OutboxEntry import OutboxEntry
+from app.utils import get_logger
+
+logger = get_logger("callback-outbox")
+
+PENDING = "pending"
+DELIVERED = "delivered"
+SUPERSEDED = "superseded"
+DEAD = "dead"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS callbacks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    meeting_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    dedupe_key TEXT NOT NULL UNIQUE,
+    url TEXT NOT NULL,
+    body BLOB NOT NULL,
+    content_type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    delivered_at REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS callbacks_pending ON callbacks (status, meeting_id, id);
+"""
+
+_COLUMNS = (
+    "id, meeting_id, kind, dedupe_key, url, status, length(body) AS size_bytes, attempts,"
+    " created_at, next_attempt_at, delivered_at, last_error"
+)
+
+
+def retry_after_s(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+RETRYABLE_STATUSES = (408, 425, 429)
+
+
+def is_permanent(status_code: int) -> bool:
+    # n8n answers 404 once the execution no longer waits on this webhook; sending again cannot help. Redirects
+    # are not followed, so a 3xx means a misconfigured URL and fails the same way on every attempt.
+    if 200 <= status_code < 300 or status_code >= 500:
+        return False
+    return status_code not in RETRYABLE_STATUSES
+
+
+class CallbackOutbox:
+    def __init__(
+        self,
+        path: str = "./app/data/outbox.db",
+        *,
+        concurrency: int = 4,
+        timeout_s: float = 120.0,
+        backoff_base_s: float = 2.0,
+        backoff_max_s: float = 300.0,
+        give_up_after_s: float = 24 * 3600,
+        keep_delivered_s: float = 7 * 24 * 3600,
+    ):
+        self.path = Path(path)
+        self.concurrency = concurrency
+        self.timeout_s = timeout_s
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.give_up_after_s = give_up_after_s
+        self.keep_delivered_s = keep_delivered_s
+        self.delivered = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            # Every enqueue must survive a crash: a lost callback means paying for the transcription again.
+            db.execute("PRAGMA synchronous=FULL")
+            db.executescript(SCHEMA)
+            self._db = db
+        return self._db
+
+    def enqueue(
+        self,
+        meeting_id: str,
+        url: str,
+        payload: Any,
+        *,
+        kind: str,
+        dedupe_key: Optional[str] = None,
+        supersedes: Sequence[str] = (),
+        ledger: Optional[MeetingLedger] = None,
+    ) -> int:
+        # httpx encodes the body exactly as a direct json= post would; the stored bytes are what goes on the wire.
+        request = httpx.Request("POST", url, json=payload)
+        body = request.content
+        dedupe_key = dedupe_key or f"{meeting_id}:{kind}:{hashlib.sha256(url.encode() + body).hexdigest()[:16]}"
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            with db:
+                if supersedes:
+                    # Only the newest draft is worth sending; older ones still waiting are dropped.
+                    db.execute(
+                        f"UPDATE callbacks SET status = ? WHERE meeting_id = ? AND status = ?"
+                        f" AND kind IN ({', '.join('?' * len(supersedes))})",
+                        (SUPERSEDED, meeting_id, PENDING, *supersedes),
+                    )
+                cursor = db.execute(
+                    "INSERT OR IGNORE INTO callbacks"
+                    " (meeting_id, kind, dedupe_key, url, body, content_type, status, created_at, next_attempt_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (meeting_id, kind, dedupe_key, url, body, request.headers["content-type"], PENDING, now, now),
+                )
+                if cursor.rowcount:
+                    entry_id = cursor.lastrowid
+                else:
+                    entry_id = db.execute("SELECT id FROM callbacks WHERE dedupe_key = ?", (dedupe_key,)).fetchone()[0]
+                    logger.info("Callback %s already queued as #%d", dedupe_key, entry_id)
+        if ledger is not None and cursor.rowcount:
+            ledger.resume_posts += 1
+            ledger.resume_payload_bytes += len(body)
+        self._notify()
+        return entry_id
+
+    def _notify(self):
+        loop, wakeup = self._loop, self._wakeup
+        if loop is None or wakeup is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            wakeup.set()
+        else:
+            loop.call_soon_threadsafe(wakeup.set)
+
+    def _heads(self, busy: List[str]) -> List[sqlite3.Row]:
+        # Only the oldest pending callback of each meeting is eligible, so n8n sees them in the order they were made.
+        exclude = f" WHERE c.meeting_id NOT IN ({', '.join('?' * len(busy))})" if busy else ""
+        with self._lock:
+            return self._conn().execute(
+                "SELECT c.id, c.meeting_id, c.next_attempt_at FROM callbacks c"
+                " JOIN (SELECT MIN(id) AS id FROM callbacks WHERE status = ? GROUP BY meeting_id) head ON head.id = c.id"
+                f"{exclude} ORDER BY c.next_attempt_at, c.id",
+                (PENDING, *busy),
+            ).fetchall()
+
+    def _load(self, entry_id: int) -> sqlite3.Row:
+        with self._lock:
+            return self._conn().execute("SELECT * FROM callbacks WHERE id = ?", (entry_id,)).fetchone()
+
+    def _settle(self, row: sqlite3.Row, error: Optional[str], permanent: bool, retry_after: Optional[float]):
+        attempts = row["attempts"] + 1
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            with db:
+                if error is None:
+                    db.execute(
+                        "UPDATE callbacks SET status = ?, attempts = ?, delivered_at = ?, last_error = NULL WHERE id = ?",
+                        (DELIVERED, attempts, now, row["id"]),
+                    )
+                elif permanent or now - row["created_at"] > self.give_up_after_s:
+                    db.execute(
+                        "UPDATE callbacks SET status = ?, attempts = ?, last_error = ? WHERE id = ?",
+                        (DEAD, attempts, error, row["id"]),
+                    )
+                else:
+                    delay = min(self.backoff_max_s, self.backoff_base_s * 2 ** (attempts - 1))
+                    delay = max(delay / 2 + random.uniform(0, delay / 2), retry_after or 0.0)
+                    db.execute(
+                        "UPDATE callbacks SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                        (attempts, now + delay, error, row["id"]),
+                    )
+        if error is None:
+            self.delivered += 1
+        elif permanent or now - row["created_at"] > self.give_up_after_s:
+            logger.error(
+                "Giving up on %s callback #%d of meeting %s after %d attempts: %s",
+                row["kind"], row["id"], row["meeting_id"], attempts, error,
+            )
+        else:
+            logger.warning(
+                "%s callback #%d of meeting %s failed (attempt %d): %s",
+                row["kind"], row["id"], row["meeting_id"], attempts, error,
+            )
+
+    async def _deliver(self, client: httpx.AsyncClient, entry_id: int):
+        loop = asyncio.get_running_loop()
+        row = await loop.run_in_executor(None, self._load, entry_id)
+        error, permanent, retry_after = None, False, None
+        try:
+            response = await client.post(
+                row["url"],
+                content=row["body"],
+                # Delivery is at-least-once; the key lets the receiving workflow drop a repeat.
+                headers={"Content-Type": row["content_type"], "Idempotency-Key": row["dedupe_key"]},
+            )
+            if response.status_code >= 300:
+                error = f"HTTP {response.status_code}"
+                permanent = is_permanent(response.status_code)
+                retry_after = retry_after_s(response)
+        except Exception as e:
+            error = repr(e)
+        await loop.run_in_executor(None, self._settle, row, error, permanent, retry_after)
+
+    def _prune(self) -> int:
+        with self._lock:
+            db = self._conn()
+            with db:
+                cursor = db.execute(
+                    "DELETE FROM callbacks WHERE status IN (?, ?) AND created_at < ?",
+                    (DELIVERED, SUPERSEDED, time.time() - self.keep_delivered_s),
+                )
+        return cursor.rowcount
+
+    async def run(self, *, idle_poll_s: float = 30.0, prune_every_s: float = 3600.0):
+        loop = asyncio.get_running_loop()
+        self._loop = loop
+        wakeup = self._wakeup = asyncio.Event()
+        in_flight: Dict[str, asyncio.Task] = {}
+        last_prune = -prune_every_s
+
+        def finished(meeting_id: str):
+            in_flight.pop(meeting_id, None)
+            wakeup.set()
+
+        # Callbacks left pending by a previous process are picked up by the first pass.
+        async with httpx.AsyncClient(timeout=self.timeout_s) as client:
+            try:
+                while True:
+                    wakeup.clear()
+                    if time.monotonic() - last_prune > prune_every_s:
+                        last_prune = time.monotonic()
+                        await loop.run_in_executor(None, self._prune)
+
+                    heads = await loop.run_in_executor(None, self._heads, list(in_flight))
+                    now = time.time()
+                    timeout = idle_poll_s
+                    for row in heads:
+                        if row["next_attempt_at"] > now:
+                            timeout = min(timeout, row["next_attempt_at"] - now)
+                            break
+                        if len(in_flight) >= self.concurrency:
+                            break
+                        task = asyncio.create_task(self._deliver(client, row["id"]))
+                        in_flight[row["meeting_id"]] = task
+                        task.add_done_callback(lambda _, m=row["meeting_id"]: finished(m))
+
+                    try:
+                        await asyncio.wait_for(wakeup.wait(), timeout=max(timeout, 0.05))
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                for task in in_flight.values():
+                    task.cancel()
+                await asyncio.gather(*in_flight.values(), return_exceptions=True)
+                self._wakeup = None
+
+    def entries(self, meeting_id: str) -> List[OutboxEntry]:
+        with self._lock:
+            rows = self._conn().execute(
+                f"SELECT {_COLUMNS} FROM callbacks WHERE meeting_id = ? ORDER BY id", (meeting_id,)
+            ).fetchall()
+        return [OutboxEntry(**dict(r)) for r in rows]
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn().execute("SELECT status, COUNT(*) FROM callbacks GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def retry_dead(self, meeting_id: str) -> int:
+        with self._lock:
+            db = self._conn()
+            with db:
+                # A re-queued callback gets a fresh give-up window; judged by its original age it would die on the
+                # first failed attempt.
+                now = time.time()
+                cursor = db.execute(
+                    "UPDATE callbacks SET status = ?, attempts = 0, created_at = ?, next_attempt_at = ?, last_error = NULL"
+                    " WHERE meeting_id = ? AND status = ?",
+                    (PENDING, now, now, meeting_id, DEAD),
+                )
+        self._notify()
+        return cursor.rowcount
+
+
+callback_outbox = CallbackOutbox(
+    concurrency=int(os.getenv("OUTBOX_CONCURRENCY", "4")),
+    backoff_max_s=float(os.getenv("OUTBOX_BACKOFF_MAX_S", "300")),
+    # An n8n outage shorter than this loses nothing; later, the callbacks stay stored and can be re-queued by hand.
+    give_up_after_s=float(os.getenv("OUTBOX_GIVE_UP_H", "24")) * 3600,
+)
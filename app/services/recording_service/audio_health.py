@@ -0,0 +1,162 @@
+import math
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import TYPE_CHECKING, Any, Deque, Dict, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# PortAudio callback flags worth counting; anything set means samples were dropped or padded.
+STATUS_FLAGS = ("input_overflow", "input_underflow", "output_overflow", "output_underflow", "priming_output")
+
+NO_AUDIO = "no_audio"
+SILENCE = "silence"
+
+
+def _dbfs(value: float) -> float:
+    return 20 * math.log10(value) if value > 1e-6 else -120.0
+
+
+@dataclass
+class AudioWindow:
+    start_s: float
+    rms_dbfs: float
+    peak_dbfs: float
+    clipped_ratio: float
+    flags: int
+
+
+class AudioHealthMonitor:
+    def __init__(
+        self,
+        samplerate: int,
+        *,
+        window_s: float = 1.0,
+        silence_dbfs: float = -60.0,
+        clip_level: float = 0.999,
+        history: int = 600,
+    ):
+        self.samplerate = samplerate
+        self.window_frames = max(1, int(window_s * samplerate))
+        self.silence_dbfs = silence_dbfs
+        self.clip_level = clip_level
+        self.windows: Deque[AudioWindow] = deque(maxlen=history)
+        self.flag_counts: Dict[str, int] = {name: 0 for name in STATUS_FLAGS}
+
+        self.frames = 0
+        self.signal_frames = 0
+        self.last_signal_frame: Optional[int] = None
+        self.clipped_samples = 0
+        self.peak = 0.0
+
+        self._lock = threading.Lock()
+        self._win_frames = 0
+        self._win_sumsq = 0.0
+        self._win_samples = 0
+        self._win_peak = 0.0
+        self._win_clipped = 0
+        self._win_flags = 0
+
+    def update(self, block: "np.ndarray", status: Any = None):
+        # Called from the PortAudio callback: a few vectorized reductions per block, windows close lazily.
+        import numpy as np
+
+        frames = len(block)
+        absolute = np.abs(block)
+        peak = float(absolute.max()) if block.size else 0.0
+        sumsq = float(np.dot(block.ravel(), block.ravel()))
+        clipped = int(np.count_nonzero(absolute >= self.clip_level))
+
+        with self._lock:
+            if status:
+                self._win_flags += 1
+                for name in STATUS_FLAGS:
+                    if getattr(status, name, False):
+                        self.flag_counts[name] += 1
+
+            self._win_frames += frames
+            self._win_sumsq += sumsq
+            self._win_samples += block.size
+            self._win_peak = max(self._win_peak, peak)
+            self._win_clipped += clipped
+            self.frames += frames
+            if self._win_frames >= self.window_frames:
+                self._close_window()
+
+    def _close_window(self):
+        rms = math.sqrt(self._win_sumsq / max(self._win_samples, 1))
+        window = AudioWindow(
+            start_s=(self.frames - self._win_frames) / self.samplerate,
+            rms_dbfs=round(_dbfs(rms), 1),
+            peak_dbfs=round(_dbfs(self._win_peak), 1),
+            clipped_ratio=self._win_clipped / max(self._win_samples, 1),
+            flags=self._win_flags,
+        )
+        self.windows.append(window)
+
+        if window.rms_dbfs > self.silence_dbfs:
+            self.signal_frames += self._win_frames
+            self.last_signal_frame = self.frames
+        self.clipped_samples += self._win_clipped
+        self.peak = max(self.peak, self._win_peak)
+
+        self._win_frames = 0
+        self._win_sumsq = 0.0
+        self._win_samples = 0
+        self._win_peak = 0.0
+        self._win_clipped = 0
+        self._win_flags = 0
+
+    @property
+    def elapsed_s(self) -> float:
+        return self.frames / self.samplerate
+
+    @property
+    def signal_seen(self) -> bool:
+        return self.last_signal_frame is not None
+
+    @property
+    def silent_for_s(self) -> float:
+        last = self.last_signal_frame or 0
+        return (self.frames - last) / self.samplerate
+
+    def snapshot(self, last_windows: int = 10) -> dict:
+        with self._lock:
+            recent = [asdict(w) for w in list(self.windows)[-last_windows:]] if last_windows > 0 else []
+            return {
+                "elapsed_s": round(self.elapsed_s, 2),
+                "signal_seen": self.signal_seen,
+                "signal_s": round(self.signal_frames / self.samplerate, 2),
+                "silent_for_s": round(self.silent_for_s, 2),
+                "peak_dbfs": round(_dbfs(self.peak), 1),
+                "clipped_samples": self.clipped_samples,
+                "status_flags": dict(self.flag_counts),
+                "recent_windows": recent,
+            }
+
+
+@dataclass
+class SilencePolicy:
+    end_after_silence_s: float = 600.0
+    fail_without_signal_s: float = 120.0
+
+    @classmethod
+    def from_env(cls) -> "SilencePolicy":
+        return cls(
+            end_after_silence_s=float(os.getenv("SILENCE_END_AFTER_MIN", "10")) * 60,
+            fail_without_signal_s=float(os.getenv("NO_SIGNAL_FAIL_AFTER_S", "120")),
+        )
+
+    def evaluate(self, monitor: AudioHealthMonitor, with_others_s: Optional[float] = None) -> Optional[str]:
+        if not monitor.signal_seen:
+            # An empty room is silent too: only time spent with someone else in the call points at a broken audio
+            # route. Without a participant count, all recorded time does.
+            waited = monitor.elapsed_s if with_others_s is None else min(with_others_s, monitor.elapsed_s)
+            if self.fail_without_signal_s > 0 and waited >= self.fail_without_signal_s:
+                return NO_AUDIO
+            return None
+        if self.end_after_silence_s > 0 and monitor.silent_for_s >= self.end_after_silence_s:
+            return SILENCE
+        return None
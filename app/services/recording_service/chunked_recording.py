@@ -0,0 +1,410 @@
+import bisect
+import io
+import json
+import os
+import struct
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Iterator, List, Optional, Union
+
+from app.utils import get_logger
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = get_logger("chunked-recording")
+
+META_FILE = "meta.json"
+MANIFEST_FILE = "manifest.jsonl"
+CHUNK_SUFFIX = ".pcm"
+PARTIAL_SUFFIX = ".part"
+SAMPLE_WIDTH = 2  # PCM_16
+WAV_MAX_SIZE = 0xFFFFFFFF
+
+
+@dataclass
+class ChunkEntry:
+    index: int
+    file: str
+    start_frame: int
+    frames: int
+    wall_start: float
+    wall_end: float
+
+
+def _fsync_dir(directory: Path):
+    # Directory fsync is what makes a rename durable on POSIX; Windows does not support it.
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _chunk_name(index: int) -> str:
+    return f"chunk_{index:06d}{CHUNK_SUFFIX}"
+
+
+def is_chunked_recording(path: Union[str, Path]) -> bool:
+    return (Path(path) / META_FILE).is_file()
+
+
+class ChunkedRecordingWriter:
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        samplerate: int,
+        channels: int,
+        *,
+        chunk_seconds: float = 10.0,
+    ):
+        self.directory = Path(directory)
+        self.samplerate = samplerate
+        self.channels = channels
+        self.chunk_frames = max(1, int(samplerate * chunk_seconds))
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "samplerate": samplerate,
+            "channels": channels,
+            "dtype": "int16",
+            "chunk_seconds": chunk_seconds,
+            "created_at": time.time(),
+        }
+        meta_tmp = self.directory / (META_FILE + PARTIAL_SUFFIX)
+        with open(meta_tmp, "w") as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(meta_tmp, self.directory / META_FILE)
+
+        self._manifest = open(self.directory / MANIFEST_FILE, "a")
+        _fsync_dir(self.directory)
+
+        self._index = 0
+        self._total_frames = 0
+        self._chunk: Optional[BinaryIO] = None
+        self._chunk_frames = 0
+        self._chunk_wall_start = 0.0
+        self._closed = False
+
+    @property
+    def frames(self) -> int:
+        return self._total_frames + self._chunk_frames
+
+    def _open_chunk(self):
+        path = self.directory / (_chunk_name(self._index) + PARTIAL_SUFFIX)
+        self._chunk = open(path, "wb")
+        self._chunk_frames = 0
+        self._chunk_wall_start = time.time()
+
+    def _close_chunk(self):
+        if self._chunk is None:
+            return
+
+        self._chunk.flush()
+        os.fsync(self._chunk.fileno())
+        self._chunk.close()
+        self._chunk = None
+
+        name = _chunk_name(self._index)
+        partial = self.directory / (name + PARTIAL_SUFFIX)
+        if self._chunk_frames == 0:
+            os.remove(partial)
+            return
+
+        os.replace(partial, self.directory / name)
+        _fsync_dir(self.directory)
+
+        entry = ChunkEntry(
+            index=self._index,
+            file=name,
+            start_frame=self._total_frames,
+            frames=self._chunk_frames,
+            wall_start=self._chunk_wall_start,
+            wall_end=time.time(),
+        )
+        # The manifest is the commit point: a chunk only exists for readers once its line is durable.
+        self._manifest.write(json.dumps(asdict(entry)) + "\n")
+        self._manifest.flush()
+        os.fsync(self._manifest.fileno())
+
+        self._total_frames += self._chunk_frames
+        self._chunk_frames = 0
+        self._index += 1
+
+    def write(self, block: "np.ndarray"):
+        import numpy as np
+
+        if self._closed:
+            raise RuntimeError("Recording writer is already closed")
+
+        if block.dtype != np.int16:
+            block = (np.clip(block, -1.0, 1.0) * 32767).astype(np.int16)
+        block = block.reshape(-1, self.channels)
+
+        offset = 0
+        while offset < len(block):
+            if self._chunk is None:
+                self._open_chunk()
+
+            take = min(self.chunk_frames - self._chunk_frames, len(block) - offset)
+            self._chunk.write(block[offset:offset + take].tobytes())
+            self._chunk_frames += take
+            offset += take
+
+            if self._chunk_frames >= self.chunk_frames:
+                self._close_chunk()
+
+    def close(self):
+        if self._closed:
+            return
+        self._close_chunk()
+        self._manifest.close()
+        self._closed = True
+
+    def __enter__(self) -> "ChunkedRecordingWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ChunkedRecordingReader:
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+
+        with open(self.directory / META_FILE) as f:
+            meta = json.load(f)
+        self.samplerate: int = int(meta["samplerate"])
+        self.channels: int = int(meta["channels"])
+        self.created_at: float = float(meta.get("created_at", 0.0))
+
+        self.chunks: List[ChunkEntry] = []
+        manifest_path = self.directory / MANIFEST_FILE
+        if manifest_path.exists():
+            with open(manifest_path) as f:
+                for line in f:
+                    if not line.endswith("\n"):
+                        break  # torn tail from a crash mid-append
+                    self.chunks.append(ChunkEntry(**json.loads(line)))
+
+        self._starts = [c.start_frame for c in self.chunks]
+
+    @property
+    def frames(self) -> int:
+        if not self.chunks:
+            return 0
+        last = self.chunks[-1]
+        return last.start_frame + last.frames
+
+    @property
+    def duration_s(self) -> float:
+        return self.frames / self.samplerate
+
+    @property
+    def data_bytes(self) -> int:
+        return self.frames * self.channels * SAMPLE_WIDTH
+
+    def _map_chunk(self, chunk: ChunkEntry) -> "np.ndarray":
+        import numpy as np
+
+        return np.memmap(
+            self.directory / chunk.file,
+            dtype=np.int16,
+            mode="r",
+            shape=(chunk.frames, self.channels),
+        )
+
+    def read_range(self, start_s: float, end_s: Optional[float] = None) -> List["np.ndarray"]:
+        # Returns read-only memmap views, one per chunk touched by the range; nothing is copied.
+        start = max(0, int(start_s * self.samplerate))
+        end = self.frames if end_s is None else min(self.frames, int(end_s * self.samplerate))
+        if start >= end:
+            return []
+
+        views = []
+        first = max(0, bisect.bisect_right(self._starts, start) - 1)
+        for chunk in self.chunks[first:]:
+            if chunk.start_frame >= end:
+                break
+            lo = max(start, chunk.start_frame) - chunk.start_frame
+            hi = min(end, chunk.start_frame + chunk.frames) - chunk.start_frame
+            views.append(self._map_chunk(chunk)[lo:hi])
+        return views
+
+    def iter_blocks(self) -> Iterator["np.ndarray"]:
+        for chunk in self.chunks:
+            yield self._map_chunk(chunk)
+
+    def iter_bytes(self, block_size: int = 1 << 20) -> Iterator[bytes]:
+        for chunk in self.chunks:
+            with open(self.directory / chunk.file, "rb") as f:
+                while True:
+                    data = f.read(block_size)
+                    if not data:
+                        break
+                    yield data
+
+    def wav_header(self) -> bytes:
+        # Past 4 GiB the 32-bit size fields saturate; ffmpeg then reads the data chunk up to end of stream.
+        data_len = min(self.data_bytes, WAV_MAX_SIZE - 36)
+        byte_rate = self.samplerate * self.channels * SAMPLE_WIDTH
+        return struct.pack(
+            "<4sI4s4sIHHIIHH4sI",
+            b"RIFF",
+            36 + data_len,
+            b"WAVE",
+            b"fmt ",
+            16,
+            1,
+            self.channels,
+            self.samplerate,
+            byte_rate,
+            self.channels * SAMPLE_WIDTH,
+            SAMPLE_WIDTH * 8,
+            b"data",
+            data_len,
+        )
+
+    def open_wav_stream(self) -> io.BufferedReader:
+        return io.BufferedReader(WavStream(self), buffer_size=1 << 20)
+
+
+class WavStream(io.RawIOBase):
+    # Presents a chunked recording as a sequential WAV file without materializing it on disk.
+    def __init__(self, reader: ChunkedRecordingReader):
+        super().__init__()
+        self._reader = reader
+        self._parts = iter([reader.wav_header()])
+        self._files = iter(reader.chunks)
+        self._current: Optional[BinaryIO] = None
+        self._pending = b""
+        self.name = f"{reader.directory.name}.wav"
+
+    def readable(self) -> bool:
+        return True
+
+    def _next_bytes(self, size: int) -> bytes:
+        if self._pending:
+            data, self._pending = self._pending[:size], self._pending[size:]
+            return data
+
+        header = next(self._parts, None)
+        if header is not None:
+            self._pending = header
+            return self._next_bytes(size)
+
+        while True:
+            if self._current is None:
+                chunk = next(self._files, None)
+                if chunk is None:
+                    return b""
+                self._current = open(self._reader.directory / chunk.file, "rb")
+
+            data = self._current.read(size)
+            if data:
+                return data
+            self._current.close()
+            self._current = None
+
+    def readinto(self, buffer) -> int:
+        data = self._next_bytes(len(buffer))
+        n = len(data)
+        buffer[:n] = data
+        return n
+
+    def close(self):
+        if self._current is not None:
+            self._current.close()
+            self._current = None
+        super().close()
+
+
+def _salvage_open_chunk(directory: Path, reader: ChunkedRecordingReader) -> bool:
+    # The chunk being written when the process died holds the last seconds of audio. Its whole frames are
+    # committed the way a normal close would; a chunk renamed but not yet in the manifest is already complete.
+    name = _chunk_name(len(reader.chunks))
+    for path in (directory / name, directory / (name + PARTIAL_SUFFIX)):
+        if path.exists():
+            break
+    else:
+        return False
+
+    frame_bytes = reader.channels * SAMPLE_WIDTH
+    frames = path.stat().st_size // frame_bytes
+    if frames == 0:
+        return False
+    with open(path, "rb+") as f:
+        f.truncate(frames * frame_bytes)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path, directory / name)
+    _fsync_dir(directory)
+
+    entry = ChunkEntry(
+        index=len(reader.chunks),
+        file=name,
+        start_frame=reader.frames,
+        frames=frames,
+        wall_start=reader.chunks[-1].wall_end if reader.chunks else reader.created_at,
+        wall_end=(directory / name).stat().st_mtime,
+    )
+    with open(directory / MANIFEST_FILE, "a") as manifest:
+        manifest.write(json.dumps(asdict(entry)) + "\n")
+        manifest.flush()
+        os.fsync(manifest.fileno())
+    logger.warning("Salvaged %d frames of the open chunk %s", frames, path)
+    return True
+
+
+def recover_recording(directory: Union[str, Path]) -> ChunkedRecordingReader:
+    directory = Path(directory)
+    manifest_path = directory / MANIFEST_FILE
+
+    if manifest_path.exists():
+        with open(manifest_path, "rb+") as f:
+            content = f.read()
+            cut = content.rfind(b"\n") + 1
+            if cut != len(content):
+                f.truncate(cut)
+                f.flush()
+                os.fsync(f.fileno())
+                logger.warning("Dropped torn manifest tail in %s", directory)
+
+    reader = ChunkedRecordingReader(directory)
+    if _salvage_open_chunk(directory, reader):
+        reader = ChunkedRecordingReader(directory)
+    committed = {c.file for c in reader.chunks}
+    for path in directory.iterdir():
+        if path.name.startswith("chunk_") and path.name not in committed:
+            logger.warning("Discarding uncommitted chunk %s", path)
+            path.unlink()
+
+    logger.info(
+        "Recovered recording %s: %s chunks, %.1fs of audio",
+        directory,
+        len(reader.chunks),
+        reader.duration_s,
+    )
+    return reader
+
+
+def open_recording_stream(path: Union[str, Path]) -> BinaryIO:
+    # Consumers that expect a WAV file read either format through this.
+    if is_chunked_recording(path):
+        return ChunkedRecordingReader(path).open_wav_stream()
+    return open(path, "rb")
+
+
+def recording_stream_size(path: Union[str, Path]) -> int:
+    if is_chunked_recording(path):
+        reader = ChunkedRecordingReader(path)
+        return len(reader.wav_header()) + reader.data_bytes
+    return os.path.getsize(path)
@@ -0,0 +1,175 @@
+import platform
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.utils import get_logger
+
+logger = get_logger("audio-devices")
+
+
+@dataclass(frozen=True)
+class AudioDevice:
+    index: int
+    name: str
+    hostapi: str
+    max_input_channels: int
+    max_output_channels: int
+    default_samplerate: float
+
+
+@dataclass(frozen=True)
+class ResolvedDevice:
+    device: AudioDevice
+    loopback: bool
+    generation: int
+
+    @property
+    def index(self) -> int:
+        return self.device.index
+
+    @property
+    def name(self) -> str:
+        return self.device.name
+
+
+@dataclass
+class DeviceInventory:
+    devices: Tuple[AudioDevice, ...]
+    by_name: Dict[str, List[AudioDevice]]
+    by_hostapi: Dict[str, List[AudioDevice]]
+    enumerated_at: float
+    took_s: float
+    generation: int
+
+
+def enumerate_devices(generation: int, *, reinitialize: bool = False) -> DeviceInventory:
+    import sounddevice as sd
+
+    started = time.perf_counter()
+    if reinitialize:
+        # PortAudio fixes its device list at initialization; a re-init is the only way to see hotplugged devices.
+        sd._terminate()
+        sd._initialize()
+    hostapis = sd.query_hostapis()
+    api_names = [str(api.get("name", "")) for api in hostapis]
+    devices = tuple(
+        AudioDevice(
+            index=i,
+            name=str(dev.get("name", "")),
+            hostapi=api_names[dev["hostapi"]] if 0 <= dev.get("hostapi", -1) < len(api_names) else "",
+            max_input_channels=int(dev.get("max_input_channels", 0)),
+            max_output_channels=int(dev.get("max_output_channels", 0)),
+            default_samplerate=float(dev.get("default_samplerate", 0.0)),
+        )
+        for i, dev in enumerate(sd.query_devices())
+    )
+
+    by_name: Dict[str, List[AudioDevice]] = {}
+    by_hostapi: Dict[str, List[AudioDevice]] = {}
+    for dev in devices:
+        by_name.setdefault(dev.name.lower(), []).append(dev)
+        by_hostapi.setdefault(dev.hostapi.upper(), []).append(dev)
+
+    return DeviceInventory(
+        devices=devices,
+        by_name=by_name,
+        by_hostapi=by_hostapi,
+        enumerated_at=time.time(),
+        took_s=time.perf_counter() - started,
+        generation=generation,
+    )
+
+
+def choose_loopback(inventory: DeviceInventory, system: str) -> Tuple[AudioDevice, bool]:
+    if system == "windows":
+        for api, devices in inventory.by_hostapi.items():
+            if "WASAPI" in api:
+                for dev in devices:
+                    if dev.max_output_channels > 0:
+                        logger.info("Selected WASAPI output device for loopback: %s (index=%s)", dev.name, dev.index)
+                        return dev, True
+
+        for dev in inventory.devices:
+            if dev.max_output_channels > 0:
+                logger.info("Selected fallback output device for loopback: %s (index=%s)", dev.name, dev.index)
+                return dev, True
+
+        raise RuntimeError("No suitable Windows output device found for WASAPI loopback recording.")
+
+    # MacOS
+    elif system == "darwin":
+        blackholes = [d for d in inventory.devices if "blackhole" in d.name.lower() and d.max_input_channels > 0]
+        for variant in ("16ch", "2ch"):
+            for dev in blackholes:
+                if variant in dev.name.lower():
+                    logger.info(
+                        "Selected BlackHole input device: %s (index=%s, in_ch=%s)",
+                        dev.name, dev.index, dev.max_input_channels
+                    )
+                    return dev, False
+        raise RuntimeError("No suitable BlackHole device found (16ch or 2ch required)")
+
+    else:
+        raise RuntimeError(
+            f"Unsupported OS for recording: {system}. This service supports Windows and macOS only."
+        )
+
+
+class AudioDeviceRegistry:
+    def __init__(
+        self,
+        *,
+        max_age_s: float = 600.0,
+        streams_open: Callable[[], bool] = lambda: False,
+    ):
+        self.max_age_s = max_age_s
+        self.streams_open = streams_open
+        self.enumerations = 0
+        self._lock = threading.Lock()
+        self._inventory: Optional[DeviceInventory] = None
+        self._resolved: Optional[ResolvedDevice] = None
+        self._generation = 0
+        self._reinitialize = False
+
+    def invalidate(self, reason: str):
+        with self._lock:
+            logger.info("Audio device cache invalidated: %s", reason)
+            self._inventory = None
+            self._resolved = None
+            self._reinitialize = True
+
+    def _stale(self) -> bool:
+        inventory = self._inventory
+        return inventory is None or (self.max_age_s > 0 and time.time() - inventory.enumerated_at > self.max_age_s)
+
+    def inventory(self) -> DeviceInventory:
+        with self._lock:
+            if self._stale():
+                # A PortAudio re-init would break a running recording; the refresh then waits for the next join.
+                reinitialize = self._reinitialize and not self.streams_open()
+                self._generation += 1
+                self._inventory = enumerate_devices(self._generation, reinitialize=reinitialize)
+                self._resolved = None
+                self.enumerations += 1
+                if reinitialize:
+                    self._reinitialize = False
+                logger.info(
+                    "Enumerated %d audio devices in %.1f ms", len(self._inventory.devices), self._inventory.took_s * 1000
+                )
+            return self._inventory
+
+    def resolve_loopback(self) -> ResolvedDevice:
+        inventory = self.inventory()
+        with self._lock:
+            if self._resolved is None or self._resolved.generation != inventory.generation:
+                device, loopback = choose_loopback(inventory, platform.system().lower())
+                self._resolved = ResolvedDevice(device=device, loopback=loopback, generation=inventory.generation)
+            return self._resolved
+
+    def device(self, index: int) -> AudioDevice:
+        devices = self.inventory().devices
+        if not 0 <= index < len(devices):
+            raise ValueError(f"No audio device with index {index}")
+        return devices[index]
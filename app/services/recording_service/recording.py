@@ -1,5 +1,8 @@
 from threading import Thread, Event
 from dataclasses import dataclass
+from typing import Optional
+
+from app.services.recording_service.audio_health import AudioHealthMonitor
 
 
 @dataclass
@@ -8,3 +11,4 @@ class RecordingHandle:
     stop_event: Event
     started_at: float
     output_path: str
+    health: Optional[AudioHealthMonitor] = None
@@ -1,171 +1,150 @@
+import contextvars
 import os
 import queue
+import shutil
 import threading
 import time
 import platform
-from typing import Optional, Tuple
-import numpy as np
-import sounddevice as sd
-import soundfile as sf
+from typing import TYPE_CHECKING, Optional, Tuple, Union
 
+from app.services.recording_service.audio_health import AudioHealthMonitor
+from app.services.recording_service.chunked_recording import ChunkedRecordingWriter
+from app.services.recording_service.device_registry import AudioDeviceRegistry, ResolvedDevice
 from app.services.recording_service.recording import RecordingHandle
-from app.utils import get_logger
+from app.utils import get_logger, LogThrottle
+
+if TYPE_CHECKING:
+    import numpy as np
 
 _current_recording: Optional[RecordingHandle] = None
 logger = get_logger("recording")
 
+# One enumeration serves every join on this node until it is invalidated or ages out.
+device_registry = AudioDeviceRegistry(
+    max_age_s=float(os.getenv("AUDIO_DEVICE_CACHE_S", "600")),
+    streams_open=lambda: _current_recording is not None,
+)
 
-def pick_loopback_device() -> Tuple[int, str, bool]:
-    system = platform.system().lower()
-    devices = sd.query_devices()
-
-    logger.info("Preparing recording device (system=%s)", system)
-
-    if system == "windows":
-        hostapis = sd.query_hostapis()
-        wasapi_indices = [
-            i for i, api in enumerate(hostapis) if "WASAPI" in str(api.get("name", "")).upper()
-        ]
-
-        for api_idx in wasapi_indices:
-            api = hostapis[api_idx]
-            for dev_index in api.get("devices", []):
-                dev = devices[dev_index]
-                if dev.get("max_output_channels", 0) > 0:
-                    logger.info("Selected WASAPI output device for loopback: %s (index=%s)", dev["name"], dev_index)
-                    return int(dev_index), dev["name"], True
-
-        for i, dev in enumerate(devices):
-            if dev.get("max_output_channels", 0) > 0:
-                logger.info("Selected fallback output device for loopback: %s (index=%s)", dev["name"], i)
-                return int(i), dev["name"], True
-
-        raise RuntimeError("No suitable Windows output device found for WASAPI loopback recording.")
-
-    # MacOS
-    elif system == "darwin":
-        blackhole_16ch = []
-        blackhole_2ch = []
-
-        for i, dev in enumerate(devices):
-            name = str(dev.get("name", "")).lower()
-            in_ch = int(dev.get("max_input_channels", 0))
-
-            if "blackhole" in name and in_ch > 0:
-                if "16ch" in name:
-                    blackhole_16ch.append((i, dev.get("name"), in_ch))
-                elif "2ch" in name:
-                    blackhole_2ch.append((i, dev.get("name"), in_ch))
-
-        if blackhole_16ch:
-            dev_index, dev_name, in_ch = blackhole_16ch[0]
-        elif blackhole_2ch:
-            dev_index, dev_name, in_ch = blackhole_2ch[0]
-        else:
-            raise RuntimeError("No suitable BlackHole device found (16ch or 2ch required)")
-
-        logger.info(
-            "Selected BlackHole input device: %s (index=%s, in_ch=%s)",
-            dev_name, dev_index, in_ch
-        )
-        return dev_index, dev_name, False
 
-    else:
-        raise RuntimeError(
-            f"Unsupported OS for recording: {system}. This service supports Windows and macOS only."
-        )
+def pick_loopback_device() -> Tuple[int, str, bool]:
+    resolved = device_registry.resolve_loopback()
+    return resolved.index, resolved.name, resolved.loopback
 
 
 def start_recording(
-        output_path: str = "recording.wav",
+        output_path: str = "recording",
         samplerate: int = 48000,
         channels: int = 2,
-        device: Optional[int] = None,
+        device: Union[int, ResolvedDevice, None] = None,
         *,
         overwrite: bool = True,
+        chunk_seconds: float = 10.0,
 ) -> RecordingHandle:
     global _current_recording
 
+    import numpy as np
+    import sounddevice as sd
+
     if _current_recording is not None:
         raise RuntimeError("Recording already in progress. Stop it before starting another one.")
 
-    output_dir = os.path.dirname(output_path)
-    if output_dir:
-        os.makedirs(output_dir, exist_ok=True)
-
     if os.path.exists(output_path):
         if overwrite:
-            os.remove(output_path)
+            if os.path.isdir(output_path):
+                shutil.rmtree(output_path)
+            else:
+                os.remove(output_path)
         else:
             raise FileExistsError(f"Output file with given name already exists: {output_path}")
 
     if device is None:
-        device, dev_name, use_loopback = pick_loopback_device()
+        device = device_registry.resolve_loopback()
+    if isinstance(device, ResolvedDevice):
+        device, dev_name, use_loopback = device.index, device.name, device.loopback
     else:
-        dev_name = sd.query_devices(device)["name"]
+        dev_name = device_registry.device(device).name
         use_loopback = platform.system().lower() == "windows"
 
     q: "queue.Queue[np.ndarray]" = queue.Queue()
     stop_event = threading.Event()
 
+    throttle = LogThrottle(logger, interval_s=5.0)
+    health = AudioHealthMonitor(samplerate)
+
     def callback(indata, frames, time_info, status):
         if status:
-            logger.warning("Audio stream status: %s", status)
+            throttle.warning("Audio stream status: %s", status, key="status")
 
-        total_amplitude = np.sum(np.abs(indata))
-        if total_amplitude > 0:
-            if time.time() % 1 < 0.1:
-                logger.debug(f"Audio detected! Amplitude sum: {total_amplitude}")
-        else:
-            if time.time() % 5 < 0.1:
-                logger.warning("Absolute silence (all zeros).")
+        if not isinstance(indata, np.ndarray):
+            # RawInputStream (WASAPI loopback) hands over a plain buffer
+            indata = np.frombuffer(indata, dtype=np.float32).reshape(-1, channels)
+
+        if not indata.any():
+            throttle.warning("Absolute silence (all zeros).", key="silence")
 
+        health.update(indata, status)
         q.put(indata.copy())
 
-    def worker():
-        with sf.SoundFile(
-                output_path,
-                mode="w",
-                samplerate=samplerate,
-                channels=channels,
-                subtype="PCM_16",
-        ) as f:
-            wasapi_stream_kwargs = {
-                "samplerate": samplerate,
-                "channels": channels,
-                "device": device,
-                "callback": callback,
-                "dtype": "float32",
-            }
-
-            if use_loopback:
-                try:
-                    wasapi_settings = sd.WasapiSettings(loopback=True)
-                    stream = sd.RawInputStream(
-                        **wasapi_stream_kwargs,
-                        extra_settings=wasapi_settings
-                    )
-                except Exception:
-                    stream = sd.InputStream(**wasapi_stream_kwargs)
-            else:
+    wasapi_stream_kwargs = {
+        "samplerate": samplerate,
+        "channels": channels,
+        "device": device,
+        "callback": callback,
+        "dtype": "float32",
+    }
+
+    # Opened here rather than in the recorder thread, so a device that vanished (stale index after a
+    # hotplug) fails the call instead of silently recording nothing.
+    try:
+        if use_loopback:
+            try:
+                wasapi_settings = sd.WasapiSettings(loopback=True)
+                stream = sd.RawInputStream(
+                    **wasapi_stream_kwargs,
+                    extra_settings=wasapi_settings
+                )
+            except Exception:
                 stream = sd.InputStream(**wasapi_stream_kwargs)
+        else:
+            stream = sd.InputStream(**wasapi_stream_kwargs)
+    except Exception as e:
+        device_registry.invalidate(f"could not open {dev_name} (index={device}): {e}")
+        raise
 
-            with stream:
-                while not stop_event.is_set():
-                    try:
-                        data = q.get(timeout=0.25)
-                    except queue.Empty:
-                        continue
-                    f.write(data)
-
-                while True:
-                    try:
-                        data = q.get_nowait()
-                    except queue.Empty:
-                        break
-                    f.write(data)
-
-    t = threading.Thread(target=worker, name="audio-recorder", daemon=False)
+    def worker():
+        try:
+            with ChunkedRecordingWriter(
+                    output_path,
+                    samplerate=samplerate,
+                    channels=channels,
+                    chunk_seconds=chunk_seconds,
+            ) as f:
+                with stream:
+                    while not stop_event.is_set():
+                        try:
+                            data = q.get(timeout=0.25)
+                        except queue.Empty:
+                            continue
+                        f.write(data)
+
+                    while True:
+                        try:
+                            data = q.get_nowait()
+                        except queue.Empty:
+                            break
+                        f.write(data)
+        except Exception:
+            logger.exception("Recorder thread failed (output=%s)", output_path)
+            raise
+        finally:
+            # The writer can fail before the stream was ever entered.
+            if not stream.closed:
+                stream.close()
+
+    # Carry the caller's logging context (meeting_id) into the recorder thread.
+    t = threading.Thread(
+        target=contextvars.copy_context().run, args=(worker,), name="audio-recorder", daemon=False
+    )
     t.start()
 
     _current_recording = RecordingHandle(
@@ -173,6 +152,7 @@ def start_recording(
         stop_event=stop_event,
         started_at=time.time(),
         output_path=output_path,
+        health=health,
     )
 
     logger.info(f"Recording audio from device: {dev_name} (loopback={use_loopback}) -> {output_path}")
@@ -197,6 +177,13 @@ def stop_recording(timeout_s: float = 5.0) -> Optional[str]:
         )
         raise TimeoutError("Recording thread did not stop in time")
 
+    if _current_recording.health is not None:
+        logger.info("Audio health at stop: %s", _current_recording.health.snapshot(last_windows=0))
+
     path = _current_recording.output_path
     _current_recording = None
     return path
+
+
+def current_audio_health() -> Optional[AudioHealthMonitor]:
+    return _current_recording.health if _current_recording is not None else None
@@ -0,0 +1,60 @@
+import os
+import time
+from typing import Dict
+
+from app.models.MeetingRequest import ScheduledMeetingRequest
+from app.models.MeetingStatusResponse import MeetingState, MeetingStatus
+from app.services.scheduler_service.timer_wheel import meeting_scheduler
+from app.utils import get_logger
+
+logger = get_logger("scheduler-service")
+
+
+def recording_deadline_s(estimated_duration_min: int) -> int:
+    grace_min = float(os.getenv("RECORDING_GRACE_MIN", "10"))
+    return int((max(estimated_duration_min, 0) + grace_min) * 60)
+
+
+def prewarm_lead_s() -> float:
+    return float(os.getenv("PREWARM_LEAD_S", "90"))
+
+
+def schedule_meeting_join(
+    request: ScheduledMeetingRequest, active_sessions: Dict[str, MeetingState]
+) -> float:
+    meeting_id = request.meeting_id
+    start_at = request.start_at.timestamp()
+    fire_at = start_at - prewarm_lead_s()
+    deadline = recording_deadline_s(request.estimated_duration)
+
+    async def fire():
+        from app.workers.meeting_worker import join_and_record_meeting
+
+        state = active_sessions.get(meeting_id)
+        if state is None or state.status != MeetingStatus.SCHEDULED:
+            return
+
+        logger.info("Pre-warming bot for meeting %s (starts in %.0fs)", meeting_id, start_at - time.time())
+        await join_and_record_meeting(
+            meeting_id,
+            active_sessions,
+            batch_duration=deadline,
+            join_at=start_at,
+            transcript_mode=request.transcript_mode,
+        )
+
+    meeting_scheduler.schedule_at(meeting_id, fire_at, fire)
+    if meeting_id in active_sessions:
+        active_sessions[meeting_id].join_window = (fire_at, start_at + deadline)
+    logger.info(
+        "Scheduled meeting %s at %s (pre-warm %.0fs early, deadline %ss)",
+        meeting_id,
+        request.start_at.isoformat(),
+        start_at - fire_at,
+        deadline,
+    )
+    return fire_at
+
+
+def cancel_meeting_join(meeting_id: str) -> bool:
+    return meeting_scheduler.cancel(meeting_id)
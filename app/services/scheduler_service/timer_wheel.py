@@ -0,0 +1,93 @@
+import asyncio
+import inspect
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from app.utils import get_logger
+
+logger = get_logger("timer-wheel")
+
+
+class TimerWheel:
+    # Hashed timing wheel: scheduling and cancelling are O(1) and each tick only inspects one slot,
+    # so thousands of far-future joins cost nothing until they come due.
+    def __init__(self, *, tick_s: float = 1.0, slots: int = 3600):
+        self.tick_s = tick_s
+        self._slots: List[Dict[str, list]] = [{} for _ in range(slots)]
+        self._where: Dict[str, int] = {}
+        self._cursor = 0
+        self._running: Set[asyncio.Task] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._where
+
+    def schedule(self, key: str, delay_s: float, callback: Callable[[], Any]):
+        self.cancel(key)
+        ticks = max(1, math.ceil(delay_s / self.tick_s))
+        slot = (self._cursor + ticks) % len(self._slots)
+        rounds = (ticks - 1) // len(self._slots)
+        self._slots[slot][key] = [rounds, callback]
+        self._where[key] = slot
+
+    def schedule_at(self, key: str, when: float, callback: Callable[[], Any]):
+        self.schedule(key, when - time.time(), callback)
+
+    def cancel(self, key: str) -> bool:
+        slot = self._where.pop(key, None)
+        if slot is None:
+            return False
+        self._slots[slot].pop(key, None)
+        return True
+
+    def _advance(self) -> List[Callable[[], Any]]:
+        self._cursor = (self._cursor + 1) % len(self._slots)
+        slot = self._slots[self._cursor]
+        due = []
+        for key, entry in list(slot.items()):
+            if entry[0] > 0:
+                entry[0] -= 1
+                continue
+            del slot[key]
+            del self._where[key]
+            due.append(entry[1])
+        return due
+
+    def _fire(self, callback: Callable[[], Any]):
+        try:
+            result = callback()
+        except Exception as e:
+            logger.exception("Scheduled callback failed: %s", e)
+            return
+        if inspect.isawaitable(result):
+            task = asyncio.ensure_future(result)
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def run(self):
+        next_tick = time.monotonic()
+        while True:
+            next_tick += self.tick_s
+            await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+            for callback in self._advance():
+                self._fire(callback)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+meeting_scheduler = TimerWheel()
@@ -0,0 +1,192 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from app.utils import get_logger
+
+logger = get_logger("transcript-index")
+
+RELEVANCE = "relevance"
+RECENT = "recent"
+MIXED = "mixed"
+MAX_HITS = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meetings (
+    meeting_id TEXT PRIMARY KEY,
+    indexed_at REAL NOT NULL,
+    segment_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    meeting_id TEXT NOT NULL,
+    speaker TEXT,
+    start REAL,
+    end REAL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS segments_meeting ON segments (meeting_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(
+    text,
+    content='segments',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS segments_ai AFTER INSERT ON segments BEGIN
+    INSERT INTO segments_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS segments_ad AFTER DELETE ON segments BEGIN
+    INSERT INTO segments_fts (segments_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+
+def to_match_query(query: str) -> str:
+    # Every word must match; a trailing * keeps prefix search. Quoting stops FTS5 syntax errors on user input.
+    terms = []
+    for word in query.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+class TranscriptIndex:
+    def __init__(self, path: str = "./app/data/transcripts/index.db", *, relevance_budget_ms: float = 25.0):
+        self.path = Path(path)
+        self.relevance_budget_s = relevance_budget_ms / 1000
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(SCHEMA)
+            self._db = db
+        return self._db
+
+    def index_transcript(self, meeting_id: str, payload: dict) -> int:
+        rows = [
+            (meeting_id, None if s.get("speaker") is None else str(s.get("speaker")), s.get("start"), s.get("end"), s["text"])
+            for s in payload.get("segments") or []
+            if (s.get("text") or "").strip()
+        ]
+        with self._lock:
+            db = self._conn()
+            with db:
+                # Re-delivering a meeting replaces its segments instead of duplicating them.
+                db.execute("DELETE FROM segments WHERE meeting_id = ?", (meeting_id,))
+                db.executemany(
+                    "INSERT INTO segments (meeting_id, speaker, start, end, text) VALUES (?, ?, ?, ?, ?)", rows
+                )
+                db.execute(
+                    "INSERT OR REPLACE INTO meetings (meeting_id, indexed_at, segment_count) VALUES (?, ?, ?)",
+                    (meeting_id, time.time(), len(rows)),
+                )
+        return len(rows)
+
+    def is_indexed(self, meeting_id: str) -> bool:
+        with self._lock:
+            row = self._conn().execute("SELECT 1 FROM meetings WHERE meeting_id = ?", (meeting_id,)).fetchone()
+        return row is not None
+
+    def _meeting_rowids(self, db: sqlite3.Connection, meeting_id: str) -> Tuple[int, int]:
+        # A meeting's segments are inserted in one transaction, so they occupy one contiguous rowid range,
+        # which FTS5 can seek to instead of filtering every match.
+        row = db.execute(
+            "SELECT MIN(id) AS lo, MAX(id) AS hi FROM segments WHERE meeting_id = ?", (meeting_id,)
+        ).fetchone()
+        return (row["lo"], row["hi"]) if row["lo"] is not None else (1, 0)
+
+    def _run_bounded(self, db: sqlite3.Connection, sql: str, params: list) -> Optional[list]:
+        deadline = time.perf_counter() + self.relevance_budget_s
+        db.set_progress_handler(lambda: int(time.perf_counter() > deadline), 10000)
+        try:
+            return db.execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            if "interrupt" not in str(e):
+                raise
+            return None
+        finally:
+            db.set_progress_handler(None, 0)
+
+    def search(
+        self,
+        query: str,
+        *,
+        limit: int = 20,
+        meeting_id: Optional[str] = None,
+        speaker: Optional[str] = None,
+    ) -> Tuple[List[dict], str]:
+        match = to_match_query(query)
+        if not match:
+            return [], RELEVANCE
+        limit = max(1, min(limit, MAX_HITS))
+
+        base = (
+            "SELECT s.meeting_id, s.speaker, s.start, s.end, s.text,"
+            " snippet(segments_fts, 0, '[', ']', '…', 16) AS snippet, bm25(segments_fts) AS score"
+            " FROM segments_fts JOIN segments s ON s.id = segments_fts.rowid"
+            " WHERE segments_fts MATCH ?"
+        )
+        params: list = [match]
+
+        with self._lock:
+            db = self._conn()
+            if meeting_id is not None:
+                lo, hi = self._meeting_rowids(db, meeting_id)
+                base += " AND segments_fts.rowid BETWEEN ? AND ?"
+                params += [lo, hi]
+            if speaker is not None:
+                base += " AND s.speaker = ?"
+                params.append(speaker)
+
+            # bm25 has to score every match, which is cheap for distinctive words but not for words found in
+            # most segments; those fall back to newest-first. FTS5 returns rowids in that order itself, so the
+            # LIMIT stops the scan after `limit` hits instead of sorting every match.
+            rows = self._run_bounded(db, base + " ORDER BY score LIMIT ?", params + [limit])
+            ranking = RELEVANCE
+            if rows is None:
+                rows = db.execute(base + " ORDER BY segments_fts.rowid DESC LIMIT ?", params + [limit]).fetchall()
+                ranking = RECENT
+
+        return [dict(r) for r in rows], ranking
+
+    def index_missing(self, directory: Path) -> int:
+        # Picks up transcripts saved before the index existed (or while it was unavailable).
+        indexed = 0
+        for path in sorted(Path(directory).glob("*.json")):
+            meeting_id = path.stem
+            if self.is_indexed(meeting_id):
+                continue
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.index_transcript(meeting_id, json.load(f))
+                indexed += 1
+            except Exception as e:
+                logger.error("Could not index transcript %s: %s", path, e)
+        if indexed:
+            logger.info("Indexed %d transcripts that were missing from the search index", indexed)
+        return indexed
+
+
+def merge_by_rank(results: List[Tuple[List[dict], str]], limit: int) -> Tuple[List[dict], str]:
+    # bm25 depends on each index's own term statistics, so scores from different nodes cannot be compared.
+    # Hits are interleaved by their rank on their node instead: every node's best hit, then every second best.
+    hits = []
+    for rank in range(max((len(h) for h, _ in results), default=0)):
+        hits.extend(node_hits[rank] for node_hits, _ in results if rank < len(node_hits))
+    rankings = {ranking for _, ranking in results}
+    ranking = rankings.pop() if len(rankings) == 1 else (MIXED if rankings else RELEVANCE)
+    return hits[:limit], ranking
+
+
+transcript_index = TranscriptIndex()
@@ -0,0 +1,125 @@
+import asyncio
+import json
+import threading
+from collections import deque
+from typing import AsyncIterator, Callable, Deque, Iterable, Optional, Set
+
+from app.models.MeetingStatusResponse import MeetingStatusEvent, add_status_listener
+
+
+class StatusSubscription:
+    def __init__(
+        self,
+        broadcaster: "StatusBroadcaster",
+        meeting_ids: Optional[Set[str]],
+        max_pending: int,
+    ):
+        self._broadcaster = broadcaster
+        self._loop = asyncio.get_running_loop()
+        self._pending: Deque[MeetingStatusEvent] = deque(maxlen=max_pending)
+        self._wakeup = asyncio.Event()
+        self.meeting_ids = meeting_ids
+        self.dropped = 0
+
+    def wants(self, event: MeetingStatusEvent) -> bool:
+        return self.meeting_ids is None or event.meeting_id in self.meeting_ids
+
+    def _push(self, event: MeetingStatusEvent):
+        # Always runs on the subscriber's loop; a slow consumer loses its oldest events, not the newest.
+        if len(self._pending) == self._pending.maxlen:
+            self.dropped += 1
+        self._pending.append(event)
+        self._wakeup.set()
+
+    def deliver(self, event: MeetingStatusEvent):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is self._loop:
+            self._push(event)
+        else:
+            self._loop.call_soon_threadsafe(self._push, event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[MeetingStatusEvent]:
+        if not self._pending:
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return None
+        return self._pending.popleft() if self._pending else None
+
+    def close(self):
+        self._broadcaster.unsubscribe(self)
+
+    async def __aenter__(self) -> "StatusSubscription":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class StatusBroadcaster:
+    def __init__(self, max_pending: int = 256):
+        self.max_pending = max_pending
+        self._subscriptions: Set[StatusSubscription] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions)
+
+    def subscribe(self, meeting_ids: Optional[Iterable[str]] = None) -> StatusSubscription:
+        subscription = StatusSubscription(
+            self, set(meeting_ids) if meeting_ids else None, self.max_pending
+        )
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: StatusSubscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event: MeetingStatusEvent):
+        # Status changes come from the event loop and from worker threads alike.
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+
+        for subscription in subscriptions:
+            if not subscription.wants(event):
+                continue
+            try:
+                subscription.deliver(event)
+            except RuntimeError:
+                # Subscriber's loop is closed; it will never read again.
+                self.unsubscribe(subscription)
+
+
+status_broadcaster = StatusBroadcaster()
+add_status_listener(status_broadcaster.publish)
+
+
+def format_sse(event: MeetingStatusEvent) -> str:
+    return f"event: status\nid: {event.timestamp}\ndata: {json.dumps(event.model_dump(mode='json'))}\n\n"
+
+
+async def stream_status_events(
+    snapshot: Callable[[], Iterable[MeetingStatusEvent]],
+    meeting_ids: Optional[Iterable[str]] = None,
+    *,
+    heartbeat_s: float = 15.0,
+) -> AsyncIterator[str]:
+    # Subscribe before taking the snapshot so no transition can fall between the two.
+    async with status_broadcaster.subscribe(meeting_ids) as subscription:
+        for event in snapshot():
+            yield format_sse(event)
+
+        while True:
+            event = await subscription.get(timeout=heartbeat_s)
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield format_sse(event)
@@ -0,0 +1,313 @@
+import asyncio
+import hashlib
+import os
+import shutil
+import sqlite3
+import subprocess
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from app.models.StoredRecording import StoredRecording
+from app.services.recording_service.chunked_recording import (
+    is_chunked_recording,
+    open_recording_stream,
+    recover_recording,
+)
+from app.utils import get_logger
+
+logger = get_logger("recording-store")
+
+HOT = "hot"
+COLD = "cold"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recordings (
+    job_id TEXT PRIMARY KEY,
+    meeting_id TEXT NOT NULL,
+    path TEXT NOT NULL,
+    tier TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL DEFAULT 0,
+    sha256 TEXT,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    active INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS recordings_meeting ON recordings (meeting_id, created_at);
+CREATE INDEX IF NOT EXISTS recordings_lru ON recordings (active, last_access);
+CREATE INDEX IF NOT EXISTS recordings_sha ON recordings (sha256);
+"""
+
+
+def _remove(path: Path):
+    if path.is_dir():
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        path.unlink(missing_ok=True)
+
+
+def _dir_size(path: Path) -> int:
+    if path.is_file():
+        return path.stat().st_size
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+class RecordingStore:
+    def __init__(
+        self,
+        root: str = "./app/data/recordings",
+        *,
+        budget_bytes: int = 20 * 1024 ** 3,
+        cold_after_s: float = 24 * 3600,
+        cold_bitrate: str = "64k",
+    ):
+        self.root = Path(root)
+        self.budget_bytes = budget_bytes
+        self.cold_after_s = cold_after_s
+        self.cold_bitrate = cold_bitrate
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _conn(self) -> sqlite3.Connection:
+        # Opened on first use so importing the store does not touch the disk.
+        if self._db is None:
+            (self.root / "jobs").mkdir(parents=True, exist_ok=True)
+            (self.root / "blobs").mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.root / "index.db", check_same_thread=False)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+            self._db = db
+        return self._db
+
+    def _row(self, row: Optional[sqlite3.Row]) -> Optional[StoredRecording]:
+        if row is None:
+            return None
+        return StoredRecording(**{**dict(row), "active": bool(row["active"])})
+
+    def allocate(self, meeting_id: str) -> Tuple[str, str]:
+        job_id = uuid.uuid4().hex
+        path = str(self.root / "jobs" / job_id)
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            db.execute(
+                "INSERT INTO recordings (job_id, meeting_id, path, tier, created_at, last_access, active)"
+                " VALUES (?, ?, ?, ?, ?, ?, 1)",
+                (job_id, meeting_id, path, HOT, now, now),
+            )
+            db.commit()
+        logger.info("Allocated recording job %s for meeting %s", job_id, meeting_id)
+        return job_id, path
+
+    def mark_complete(self, job_id: str):
+        with self._lock:
+            db = self._conn()
+            row = db.execute("SELECT path FROM recordings WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None:
+                return
+            path = Path(row["path"])
+            size = _dir_size(path) if path.exists() else 0
+            db.execute(
+                "UPDATE recordings SET active = 0, size_bytes = ?, last_access = ? WHERE job_id = ?",
+                (size, time.time(), job_id),
+            )
+            db.commit()
+
+    def recover_orphans(self) -> List[str]:
+        # Only the server calls this, before it records anything: every job still flagged active was cut off by a
+        # crash. Other processes opening the store (the backfill CLI) must leave in-progress recordings alone.
+        with self._lock:
+            rows = self._conn().execute("SELECT job_id, path FROM recordings WHERE active = 1").fetchall()
+
+        sizes = {}
+        for row in rows:
+            path = Path(row["path"])
+            if is_chunked_recording(path):
+                # Rebuilds the recording from its manifest and chunks so everything up to the crash can be processed.
+                try:
+                    recover_recording(path)
+                except Exception as e:
+                    logger.error("Could not recover recording %s: %s", row["job_id"], e)
+            sizes[row["job_id"]] = _dir_size(path) if path.exists() else 0
+            logger.warning("Recording job %s was interrupted by a restart", row["job_id"])
+
+        with self._lock:
+            db = self._conn()
+            db.executemany(
+                "UPDATE recordings SET active = 0, size_bytes = ? WHERE job_id = ?",
+                [(size, job_id) for job_id, size in sizes.items()],
+            )
+            db.commit()
+        return list(sizes)
+
+    def get(self, job_id: str) -> Optional[StoredRecording]:
+        with self._lock:
+            row = self._conn().execute("SELECT * FROM recordings WHERE job_id = ?", (job_id,)).fetchone()
+        return self._row(row)
+
+    def latest_for_meeting(self, meeting_id: str) -> Optional[StoredRecording]:
+        with self._lock:
+            row = self._conn().execute(
+                "SELECT * FROM recordings WHERE meeting_id = ? ORDER BY created_at DESC LIMIT 1",
+                (meeting_id,),
+            ).fetchone()
+        return self._row(row)
+
+    def list_for_meeting(self, meeting_id: str) -> List[StoredRecording]:
+        with self._lock:
+            rows = self._conn().execute(
+                "SELECT * FROM recordings WHERE meeting_id = ? ORDER BY created_at DESC",
+                (meeting_id,),
+            ).fetchall()
+        return [self._row(r) for r in rows]
+
+    def list_recordings(
+        self, *, since: Optional[float] = None, meeting_ids: Optional[List[str]] = None
+    ) -> List[StoredRecording]:
+        query = "SELECT * FROM recordings WHERE active = 0 AND created_at >= ?"
+        params: list = [since or 0.0]
+        if meeting_ids:
+            query += f" AND meeting_id IN ({', '.join('?' * len(meeting_ids))})"
+            params += meeting_ids
+        with self._lock:
+            rows = self._conn().execute(query + " ORDER BY created_at", params).fetchall()
+        return [self._row(r) for r in rows]
+
+    def touch(self, job_id: str):
+        with self._lock:
+            db = self._conn()
+            db.execute("UPDATE recordings SET last_access = ? WHERE job_id = ?", (time.time(), job_id))
+            db.commit()
+
+    def used_bytes(self) -> int:
+        with self._lock:
+            # Cold blobs are shared by content hash, so each file is counted once.
+            row = self._conn().execute(
+                "SELECT COALESCE(SUM(size_bytes), 0) AS used FROM"
+                " (SELECT MAX(size_bytes) AS size_bytes FROM recordings GROUP BY path)"
+            ).fetchone()
+        return int(row["used"])
+
+    def _compress(self, source: Path) -> Tuple[Path, str, int]:
+        tmp = self.root / "blobs" / f".{uuid.uuid4().hex}.part"
+        digest = hashlib.sha256()
+        try:
+            with open_recording_stream(source) as stream, open(tmp, "wb") as out:
+                process = subprocess.Popen(
+                    ["ffmpeg", "-hide_banner", "-loglevel", "error", "-f", "wav", "-i", "pipe:0",
+                     "-f", "mp3", "-b:a", self.cold_bitrate, "pipe:1"],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                )
+
+                # Feed and drain concurrently so neither pipe fills up and deadlocks ffmpeg.
+                def feed():
+                    try:
+                        shutil.copyfileobj(stream, process.stdin, 1 << 20)
+                    except BrokenPipeError:
+                        pass
+                    finally:
+                        process.stdin.close()
+
+                feeder = threading.Thread(target=feed, name="cold-compress-feed", daemon=True)
+                feeder.start()
+
+                size = 0
+                for block in iter(lambda: process.stdout.read(1 << 20), b""):
+                    digest.update(block)
+                    out.write(block)
+                    size += len(block)
+
+                feeder.join()
+                if process.wait() != 0:
+                    raise RuntimeError(f"ffmpeg failed to compress {source}")
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+
+        sha = digest.hexdigest()
+        blob = self.root / "blobs" / f"{sha}.mp3"
+        if blob.exists():
+            tmp.unlink()
+        else:
+            os.replace(tmp, blob)
+        return blob, sha, size
+
+    def compact_once(self, limit: int = 4) -> int:
+        cutoff = time.time() - self.cold_after_s
+        with self._lock:
+            rows = self._conn().execute(
+                "SELECT * FROM recordings WHERE tier = ? AND active = 0 AND created_at < ?"
+                " ORDER BY created_at LIMIT ?",
+                (HOT, cutoff, limit),
+            ).fetchall()
+
+        compacted = 0
+        for row in rows:
+            source = Path(row["path"])
+            if not source.exists():
+                continue
+            try:
+                blob, sha, size = self._compress(source)
+            except Exception as e:
+                logger.error("Could not recompress recording %s: %s", row["job_id"], e)
+                continue
+
+            with self._lock:
+                db = self._conn()
+                db.execute(
+                    "UPDATE recordings SET tier = ?, path = ?, sha256 = ?, size_bytes = ?"
+                    " WHERE job_id = ? AND active = 0",
+                    (COLD, str(blob), sha, size, row["job_id"]),
+                )
+                db.commit()
+
+            _remove(source)
+            compacted += 1
+            logger.info(
+                "Moved recording %s to cold tier (%s -> %s bytes)", row["job_id"], row["size_bytes"], size
+            )
+        return compacted
+
+    def evict_once(self) -> int:
+        evicted = 0
+        while self.used_bytes() > self.budget_bytes:
+            with self._lock:
+                db = self._conn()
+                row = db.execute(
+                    "SELECT * FROM recordings WHERE active = 0 ORDER BY last_access LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    logger.warning("Recording storage over budget but nothing is evictable")
+                    break
+                db.execute("DELETE FROM recordings WHERE job_id = ?", (row["job_id"],))
+                shared = row["sha256"] is not None and db.execute(
+                    "SELECT 1 FROM recordings WHERE sha256 = ? LIMIT 1", (row["sha256"],)
+                ).fetchone()
+                db.commit()
+
+            if not shared:
+                _remove(Path(row["path"]))
+            evicted += 1
+            logger.info("Evicted recording %s of meeting %s", row["job_id"], row["meeting_id"])
+        return evicted
+
+    async def run_maintenance(self, interval_s: float = 300.0):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, self.compact_once)
+                await loop.run_in_executor(None, self.evict_once)
+            except Exception as e:
+                logger.exception("Recording storage maintenance failed: %s", e)
+            await asyncio.sleep(interval_s)
+
+
+recording_store = RecordingStore(
+    budget_bytes=int(float(os.getenv("RECORDINGS_DISK_BUDGET_GB", "20")) * 1024 ** 3),
+    cold_after_s=float(os.getenv("RECORDINGS_COLD_AFTER_H", "24")) * 3600,
+)
@@ -0,0 +1,102 @@
+from typing import List, Sequence
+
+# An overlap this long at a turn change counts as the incoming speaker interrupting, not a short backchannel.
+INTERRUPTION_MIN_OVERLAP_S = 0.5
+# Words the STT could not attribute; segments and stats use the same key so consumers can join them.
+UNKNOWN_SPEAKER = "unknown"
+
+
+def speaker_key(speaker_id) -> str:
+    return str(speaker_id) if speaker_id is not None and speaker_id != "" else UNKNOWN_SPEAKER
+
+
+def _is_spoken(word) -> bool:
+    return getattr(word, "type", "word") == "word" and bool((word.text or "").strip())
+
+
+def compute_speaker_stats(
+    words: Sequence,
+    *,
+    first_utterances: int = 3,
+    utterance_max_words: int = 40,
+) -> List[dict]:
+    import numpy as np
+
+    spoken = [w for w in words if _is_spoken(w)]
+    if not spoken:
+        return []
+
+    speaker_ids = np.array([speaker_key(w.speaker_id) for w in spoken])
+    start = np.fromiter((w.start or 0.0 for w in spoken), dtype=np.float64, count=len(spoken))
+    end = np.fromiter((w.end or 0.0 for w in spoken), dtype=np.float64, count=len(spoken))
+
+    speakers, inv = np.unique(speaker_ids, return_inverse=True)
+    n = len(speakers)
+
+    duration = np.clip(end - start, 0.0, None)
+    talk_time = np.bincount(inv, weights=duration, minlength=n)
+    word_count = np.bincount(inv, minlength=n)
+
+    # Turn boundaries are the positions where the speaker changes.
+    change = np.flatnonzero(inv[1:] != inv[:-1]) + 1
+    turn_starts = np.concatenate(([0], change))
+    turn_ends = np.concatenate((change, [len(inv)])) - 1
+    turn_speaker = inv[turn_starts]
+    turn_count = np.bincount(turn_speaker, minlength=n)
+
+    # At each change, the incoming speaker overlaps whatever the previous speaker had not finished.
+    overlap = np.clip(end[change - 1] - start[change], 0.0, None)
+    incoming = inv[change]
+    outgoing = inv[change - 1]
+    overlapped = overlap > 0
+    interrupting = overlap >= INTERRUPTION_MIN_OVERLAP_S
+
+    overlap_count = np.bincount(incoming[overlapped], minlength=n)
+    overlap_s = np.bincount(incoming, weights=overlap, minlength=n)
+    interruption_count = np.bincount(incoming[interrupting], minlength=n)
+    interrupted_count = np.bincount(outgoing[interrupting], minlength=n)
+
+    first_spoke = np.full(n, np.inf)
+    np.minimum.at(first_spoke, inv, start)
+    last_spoke = np.zeros(n)
+    np.maximum.at(last_spoke, inv, end)
+
+    # Rank each turn within its speaker so only the first few are materialized as text.
+    order = np.argsort(turn_speaker, kind="stable")
+    sorted_speakers = turn_speaker[order]
+    group_first = np.concatenate(([0], np.flatnonzero(sorted_speakers[1:] != sorted_speakers[:-1]) + 1))
+    group_sizes = np.diff(np.concatenate((group_first, [len(order)])))
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order)) - np.repeat(group_first, group_sizes)
+
+    utterances: List[List[dict]] = [[] for _ in range(n)]
+    for t in np.flatnonzero(rank < first_utterances):
+        lo = int(turn_starts[t])
+        hi = min(int(turn_ends[t]) + 1, lo + utterance_max_words)
+        utterances[int(turn_speaker[t])].append(
+            {
+                "start": float(start[lo]),
+                "text": " ".join(w.text for w in spoken[lo:hi]),
+            }
+        )
+
+    total_talk = float(talk_time.sum()) or 1.0
+    stats = [
+        {
+            "speaker": str(speakers[i]),
+            "talk_time_s": round(float(talk_time[i]), 3),
+            "talk_share": round(float(talk_time[i]) / total_talk, 4),
+            "word_count": int(word_count[i]),
+            "turn_count": int(turn_count[i]),
+            "overlap_count": int(overlap_count[i]),
+            "overlap_s": round(float(overlap_s[i]), 3),
+            "interruption_count": int(interruption_count[i]),
+            "interrupted_count": int(interrupted_count[i]),
+            "first_spoke_at": round(float(first_spoke[i]), 3),
+            "last_spoke_at": round(float(last_spoke[i]), 3),
+            "first_utterances": utterances[i],
+        }
+        for i in range(n)
+    ]
+    stats.sort(key=lambda s: s["talk_time_s"], reverse=True)
+    return stats
@@ -0,0 +1,226 @@
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional
+
+import httpx
+
+from app.services.ledger_service.ledger_store import charge
+from app.services.upload_service.upload_service import RETRYABLE_STATUS
+from app.utils import get_logger
+
+logger = get_logger("stt-client")
+
+SendFn = Callable[[bytes, str], Awaitable[dict]]
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, (httpx.TransportError, asyncio.TimeoutError)):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS
+    return False
+
+
+class LatencyTracker:
+    # Provider latency grows with the upload, so samples are kept as seconds per MB of audio.
+    def __init__(self, *, size: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self.samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float, size_bytes: int):
+        self.samples.append(seconds / max(size_bytes / 1e6, 0.01))
+
+    def quantile(self, q: float) -> Optional[float]:
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CircuitBreaker:
+    def __init__(self, *, failure_threshold: int = 5, reset_timeout_s: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._changed = asyncio.Event()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def acquire(self, deadline: float) -> bool:
+        # While open, callers queue here instead of hitting the provider; one probe is let through
+        # after the reset timeout and its outcome closes or re-opens the circuit for everyone.
+        # Returns True for the caller that became the probe.
+        while True:
+            now = time.monotonic()
+            if self.state == CLOSED:
+                return False
+            if self.state == OPEN and now >= self.opened_at + self.reset_timeout_s:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+
+            wait_s = deadline - now
+            if wait_s <= 0:
+                raise CircuitOpenError("STT provider circuit is open")
+            if self.state == OPEN:
+                wait_s = min(wait_s, self.opened_at + self.reset_timeout_s - now)
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=max(wait_s, 0.01))
+            except asyncio.TimeoutError:
+                pass
+
+    def record_success(self):
+        if self.state != CLOSED:
+            logger.info("STT provider recovered; closing circuit")
+        self.state = CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+        self._notify()
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                logger.error("STT provider failing (%d in a row); opening circuit", self.failures)
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+        self._probe_in_flight = False
+        self._notify()
+
+    def release_probe(self):
+        # A probe that ended in a client error says nothing about provider health.
+        if self._probe_in_flight:
+            self._probe_in_flight = False
+            self._notify()
+
+
+class STTClient:
+    def __init__(
+        self,
+        send: SendFn,
+        *,
+        attempt_timeout_s: float = 600.0,
+        max_attempts: int = 4,
+        backoff_base_s: float = 2.0,
+        backoff_max_s: float = 60.0,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_min_delay_s: float = 5.0,
+        queue_timeout_s: float = 900.0,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.send = send
+        self.attempt_timeout_s = attempt_timeout_s
+        self.max_attempts = max_attempts
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay_s = hedge_min_delay_s
+        self.queue_timeout_s = queue_timeout_s
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = LatencyTracker()
+
+    def _hedge_delay(self, size_bytes: int) -> Optional[float]:
+        if not self.hedge:
+            return None
+        per_mb = self.latency.quantile(self.hedge_quantile)
+        if per_mb is None:
+            return None
+        return max(self.hedge_min_delay_s, per_mb * size_bytes / 1e6)
+
+    async def _call(self, audio: bytes, filename: str) -> dict:
+        charge(stt_attempts=1, stt_upload_bytes=len(audio))
+        return await asyncio.wait_for(self.send(audio, filename), timeout=self.attempt_timeout_s)
+
+    async def _attempt(self, audio: bytes, filename: str) -> dict:
+        delay = self._hedge_delay(len(audio))
+        primary = asyncio.ensure_future(self._call(audio, filename))
+        if delay is None:
+            return await primary
+
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+
+        # The primary is slower than the usual tail: race a second copy and keep whichever answers first.
+        logger.info("STT request slower than p%d (%.1fs); sending hedged request", self.hedge_quantile * 100, delay)
+        hedged = asyncio.ensure_future(self._call(audio, filename))
+        pending = {primary, hedged}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def transcribe(self, audio: bytes, filename: str) -> dict:
+        queue_deadline = time.monotonic() + self.queue_timeout_s
+        attempt = 0
+        while True:
+            attempt += 1
+            probe = await self.breaker.acquire(queue_deadline)
+
+            started = time.monotonic()
+            try:
+                result = await self._attempt(audio, filename)
+            except Exception as e:
+                if not is_retryable(e):
+                    if probe:
+                        self.breaker.release_probe()
+                    raise
+                self.breaker.record_failure()
+                if attempt >= self.max_attempts:
+                    raise
+                delay = random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * (2 ** (attempt - 1))))
+                logger.warning(
+                    "STT attempt %d/%d failed (%r); retrying in %.1fs", attempt, self.max_attempts, e, delay
+                )
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # Cancelled mid-probe (e.g. the meeting was torn down): without this, nobody could probe again.
+                if probe:
+                    self.breaker.release_probe()
+                raise
+
+            self.breaker.record_success()
+            self.latency.add(time.monotonic() - started, len(audio))
+            return result
+
+
+def stt_client_from_env(send: SendFn) -> STTClient:
+    return STTClient(
+        send,
+        attempt_timeout_s=float(os.getenv("STT_ATTEMPT_TIMEOUT_S", "600")),
+        max_attempts=int(os.getenv("STT_MAX_ATTEMPTS", "4")),
+        hedge=os.getenv("STT_HEDGE", "0") == "1",
+        queue_timeout_s=float(os.getenv("STT_QUEUE_TIMEOUT_S", "900")),
+        breaker=CircuitBreaker(
+            failure_threshold=int(os.getenv("STT_BREAKER_FAILURES", "5")),
+            reset_timeout_s=float(os.getenv("STT_BREAKER_RESET_S", "60")),
+        ),
+    )
@@ -0,0 +1,101 @@
+from typing import List, Sequence
+
+from app.services.transcription_service.speaker_analytics import speaker_key
+
+# Roughly what BPE tokenizers produce for mixed Polish/English speech; only used for budgeting.
+CHARS_PER_TOKEN = 4.0
+TOKENS_PER_WORD = 1.3
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    words = text.count(" ") + 1
+    return max(1, int(max(len(text) / CHARS_PER_TOKEN, words * TOKENS_PER_WORD)))
+
+
+def _split_segment(segment: dict, max_tokens: int) -> List[dict]:
+    # A single monologue over budget is cut on word boundaries, interpolating times linearly. Pieces are filled
+    # greedily with the same estimate the chunker budgets with, so none of them can exceed it.
+    words = segment["text"].split()
+    start = float(segment.get("start") or 0.0)
+    end = float(segment.get("end") or start)
+    span = (end - start) / max(len(words), 1)
+
+    bounds = []
+    lo, chars = 0, 0
+    for i, word in enumerate(words):
+        added = len(word) if i == lo else chars + 1 + len(word)
+        if i > lo and max(added / CHARS_PER_TOKEN, (i - lo + 1) * TOKENS_PER_WORD) > max_tokens:
+            bounds.append((lo, i))
+            lo, added = i, len(word)
+        chars = added
+    bounds.append((lo, len(words)))
+
+    return [
+        {
+            **segment,
+            "text": " ".join(words[lo:hi]),
+            "start": start + lo * span,
+            "end": start + hi * span,
+        }
+        for lo, hi in bounds
+    ]
+
+
+def chunk_segments(
+    segments: Sequence[dict],
+    *,
+    max_tokens: int = 2000,
+    overlap_tokens: int = 200,
+) -> List[dict]:
+    if max_tokens <= 0:
+        raise ValueError("max_tokens must be positive")
+    overlap_tokens = max(0, min(overlap_tokens, max_tokens // 2))
+
+    units: List[dict] = []
+    for segment in segments:
+        if estimate_tokens(segment.get("text", "")) > max_tokens:
+            units.extend(_split_segment(segment, max_tokens))
+        else:
+            units.append(segment)
+
+    tokens = [estimate_tokens(u.get("text", "")) for u in units]
+    chunks: List[dict] = []
+    lo = 0
+    while lo < len(units):
+        hi = lo
+        used = 0
+        while hi < len(units) and used + tokens[hi] <= max_tokens:
+            used += tokens[hi]
+            hi += 1
+        hi = max(hi, lo + 1)
+
+        body = units[lo:hi]
+        chunks.append(
+            {
+                "index": len(chunks),
+                "start": body[0].get("start"),
+                "end": body[-1].get("end"),
+                "speakers": sorted({speaker_key(u.get("speaker")) for u in body}),
+                "token_estimate": sum(tokens[lo:hi]),
+                "segments": body,
+            }
+        )
+        if hi >= len(units):
+            break
+
+        # Step back over whole trailing turns that fit the overlap budget, always moving forward. The carried
+        # turns must leave room for the next new one, or the next chunk would repeat them and add nothing.
+        next_lo = hi
+        carried = 0
+        while (
+            next_lo - 1 > lo
+            and carried + tokens[next_lo - 1] <= overlap_tokens
+            and carried + tokens[next_lo - 1] + tokens[hi] <= max_tokens
+        ):
+            next_lo -= 1
+            carried += tokens[next_lo]
+        lo = next_lo
+
+    return chunks
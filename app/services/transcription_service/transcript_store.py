@@ -0,0 +1,42 @@
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+from app.services.search_service.transcript_index import transcript_index
+from app.utils import get_logger
+
+logger = get_logger("transcript-store")
+
+TRANSCRIPTS_DIR = Path("./app/data/transcripts")
+
+
+def transcript_path(meeting_id: str) -> Path:
+    return TRANSCRIPTS_DIR / f"{meeting_id}.json"
+
+
+def save_transcript(meeting_id: str, payload: dict) -> Path:
+    path = transcript_path(meeting_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp = path.with_suffix(".json.part")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+    # The JSON file is the source of truth; a transcript missing from the index is picked up by index_missing at startup.
+    try:
+        transcript_index.index_transcript(meeting_id, payload)
+    except Exception as e:
+        logger.error("Could not index transcript of meeting %s: %s", meeting_id, e)
+    return path
+
+
+def load_transcript(meeting_id: str) -> Optional[dict]:
+    path = transcript_path(meeting_id)
+    if not path.exists():
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
@@ -1,125 +1,196 @@
-import io
-import logging
+import asyncio
 import os
+import shutil
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Iterator, List, Optional, Sequence
 
 import httpx
-from elevenlabs import ElevenLabs
-from pydub import AudioSegment
 
 from app.models.MeetingStatusResponse import MeetingStatus, MeetingState
+from app.services.artifact_service.artifact_service import artifact_store, wav_duration
+from app.services.ledger_service.ledger_store import charge_to
+from app.services.outbox_service.callback_outbox import callback_outbox
+from app.services.recording_service.chunked_recording import (
+    open_recording_stream,
+    recording_stream_size,
+)
+from app.services.storage_service.recording_store import recording_store
+from app.services.transcription_service.speaker_analytics import compute_speaker_stats, speaker_key
+from app.services.transcription_service.stt_client import stt_client_from_env
+from app.services.transcription_service.transcript_store import save_transcript
+from app.services.upload_service.upload_service import upload_stream
+from app.utils import get_logger
 
-logger = logging.getLogger("transcription_service")
+logger = get_logger("transcription_service")
 
+ELEVENLABS_STT_URL = "https://api.elevenlabs.io/v1/speech-to-text"
 
-def compress_audio(
+# "multipart" uploads the recording into the resume webhook; "reference" keeps it here and sends a signed link.
+AUDIO_HANDOFF = os.getenv("AUDIO_HANDOFF", "multipart").lower()
+# Only for receivers that implement the resumable upload protocol; n8n's resume webhook does not.
+UPLOAD_RESUMABLE = os.getenv("UPLOAD_RESUMABLE", "0") == "1"
+
+
+@contextmanager
+def compressed_recording(
     audio_path: Path, *, format: str = "mp3", bitrate: str = "128k"
-) -> Optional[io.BytesIO]:
+) -> Iterator[Optional[Path]]:
+    # Yields a compressed copy on disk (None if ffmpeg fails) and removes it afterwards; nothing is held in memory.
+    audio_path = Path(audio_path)
+    if audio_path.suffix == f".{format}":
+        # Cold-tier recordings are already stored compressed.
+        yield audio_path
+        return
+
+    fd, name = tempfile.mkstemp(prefix=f"{audio_path.stem}-", suffix=f".{format}")
+    target = Path(name)
     try:
-        logger.info(f"Attempting audio compression")
-        audio = AudioSegment.from_wav(str(audio_path))
-        mp3_buffer = io.BytesIO()
-        audio.export(mp3_buffer, format=format, bitrate=bitrate)
-        mp3_buffer.seek(0)
-        logger.info(
-            f"Successfully compressed audio to {format} format (bitrate: {bitrate}"
-        )
-        return mp3_buffer
-    except Exception as e:
-        logger.error(f"Could not compress file {audio_path}, error: {e}")
-        return None
+        try:
+            logger.info(f"Attempting audio compression")
+            with open_recording_stream(audio_path) as stream, os.fdopen(fd, "wb") as out:
+                process = subprocess.Popen(
+                    ["ffmpeg", "-hide_banner", "-loglevel", "error", "-f", "wav", "-i", "pipe:0",
+                     "-f", format, "-b:a", bitrate, "pipe:1"],
+                    stdin=subprocess.PIPE,
+                    stdout=out,
+                    stderr=subprocess.DEVNULL,
+                )
+                try:
+                    shutil.copyfileobj(stream, process.stdin, 1 << 20)
+                except BrokenPipeError:
+                    pass
+                finally:
+                    process.stdin.close()
+                if process.wait() != 0:
+                    raise RuntimeError(f"ffmpeg exited with {process.returncode}")
+            logger.info(
+                f"Successfully compressed audio to {format} format (bitrate: {bitrate})"
+            )
+            compressed = target
+        except Exception as e:
+            logger.error(f"Could not compress file {audio_path}, error: {e}")
+            compressed = None
+        yield compressed
+    finally:
+        target.unlink(missing_ok=True)
 
 
 def send_audio_for_transcription(
-    active_sessions: Dict[str, MeetingState], meeting_id: str, audio_path: str
+    active_sessions: Dict[str, MeetingState],
+    meeting_id: str,
+    audio_path: Optional[str] = None,
+    mode: Optional[str] = None,
 ):
-    audio_path = Path(audio_path)
-
-    if not audio_path.exists():
-        raise FileNotFoundError(f"Recording not found: {audio_path}")
-
     state = active_sessions.get(meeting_id)
     if state is None:
         raise RuntimeError(f"Meeting {meeting_id} does not exist")
 
+    stored = None
+    if not audio_path:
+        # Asked of the store every time: compaction moves an old recording out of its job dir into a cold blob.
+        stored = recording_store.get(state.job_id) if state.job_id else recording_store.latest_for_meeting(meeting_id)
+        audio_path = stored.path if stored is not None else state.audio_path
+    if not audio_path:
+        raise FileNotFoundError(f"No recording registered for meeting {meeting_id}")
+
+    audio_path = Path(audio_path)
+    if not audio_path.exists():
+        raise FileNotFoundError(f"Recording not found: {audio_path}")
+    if stored is not None:
+        recording_store.touch(stored.job_id)
+
     if state.status != MeetingStatus.FINISHED:
         raise RuntimeError(
             f"Meeting {meeting_id} not yet ended (status={state.status})"
         )
 
-    audio_payload = compress_audio(audio_path)
+    with compressed_recording(audio_path) as compressed:
+        if (mode or AUDIO_HANDOFF) == "reference":
+            return send_audio_reference(state, meeting_id, audio_path, compressed)
 
-    if audio_payload:
-        files = {
-            "file": (f"{meeting_id}_record.mp3", audio_payload, "audio/mpeg"),
-        }
-    else:
-        f = open(audio_path, "rb")
-        files = {
-            "file": (audio_path.name, f, "audio/wav"),
-        }
+        # Either way the upload streams from disk, so memory does not grow with the length of the meeting.
+        if compressed is not None:
+            size = compressed.stat().st_size
+            filename = f"{meeting_id}_record.mp3"
+            content_type = "audio/mpeg"
 
-    try:
-        data = {"meeting_id": str(meeting_id)}
-        with httpx.Client(timeout=120) as client:
-            response = client.post(
-                state.resume_url,
-                files=files,
-                data=data,
-            )
-        response.raise_for_status()
-        state.status = MeetingStatus.TRANSCRIBED
-        return response.json()
-    finally:
-        if not audio_payload:
-            files["file"][1].close()
+            def open_stream():
+                return open(compressed, "rb")
+        else:
+            size = recording_stream_size(audio_path)
+            filename = f"{meeting_id}_record.wav"
+            content_type = "audio/wav"
 
+            def open_stream():
+                return open_recording_stream(audio_path)
 
-def generate_transcription(
-    active_sessions: Dict[str, MeetingState], meeting_id: str, audio_path: str
+        response = upload_stream(
+            state.resume_url,
+            open_stream,
+            total=size,
+            filename=filename,
+            content_type=content_type,
+            data={"meeting_id": str(meeting_id)},
+            resumable=UPLOAD_RESUMABLE,
+        )
+    state.ledger.resume_posts += 1
+    state.ledger.resume_payload_bytes += size
+    state.status = MeetingStatus.TRANSCRIBED
+    return response.json()
+
+
+def send_audio_reference(
+    state: MeetingState, meeting_id: str, audio_path: Path, compressed: Optional[Path]
 ):
-    audio_path = Path(audio_path)
-    audio = compress_audio(audio_path)
+    # n8n gets a small JSON reference and downloads the audio (with Range, if it wants) only when a node needs it.
+    duration = wav_duration(audio_path) if audio_path.suffix != ".mp3" else None
+    if compressed is not None:
+        with open(compressed, "rb") as stream:
+            ref = artifact_store.publish(stream, ".mp3", duration=duration)
+    else:
+        with open_recording_stream(audio_path) as stream:
+            ref = artifact_store.publish(stream, ".wav", duration=duration)
+    logger.info(f"Published recording of {meeting_id} as {ref.sha256[:12]} ({ref.size} bytes)")
 
-    client = ElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"))
-    state = active_sessions.get(meeting_id)
+    payload = {"meeting_id": str(meeting_id), "audio": ref.to_payload()}
+    entry_id = callback_outbox.enqueue(
+        meeting_id,
+        state.resume_url,
+        payload,
+        kind="audio",
+        dedupe_key=f"{meeting_id}:audio:{ref.sha256}",
+        ledger=state.ledger,
+    )
+    state.status = MeetingStatus.TRANSCRIBED
+    return {"callback_id": entry_id}
+
+
+@dataclass
+class TranscriptWord:
+    text: str
+    start: float
+    end: float
+    speaker_id: Optional[str]
+    type: str = "word"
 
-    try:
-        logger.info(f"Sending transcription request (meeting_id {meeting_id})")
-        response = client.speech_to_text.convert(
-            file=audio,
-            model_id="scribe_v2",
-            tag_audio_events=False,
-            language_code="pl",
-            diarize=True,
-        )
 
-        formatted_segments = []
-        if response.words:
-            current_speaker = response.words[0].speaker_id
-            current_text = []
-            start_time = response.words[0].start
-            last_word_end = 0.0
-
-            for word in response.words:
-                if word.speaker_id != current_speaker:
-                    formatted_segments.append(
-                        {
-                            "speaker": current_speaker,
-                            "text": " ".join(current_text),
-                            "start": start_time,
-                            "end": last_word_end,
-                        }
-                    )
-                    current_speaker = word.speaker_id
-                    current_text = [word.text]
-                    start_time = word.start
-                else:
-                    current_text.append(word.text)
-
-                last_word_end = word.end
+def group_words_into_segments(words: Sequence) -> List[dict]:
+    formatted_segments = []
+    if not words:
+        return formatted_segments
 
+    current_speaker = words[0].speaker_id
+    current_text = []
+    start_time = words[0].start
+    last_word_end = 0.0
+
+    for word in words:
+        if word.speaker_id != current_speaker:
             formatted_segments.append(
                 {
                     "speaker": current_speaker,
@@ -128,22 +199,180 @@ def generate_transcription(
                     "end": last_word_end,
                 }
             )
+            current_speaker = word.speaker_id
+            current_text = [word.text]
+            start_time = word.start
+        else:
+            current_text.append(word.text)
+
+        last_word_end = word.end
+
+    formatted_segments.append(
+        {
+            "speaker": current_speaker,
+            "text": " ".join(current_text),
+            "start": start_time,
+            "end": last_word_end,
+        }
+    )
+    return formatted_segments
+
+
+async def _read_async(stream, size: int) -> bytes:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, stream.read, size)
+
+
+async def compress_audio_async(
+    audio_path: Path,
+    *,
+    format: str = "mp3",
+    bitrate: str = "128k",
+    chunk_size: int = 1 << 20,
+) -> Optional[bytes]:
+    if Path(audio_path).suffix == f".{format}":
+        return await asyncio.get_running_loop().run_in_executor(
+            None, Path(audio_path).read_bytes
+        )
+
+    # Streams the recording through an ffmpeg subprocess; the event loop only waits on pipes.
+    try:
+        logger.info(f"Attempting async audio compression")
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg",
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-f",
+            "wav",
+            "-i",
+            "pipe:0",
+            "-f",
+            format,
+            "-b:a",
+            bitrate,
+            "pipe:1",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+
+        async def feed():
+            try:
+                with open_recording_stream(audio_path) as stream:
+                    while True:
+                        data = await _read_async(stream, chunk_size)
+                        if not data:
+                            break
+                        process.stdin.write(data)
+                        await process.stdin.drain()
+            finally:
+                process.stdin.close()
+
+        _, (stdout, stderr) = await asyncio.gather(feed(), process.communicate())
+        if process.returncode != 0:
+            raise RuntimeError(stderr.decode(errors="replace").strip())
 
         logger.info(
-            f"Grouped {len(response.words)} words into {len(formatted_segments)} speaker segments"
+            f"Successfully compressed audio to {format} format (bitrate: {bitrate})"
         )
+        return stdout
+    except Exception as e:
+        logger.error(f"Could not compress file {audio_path}, error: {e}")
+        return None
 
-        state.status = MeetingStatus.TRANSCRIBED
 
-        with httpx.Client(timeout=120) as http_client:
-            http_client.post(
+async def request_transcription_async(
+    audio: bytes, filename: str, *, timeout_s: float = 600.0
+) -> dict:
+    api_key = os.getenv("ELEVENLABS_API_KEY")
+    if not api_key:
+        raise RuntimeError("Missing ElevenLabs configuration (ELEVENLABS_API_KEY)")
+
+    async with httpx.AsyncClient(timeout=timeout_s) as client:
+        response = await client.post(
+            ELEVENLABS_STT_URL,
+            headers={"xi-api-key": api_key},
+            files={"file": (filename, audio, "audio/mpeg")},
+            data={
+                "model_id": "scribe_v2",
+                "tag_audio_events": "false",
+                "language_code": "pl",
+                "diarize": "true",
+            },
+        )
+    response.raise_for_status()
+    return response.json()
+
+
+# Deadlines, retries, optional hedging and the circuit breaker for every async STT call.
+stt_client = stt_client_from_env(request_transcription_async)
+
+
+def build_transcript_payload(meeting_id: str, response: dict) -> dict:
+    words = [
+        TranscriptWord(
+            text=w.get("text", ""),
+            start=w.get("start") or 0.0,
+            end=w.get("end") or 0.0,
+            speaker_id=speaker_key(w.get("speaker_id")),
+            type=w.get("type") or "word",
+        )
+        for w in response.get("words") or []
+    ]
+    formatted_segments = group_words_into_segments(words)
+    speaker_stats = compute_speaker_stats(words)
+
+    logger.info(
+        f"Grouped {len(words)} words into {len(formatted_segments)} speaker segments"
+    )
+
+    return {
+        "meeting_id": meeting_id,
+        "full_text": response.get("text", ""),
+        "segments": formatted_segments,
+        "speaker_stats": speaker_stats,
+    }
+
+
+async def generate_transcription_async(
+    active_sessions: Dict[str, MeetingState], meeting_id: str, audio_path: str
+):
+    audio_path = Path(audio_path)
+    state = active_sessions.get(meeting_id)
+
+    try:
+        audio = await compress_audio_async(audio_path)
+        if audio is None:
+            raise RuntimeError(f"Could not compress recording {audio_path}")
+
+        logger.info(f"Sending transcription request (meeting_id {meeting_id})")
+        if audio_path.suffix != ".mp3":
+            state.ledger.audio_sent_to_stt_s += await asyncio.get_running_loop().run_in_executor(
+                None, wav_duration, audio_path
+            ) or 0.0
+        started = time.perf_counter()
+        with charge_to(state.ledger):
+            response = await stt_client.transcribe(audio, f"{meeting_id}_record.mp3")
+        state.ledger.stt_wall_s += time.perf_counter() - started
+
+        payload = build_transcript_payload(meeting_id, response)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, save_transcript, meeting_id, payload)
+        # Stored before it is sent: if n8n is down the dispatcher keeps retrying instead of losing the paid-for transcript.
+        await loop.run_in_executor(
+            None,
+            lambda: callback_outbox.enqueue(
+                meeting_id,
                 state.resume_url,
-                json={
-                    "meeting_id": meeting_id,
-                    "full_text": response.text,
-                    "segments": formatted_segments,
-                },
-            )
+                payload,
+                kind="transcript",
+                # A caption draft still waiting for its webhook is worthless now and must not hold this one back.
+                supersedes=("caption-draft",),
+                ledger=state.ledger,
+            ),
+        )
+        state.status = MeetingStatus.TRANSCRIBED
 
     except Exception as e:
         state.status = MeetingStatus.CRASHED
@@ -0,0 +1,188 @@
+import random
+import time
+import uuid
+from typing import BinaryIO, Callable, Dict, Iterator, Optional
+
+import httpx
+
+from app.utils import get_logger
+
+logger = get_logger("upload-service")
+
+ProgressCallback = Callable[[int, int], None]
+
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class UploadError(RuntimeError):
+    pass
+
+
+class _ProgressReader:
+    # Wraps a stream so httpx pulls it in bounded reads; exposes no seek/fileno,
+    # which makes httpx send it with chunked transfer encoding instead of buffering.
+    def __init__(self, stream: BinaryIO, chunk_size: int, on_read: Callable[[int], None]):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._on_read = on_read
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0 or size > self._chunk_size:
+            size = self._chunk_size
+        data = self._stream.read(size)
+        if data:
+            self._on_read(len(data))
+        return data
+
+
+def _skip(stream: BinaryIO, offset: int, chunk_size: int):
+    if offset <= 0:
+        return
+    try:
+        stream.seek(offset)
+        return
+    except (AttributeError, OSError, ValueError):
+        pass
+
+    remaining = offset
+    while remaining > 0:
+        data = stream.read(min(chunk_size, remaining))
+        if not data:
+            raise UploadError(f"Source ended before resume offset {offset}")
+        remaining -= len(data)
+
+
+def _iter_stream(stream: BinaryIO, chunk_size: int, on_read: Callable[[int], None]) -> Iterator[bytes]:
+    while True:
+        data = stream.read(chunk_size)
+        if not data:
+            break
+        on_read(len(data))
+        yield data
+
+
+def _backoff_delay(attempt: int, base_s: float, max_s: float) -> float:
+    # Full jitter keeps several retrying uploads from synchronizing against a recovering receiver.
+    return random.uniform(0, min(max_s, base_s * (2 ** (attempt - 1))))
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, httpx.TransportError):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS
+    return False
+
+
+def _probe_offset(client: httpx.Client, url: str, upload_id: str) -> Optional[int]:
+    # Only for receivers that implement resuming: they answer HEAD with the offset they have acknowledged.
+    try:
+        response = client.head(url, headers={"Upload-Id": upload_id})
+    except httpx.TransportError:
+        return None
+
+    offset = response.headers.get("Upload-Offset")
+    if response.status_code >= 400 or offset is None:
+        return None
+    try:
+        return int(offset)
+    except ValueError:
+        return None
+
+
+def upload_stream(
+    url: str,
+    open_stream: Callable[[], BinaryIO],
+    *,
+    total: int,
+    filename: str,
+    content_type: str,
+    data: Optional[Dict[str, str]] = None,
+    chunk_size: int = 1 << 20,
+    max_attempts: int = 5,
+    backoff_base_s: float = 1.0,
+    backoff_max_s: float = 30.0,
+    timeout_s: float = 120.0,
+    on_progress: Optional[ProgressCallback] = None,
+    resumable: bool = False,
+) -> httpx.Response:
+    data = data or {}
+    upload_id = uuid.uuid4().hex
+    last_logged = [-1]
+
+    def report(sent: int):
+        if on_progress is not None:
+            on_progress(sent, total)
+        if total:
+            decile = sent * 10 // total
+            if decile != last_logged[0]:
+                last_logged[0] = decile
+                logger.info("Uploading %s: %s/%s bytes (%s%%)", filename, sent, total, decile * 10)
+
+    # The timeout applies per read/write, not to the whole transfer, so large files are not cut off.
+    timeout = httpx.Timeout(timeout_s, connect=min(timeout_s, 30.0))
+
+    with httpx.Client(timeout=timeout) as client:
+        # An n8n Wait-node resume URL knows nothing of the HEAD/Upload-Offset protocol; probing it is opt-in.
+        resumable = resumable and _probe_offset(client, url, upload_id) is not None
+        logger.info(
+            "Starting upload of %s (%s bytes, resumable=%s) -> %s", filename, total, resumable, url
+        )
+
+        attempt = 0
+        while True:
+            attempt += 1
+            offset = 0
+            if resumable and attempt > 1:
+                offset = _probe_offset(client, url, upload_id) or 0
+                logger.info("Resuming upload of %s from byte %s", filename, offset)
+
+            sent = [offset]
+
+            def on_read(n: int):
+                sent[0] += n
+                report(sent[0])
+
+            try:
+                with open_stream() as stream:
+                    if resumable:
+                        _skip(stream, offset, chunk_size)
+                        response = client.post(
+                            url,
+                            content=_iter_stream(stream, chunk_size, on_read),
+                            headers={
+                                "Content-Type": "application/offset+octet-stream",
+                                "Upload-Id": upload_id,
+                                "Upload-Offset": str(offset),
+                                "Upload-Length": str(total),
+                                "Upload-Filename": filename,
+                                **{f"Upload-Field-{k}": str(v) for k, v in data.items()},
+                            },
+                        )
+                    else:
+                        reader = _ProgressReader(stream, chunk_size, on_read)
+                        response = client.post(
+                            url,
+                            files={"file": (filename, reader, content_type)},
+                            data=data,
+                        )
+                response.raise_for_status()
+                logger.info("Upload of %s finished after %s attempt(s)", filename, attempt)
+                return response
+
+            except Exception as e:
+                if not _is_retryable(e) or attempt >= max_attempts:
+                    logger.error("Upload of %s failed (attempt %s/%s): %s", filename, attempt, max_attempts, e)
+                    raise
+
+                delay = _backoff_delay(attempt, backoff_base_s, backoff_max_s)
+                logger.warning(
+                    "Upload of %s failed at byte %s (attempt %s/%s): %s; retrying in %.1fs",
+                    filename,
+                    sent[0],
+                    attempt,
+                    max_attempts,
+                    e,
+                    delay,
+                )
+                time.sleep(delay)
@@ -1,19 +1,38 @@
+import time
+
 from playwright.async_api import Page, Locator
 from typing import Optional, Literal, Any
-import logging
 
 from pydantic import BaseModel, PrivateAttr
 
-logger = logging.getLogger("Playwright")
+from .diagnostics import DiagnosticsRing
+from .logger import get_logger, LogThrottle
+
+logger = get_logger("Playwright")
 
 
 class PlaywrightWrapper(BaseModel):
     _page: Page = PrivateAttr()
+    _diagnostics: Optional[DiagnosticsRing] = PrivateAttr(default=None)
+    # Polling loops retry the same missing element many times a second; report each one at most every 10s.
+    # One throttle per page, so a selector failing in one meeting never hides the same failure in another.
+    _failure_log: LogThrottle = PrivateAttr(default_factory=lambda: LogThrottle(logger, interval_s=10.0))
     default_timeout: int = 3000
 
-    def __init__(self, page: Page, default_timeout, **data: Any):
+    def __init__(self, page: Page, default_timeout, diagnostics: Optional[DiagnosticsRing] = None, **data: Any):
         super().__init__(default_timeout=default_timeout, **data)
         self._page = page
+        self._diagnostics = diagnostics
+
+    def _trace(self, action: str, target: Optional[str], started: float, ok: bool, error: Optional[BaseException] = None):
+        # Runs after every action; pydantic's PrivateAttr lookup costs microseconds, the backing dict does not.
+        diagnostics = self.__pydantic_private__["_diagnostics"]
+        if diagnostics is not None:
+            diagnostics.record(action, target, ok, (time.perf_counter() - started) * 1000, error)
+
+    async def capture_failure(self, label: str):
+        if self._diagnostics is not None:
+            await self._diagnostics.capture_failure(self._page, label)
 
     async def _get_locator(
             self,
@@ -44,7 +63,9 @@ class PlaywrightWrapper(BaseModel):
 
     async def wait(self, timeout: Optional[int] = None):
         timeout = timeout or self.default_timeout
+        started = time.perf_counter()
         await self._page.wait_for_timeout(timeout=timeout)
+        self._trace("wait", str(timeout), started, True)
 
     async def safe_click(
             self,
@@ -59,6 +80,7 @@ class PlaywrightWrapper(BaseModel):
             force: bool = False,
     ) -> bool:
         timeout = timeout or self.default_timeout
+        started = time.perf_counter()
         locator = await self._get_locator(
             text=text,
             selector=selector,
@@ -77,11 +99,15 @@ class PlaywrightWrapper(BaseModel):
 
             identifier = text or selector or role or placeholder or label
             logger.info(f"[AGENT]: Clicked element: {identifier}")
+            self._trace("click", identifier, started, True)
             return True
 
         except Exception as e:
             identifier = text or selector or role or placeholder or label
-            logger.warning(f"[ERROR]: Element [{identifier}] not found or not clickable: {e}")
+            self._failure_log.warning(
+                f"[ERROR]: Element [{identifier}] not found or not clickable: {e}", key=f"click:{identifier}"
+            )
+            self._trace("click", identifier, started, False, e)
             return False
 
     async def safe_fill(
@@ -97,6 +123,7 @@ class PlaywrightWrapper(BaseModel):
             clear_first: bool = True
     ) -> bool:
         timeout = timeout or self.default_timeout
+        started = time.perf_counter()
         locator = await self._get_locator(text=text,selector= selector,role= role,placeholder= placeholder,label=label, exact= exact,)
 
         if not locator:
@@ -112,11 +139,15 @@ class PlaywrightWrapper(BaseModel):
 
             identifier = text or selector or role or placeholder
             logger.info(f"[AGENT]: Filled element [{identifier}] with value: {value}")
+            self._trace("fill", identifier, started, True)
             return True
 
         except Exception as e:
             identifier = text or selector or role or placeholder
-            logger.warning(f"[ERROR]: Element [{identifier}] not found or not fillable: {e}")
+            self._failure_log.warning(
+                f"[ERROR]: Element [{identifier}] not found or not fillable: {e}", key=f"fill:{identifier}"
+            )
+            self._trace("fill", identifier, started, False, e)
             return False
 
     async def safe_select(
@@ -127,6 +158,7 @@ class PlaywrightWrapper(BaseModel):
             timeout: Optional[int] = None
     ) -> bool:
         timeout = timeout or self.default_timeout
+        started = time.perf_counter()
         locator = await self._get_locator(text, selector)
 
         if not locator:
@@ -138,11 +170,15 @@ class PlaywrightWrapper(BaseModel):
 
             identifier = text or selector
             logger.info(f"[AGENT]: Selected option [{value}] in element: {identifier}")
+            self._trace("select", identifier, started, True)
             return True
 
         except Exception as e:
             identifier = text or selector
-            logger.warning(f"[ERROR]: Failed to select option in [{identifier}]: {e}")
+            self._failure_log.warning(
+                f"[ERROR]: Failed to select option in [{identifier}]: {e}", key=f"select:{identifier}"
+            )
+            self._trace("select", identifier, started, False, e)
             return False
 
     async def safe_check(
@@ -154,6 +190,7 @@ class PlaywrightWrapper(BaseModel):
             checked: bool = True
     ) -> bool:
         timeout = timeout or self.default_timeout
+        started = time.perf_counter()
         locator = await self._get_locator(text, selector, role)
 
         if not locator:
@@ -170,11 +207,15 @@ class PlaywrightWrapper(BaseModel):
             identifier = text or selector or role
             action = "Checked" if checked else "Unchecked"
             logger.info(f"[AGENT]: {action} element: {identifier}")
+            self._trace("check", identifier, started, True)
             return True
 
         except Exception as e:
             identifier = text or selector or role
-            logger.warning(f"[ERROR]: Failed to check/uncheck [{identifier}]: {e}")
+            self._failure_log.warning(
+                f"[ERROR]: Failed to check/uncheck [{identifier}]: {e}", key=f"check:{identifier}"
+            )
+            self._trace("check", identifier, started, False, e)
             return False
 
     async def safe_wait_for(
@@ -186,6 +227,7 @@ class PlaywrightWrapper(BaseModel):
             timeout: Optional[int] = None
     ) -> bool:
         timeout = timeout or self.default_timeout
+        started = time.perf_counter()
         locator = await self._get_locator(text, selector, role)
 
         if not locator:
@@ -196,11 +238,15 @@ class PlaywrightWrapper(BaseModel):
 
             identifier = text or selector or role
             logger.info(f"[AGENT]: Element [{identifier}] reached state: {state}")
+            self._trace("wait_for", identifier, started, True)
             return True
 
         except Exception as e:
             identifier = text or selector or role
-            logger.warning(f"[ERROR]: Element [{identifier}] did not reach state [{state}]: {e}")
+            self._failure_log.warning(
+                f"[ERROR]: Element [{identifier}] did not reach state [{state}]: {e}", key=f"wait:{identifier}"
+            )
+            self._trace("wait_for", identifier, started, False, e)
             return False
 
     async def safe_get_text(
@@ -211,6 +257,7 @@ class PlaywrightWrapper(BaseModel):
             timeout: Optional[int] = None
     ) -> Optional[str]:
         timeout = timeout or self.default_timeout
+        started = time.perf_counter()
         locator = await self._get_locator(text, selector, role)
 
         if not locator:
@@ -222,11 +269,15 @@ class PlaywrightWrapper(BaseModel):
 
             identifier = text or selector or role
             logger.info(f"[AGENT]: Got text from element [{identifier}]: {content}")
+            self._trace("get_text", identifier, started, True)
             return content
 
         except Exception as e:
             identifier = text or selector or role
-            logger.warning(f"[ERROR]: Failed to get text from [{identifier}]: {e}")
+            self._failure_log.warning(
+                f"[ERROR]: Failed to get text from [{identifier}]: {e}", key=f"text:{identifier}"
+            )
+            self._trace("get_text", identifier, started, False, e)
             return None
 
     @property
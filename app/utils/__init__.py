@@ -1,4 +1,16 @@
-from .logger import get_logger
-from .PlaywrightWrapper import PlaywrightWrapper
+from .logger import get_logger, meeting_context, LogThrottle
+from .lifecycle import ResourceScope, close_open_scopes
+from .loop_monitor import LoopLagMonitor, loop_monitor
 
-__all__ = ["get_logger", "PlaywrightWrapper"]
\ No newline at end of file
+__all__ = ["get_logger", "meeting_context", "LogThrottle", "PlaywrightWrapper", "LoopLagMonitor", "loop_monitor",
+           "ResourceScope", "close_open_scopes"]
+
+
+def __getattr__(name: str):
+    # PlaywrightWrapper imports Playwright; only the browser side of the app needs it.
+    if name == "PlaywrightWrapper":
+        from .PlaywrightWrapper import PlaywrightWrapper
+
+        globals()[name] = PlaywrightWrapper
+        return PlaywrightWrapper
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,101 @@
+import json
+import time
+import uuid
+import zipfile
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Optional, Tuple
+
+from .logger import get_logger
+
+logger = get_logger("diagnostics")
+
+DIAGNOSTICS_DIR = Path("./app/logs/diagnostics")
+
+# (wall time, action, target, ok, duration ms, error)
+TraceEntry = Tuple[float, str, Optional[str], bool, float, Optional[str]]
+
+
+class DiagnosticsRing:
+    def __init__(
+        self,
+        meeting_id: str,
+        *,
+        max_actions: int = 256,
+        max_snapshots: int = 3,
+        max_dom_bytes: int = 512 * 1024,
+    ):
+        self.meeting_id = meeting_id
+        self.started_at = time.time()
+        self.max_dom_bytes = max_dom_bytes
+        self.actions: Deque[TraceEntry] = deque(maxlen=max_actions)
+        self.snapshots: Deque[dict] = deque(maxlen=max_snapshots)
+
+    def record(
+        self,
+        action: str,
+        target: Optional[str],
+        ok: bool,
+        duration_ms: float,
+        error: Optional[BaseException] = None,
+    ):
+        # Hot path: a tuple append into a bounded deque, nothing is formatted until a flush.
+        self.actions.append(
+            (time.time(), action, target, ok, duration_ms, None if error is None else repr(error))
+        )
+
+    async def capture_failure(self, page: Any, label: str):
+        # Only taken when a step fails; the images stay in memory until the meeting's outcome is known.
+        snapshot = {"label": label, "at": time.time(), "url": None, "png": None, "dom": None}
+        try:
+            snapshot["url"] = page.url
+            snapshot["png"] = await page.screenshot(timeout=5000)
+            snapshot["dom"] = (await page.content())[: self.max_dom_bytes]
+        except Exception as e:
+            snapshot["error"] = repr(e)
+        self.snapshots.append(snapshot)
+
+    def flush(self, directory: Path = DIAGNOSTICS_DIR) -> Path:
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+        target = directory / f"{self.meeting_id}-{stamp}-{uuid.uuid4().hex[:8]}.zip"
+
+        trace = [
+            {
+                "at": at,
+                "action": action,
+                "target": target_name,
+                "ok": ok,
+                "duration_ms": round(duration_ms, 2),
+                "error": error,
+            }
+            for at, action, target_name, ok, duration_ms, error in self.actions
+        ]
+        meta = {
+            "meeting_id": self.meeting_id,
+            "started_at": self.started_at,
+            "flushed_at": time.time(),
+            "snapshots": [
+                {k: v for k, v in s.items() if k not in ("png", "dom")} for s in self.snapshots
+            ],
+        }
+
+        tmp = target.with_suffix(".zip.part")
+        with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("meta.json", json.dumps(meta, indent=2))
+            archive.writestr("trace.jsonl", "\n".join(json.dumps(t) for t in trace))
+            for i, snapshot in enumerate(self.snapshots):
+                if snapshot.get("png"):
+                    archive.writestr(f"snapshot_{i}_{snapshot['label']}.png", snapshot["png"])
+                if snapshot.get("dom"):
+                    archive.writestr(f"snapshot_{i}_{snapshot['label']}.html", snapshot["dom"])
+        tmp.replace(target)
+
+        logger.info("Wrote diagnostics for meeting %s to %s", self.meeting_id, target)
+        self.discard()
+        return target
+
+    def discard(self):
+        self.actions.clear()
+        self.snapshots.clear()
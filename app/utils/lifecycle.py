@@ -0,0 +1,91 @@
+import asyncio
+import inspect
+from collections import OrderedDict
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Set
+
+from .logger import get_logger
+
+logger = get_logger("lifecycle")
+
+_open_scopes: Set["ResourceScope"] = set()
+
+
+@dataclass
+class _Resource:
+    release: Callable[[], Any]
+    timeout_s: float
+
+
+class ResourceScope:
+    def __init__(
+        self,
+        name: str,
+        *,
+        executor: Optional[Executor] = None,
+        default_timeout_s: float = 10.0,
+    ):
+        self.name = name
+        self.executor = executor
+        self.default_timeout_s = default_timeout_s
+        self._resources: "OrderedDict[str, _Resource]" = OrderedDict()
+        _open_scopes.add(self)
+
+    def add(self, name: str, release: Callable[[], Any], *, timeout_s: Optional[float] = None):
+        if name in self._resources:
+            raise ValueError(f"Resource {name!r} is already tracked by {self.name}")
+        self._resources[name] = _Resource(release, timeout_s or self.default_timeout_s)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._resources
+
+    def pending(self):
+        return list(self._resources)
+
+    async def release(self, name: str) -> Any:
+        resource = self._resources.pop(name, None)
+        if resource is None:
+            return None
+
+        # Async releases are awaited; blocking ones (recorder join, file cleanup) go to the executor.
+        if inspect.iscoroutinefunction(resource.release):
+            call = resource.release()
+        else:
+            call = asyncio.get_running_loop().run_in_executor(self.executor, resource.release)
+
+        try:
+            return await asyncio.wait_for(call, timeout=resource.timeout_s)
+        except asyncio.TimeoutError:
+            logger.error(
+                "Releasing %s/%s took longer than %.1fs; abandoning it", self.name, name, resource.timeout_s
+            )
+            raise
+
+    async def aclose(self):
+        # Reverse acquisition order: a page goes before its browser, the browser before its driver.
+        for name in reversed(list(self._resources)):
+            try:
+                await self.release(name)
+            except asyncio.TimeoutError:
+                pass
+            except Exception as e:
+                logger.error("Failed to release %s/%s: %s", self.name, name, e)
+        _open_scopes.discard(self)
+
+    async def __aenter__(self) -> "ResourceScope":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+
+async def close_open_scopes(timeout_s: float = 30.0):
+    scopes = list(_open_scopes)
+    if not scopes:
+        return
+    logger.info("Releasing resources of %d open scope(s)", len(scopes))
+    try:
+        await asyncio.wait_for(asyncio.gather(*(s.aclose() for s in scopes)), timeout=timeout_s)
+    except asyncio.TimeoutError:
+        logger.error("Shutdown left resources of %s unreleased", [s.name for s in _open_scopes])
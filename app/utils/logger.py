@@ -1,7 +1,123 @@
+import atexit
+import json
 import logging
+import os
+import queue
 import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+meeting_id_var: ContextVar[Optional[str]] = ContextVar("meeting_id", default=None)
+
+_listeners: Dict[str, Tuple["queue.SimpleQueue", QueueListener]] = {}
+_listeners_lock = threading.Lock()
+
+
+class MeetingContextFilter(logging.Filter):
+    # Runs on the calling thread, where the meeting context variable is visible.
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "meeting_id"):
+            record.meeting_id = meeting_id_var.get()
+        return True
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__(
+            '%(asctime)s - [%(name)s] - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        meeting_id = getattr(record, "meeting_id", None)
+        if meeting_id:
+            return f"{line} (meeting_id={meeting_id})"
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        meeting_id = getattr(record, "meeting_id", None)
+        if meeting_id:
+            entry["meeting_id"] = meeting_id
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class ContextQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue never leaves the process, so the record is shipped as-is and all
+        # message formatting happens on the listener thread instead of the caller.
+        return record
+
+
+def _build_formatter() -> logging.Formatter:
+    if os.getenv("LOG_FORMAT", "text").lower() == "json":
+        return JsonFormatter()
+    return TextFormatter()
+
+
+class LazyFileHandler(logging.FileHandler):
+    # Neither the log directory nor the file is touched until the first record is written.
+    def __init__(self, filename):
+        super().__init__(filename, delay=True)
+
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
+def _default_log_file() -> Path:
+    return Path("app/logs") / f"app_{datetime.now().strftime('%Y%m%d')}.log"
+
+
+def _get_listener_queue(log_file: Optional[str]) -> "queue.SimpleQueue":
+    key = str(log_file or "")
+    with _listeners_lock:
+        if key in _listeners:
+            return _listeners[key][0]
+
+        formatter = _build_formatter()
+
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setLevel(logging.INFO)
+        console_handler.setFormatter(formatter)
+
+        file_handler = LazyFileHandler(log_file or _default_log_file())
+        file_handler.setLevel(logging.DEBUG)
+        file_handler.setFormatter(formatter)
+
+        log_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        listener = QueueListener(
+            log_queue, console_handler, file_handler, respect_handler_level=True
+        )
+        listener.start()
+        _listeners[key] = (log_queue, listener)
+        return log_queue
+
+
+def stop_log_listeners():
+    with _listeners_lock:
+        for _, listener in _listeners.values():
+            listener.stop()
+        _listeners.clear()
+
+
+atexit.register(stop_log_listeners)
 
 
 def setup_logger(name: str = "n8n_meeting_bot", log_file: str = None) -> logging.Logger:
@@ -11,25 +127,9 @@ def setup_logger(name: str = "n8n_meeting_bot", log_file: str = None) -> logging
     if logger.handlers:
         logger.handlers.clear()
 
-    formatter = logging.Formatter(
-        '%(asctime)s - [%(name)s] - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-
-    if log_file is None:
-        log_dir = Path("app/logs")
-        log_dir.mkdir(exist_ok=True)
-        log_file = log_dir / f"app_{datetime.now().strftime('%Y%m%d')}.log"
-
-    file_handler = logging.FileHandler(log_file)
-    file_handler.setLevel(logging.DEBUG)
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    handler = ContextQueueHandler(_get_listener_queue(log_file))
+    handler.addFilter(MeetingContextFilter())
+    logger.addHandler(handler)
     logger.propagate = False
     return logger
 
@@ -40,3 +140,47 @@ def get_logger(name: str = "n8n_meeting_bot") -> logging.Logger:
     if not logger.handlers:
         return setup_logger(name)
     return logger
+
+
+@contextmanager
+def meeting_context(meeting_id: Optional[str]):
+    token = meeting_id_var.set(meeting_id)
+    try:
+        yield
+    finally:
+        meeting_id_var.reset(token)
+
+
+class LogThrottle:
+    # For hot paths: emits at most one record per key per interval and reports how many were dropped.
+    def __init__(self, logger: logging.Logger, interval_s: float = 1.0):
+        self.logger = logger
+        self.interval_s = interval_s
+        self._last: Dict[str, float] = {}
+        self._suppressed: Dict[str, int] = {}
+
+    def log(self, level: int, msg: str, *args, key: Optional[str] = None, **kwargs) -> bool:
+        if not self.logger.isEnabledFor(level):
+            return False
+
+        key = key or msg
+        now = time.monotonic()
+        if now - self._last.get(key, float("-inf")) < self.interval_s:
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+            return False
+
+        self._last[key] = now
+        suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            msg = f"{msg} [{suppressed} similar messages suppressed]"
+        self.logger.log(level, msg, *args, **kwargs)
+        return True
+
+    def debug(self, msg: str, *args, **kwargs) -> bool:
+        return self.log(logging.DEBUG, msg, *args, **kwargs)
+
+    def info(self, msg: str, *args, **kwargs) -> bool:
+        return self.log(logging.INFO, msg, *args, **kwargs)
+
+    def warning(self, msg: str, *args, **kwargs) -> bool:
+        return self.log(logging.WARNING, msg, *args, **kwargs)
@@ -0,0 +1,116 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Deque, Optional
+
+from .logger import get_logger
+
+logger = get_logger("loop-monitor")
+
+
+@dataclass
+class LoopStall:
+    started_at: float
+    duration_s: float
+    stack: str
+
+
+class LoopLagMonitor:
+    def __init__(
+        self,
+        *,
+        interval_s: float = 0.05,
+        threshold_s: float = 0.1,
+        max_stalls: int = 100,
+    ):
+        self.interval_s = interval_s
+        self.threshold_s = threshold_s
+        self.stalls: Deque[LoopStall] = deque(maxlen=max_stalls)
+
+        self.max_lag_s = 0.0
+        self.stalls_total = 0
+        self.stall_seconds_total = 0.0
+
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = 0.0
+        self._stall_stack: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-stall-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _heartbeat(self):
+        while True:
+            before = time.monotonic()
+            self._last_beat = before
+            await asyncio.sleep(self.interval_s)
+            now = time.monotonic()
+            self._last_beat = now
+
+            lag = now - before - self.interval_s
+            if lag > self.max_lag_s:
+                self.max_lag_s = lag
+
+            if lag >= self.threshold_s:
+                self._record_stall(lag)
+
+    def _record_stall(self, lag: float):
+        stack = self._stall_stack or "<stack not captured: stall ended before the watchdog sampled it>"
+        self._stall_stack = None
+        stall = LoopStall(started_at=time.time() - lag, duration_s=lag, stack=stack)
+        self.stalls.append(stall)
+        self.stalls_total += 1
+        self.stall_seconds_total += lag
+        logger.warning("Event loop stalled for %.3fs; blocking stack:\n%s", lag, stack)
+
+    def _watch(self):
+        # The loop cannot report on itself while blocked, so a side thread samples its stack.
+        poll_s = max(self.threshold_s / 2, 0.01)
+        while not self._stopped.wait(poll_s):
+            overdue = time.monotonic() - self._last_beat - self.interval_s
+            if overdue < self.threshold_s or self._stall_stack is not None:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                self._stall_stack = "".join(traceback.format_stack(frame))
+
+    def metrics(self) -> dict:
+        return {
+            "threshold_s": self.threshold_s,
+            "max_lag_s": self.max_lag_s,
+            "stalls_total": self.stalls_total,
+            "stall_seconds_total": self.stall_seconds_total,
+            "recent_stalls": [asdict(s) for s in self.stalls],
+        }
+
+
+loop_monitor = LoopLagMonitor(
+    threshold_s=float(os.getenv("LOOP_STALL_THRESHOLD_S", "0.1"))
+)
@@ -0,0 +1,426 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from app.models.JiraTaskRequest import JiraTaskRequest
+from app.services.artifact_service.artifact_service import wav_duration
+from app.services.recording_service.chunked_recording import is_chunked_recording, open_recording_stream
+from app.services.storage_service.recording_store import RecordingStore, recording_store
+from app.services.transcription_service.stt_client import CircuitBreaker, STTClient
+from app.services.transcription_service.transcription_service import (
+    build_transcript_payload,
+    compress_audio_async,
+    stt_client,
+)
+from app.services.transcription_service.transcript_store import save_transcript
+from app.utils import get_logger
+
+logger = get_logger("backfill")
+
+BACKFILL_DIR = Path("./app/data/backfill")
+STAGES = ["compress", "transcribe", "deliver", "jira"]
+
+TRANSCRIBED = "transcribed"
+DELIVERED = "delivered"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class BackfillJob:
+    meeting_id: str
+    path: Path
+    job_id: Optional[str] = None
+    duration_s: Optional[float] = None
+    audio: Optional[bytes] = None
+    payload: Optional[dict] = None
+
+
+@dataclass
+class StageStats:
+    workers: int
+    count: int = 0
+    failures: int = 0
+    busy_s: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+
+    def summary(self, wall_s: float) -> dict:
+        ordered = sorted(self.latencies)
+        return {
+            "workers": self.workers,
+            "count": self.count,
+            "failures": self.failures,
+            "busy_s": round(self.busy_s, 3),
+            "avg_s": round(sum(ordered) / len(ordered), 3) if ordered else None,
+            "p95_s": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3) if ordered else None,
+            "per_min": round(self.count / wall_s * 60, 2) if wall_s > 0 else None,
+            # Busy time over the time its workers were available; the stage closest to 1.0 is the bottleneck.
+            "utilization": round(self.busy_s / (wall_s * self.workers), 3) if wall_s > 0 else None,
+        }
+
+
+def discover_recordings(
+    store: RecordingStore, *, since: Optional[float] = None, meeting_ids: Optional[List[str]] = None
+) -> List[BackfillJob]:
+    latest: Dict[str, tuple] = {}
+    for stored in store.list_recordings(since=since, meeting_ids=meeting_ids):
+        latest[stored.meeting_id] = (stored.created_at, Path(stored.path), stored.job_id)
+
+    # Recordings made before the store existed sit directly under the root, named after their meeting.
+    if store.root.is_dir():
+        for entry in store.root.iterdir():
+            if entry.name in ("jobs", "blobs") or entry.name.startswith("."):
+                continue
+            if not (entry.suffix in (".wav", ".mp3") and entry.is_file()) and not is_chunked_recording(entry):
+                continue
+            meeting_id = entry.stem if entry.is_file() else entry.name
+            created_at = entry.stat().st_mtime
+            if (meeting_ids and meeting_id not in meeting_ids) or (since and created_at < since):
+                continue
+            if meeting_id not in latest or latest[meeting_id][0] < created_at:
+                latest[meeting_id] = (created_at, entry, None)
+
+    return [
+        BackfillJob(meeting_id=meeting_id, path=path, job_id=job_id)
+        for meeting_id, (_, path, job_id) in sorted(latest.items(), key=lambda item: item[1][0])
+        if path.exists()
+    ]
+
+
+class Checkpoint:
+    def __init__(self, path: Path):
+        self.path = path
+        self.state: Dict[str, dict] = {}
+        if path.exists():
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A run killed mid-write leaves at most one torn line at the end.
+                        continue
+                    self.state[record["meeting_id"]] = record
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def stage(self, meeting_id: str) -> Optional[str]:
+        record = self.state.get(meeting_id)
+        return record["stage"] if record else None
+
+    def payload_path(self, meeting_id: str) -> Path:
+        return self.path.with_suffix("") / f"{meeting_id}.json"
+
+    def save_payload(self, meeting_id: str, payload: dict):
+        path = self.payload_path(meeting_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".json.part")
+        tmp.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def load_payload(self, meeting_id: str) -> dict:
+        return json.loads(self.payload_path(meeting_id).read_text(encoding="utf-8"))
+
+    def record(self, meeting_id: str, stage: str, **extra):
+        record = {"meeting_id": meeting_id, "stage": stage, "at": time.time(), **extra}
+        self.state[meeting_id] = record
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+async def read_recording(path: Path) -> bytes:
+    def read():
+        with open_recording_stream(path) as stream:
+            return stream.read()
+
+    return await asyncio.get_running_loop().run_in_executor(None, read)
+
+
+def mock_stt_client(latency_s: float, failure_rate: float) -> STTClient:
+    async def send(audio: bytes, filename: str) -> dict:
+        await asyncio.sleep(latency_s * random.uniform(0.5, 1.5))
+        if random.random() < failure_rate:
+            raise httpx.ConnectError("mock STT outage")
+        seed = hashlib.sha256(audio[:65536]).digest()
+        words = []
+        for i in range(max(1, len(audio) // 32000)):
+            start = i * 0.5
+            words.append({
+                "text": f"w{seed[i % len(seed)]}",
+                "start": start,
+                "end": start + 0.4,
+                "speaker_id": f"speaker_{(i // 20) % 2}",
+                "type": "word",
+            })
+        return {"text": " ".join(w["text"] for w in words), "words": words}
+
+    return STTClient(
+        send,
+        attempt_timeout_s=30.0,
+        max_attempts=4,
+        backoff_base_s=0.05,
+        backoff_max_s=0.5,
+        breaker=CircuitBreaker(reset_timeout_s=1.0),
+    )
+
+
+class BackfillRunner:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.checkpoint = Checkpoint(BACKFILL_DIR / f"{args.run}.jsonl")
+        # Opening the store has no side effects, so the live server's in-progress recordings are left alone.
+        self.store = recording_store if Path(args.root) == recording_store.root else RecordingStore(args.root)
+        self.stats = {
+            "compress": StageStats(args.compress_workers),
+            "transcribe": StageStats(args.transcribe_workers),
+            "deliver": StageStats(args.deliver_workers),
+            "jira": StageStats(args.jira_workers),
+        }
+        self.queues = {stage: asyncio.Queue(maxsize=args.queue_size) for stage in STAGES}
+        self.stt = mock_stt_client(args.mock_latency_ms / 1000, args.mock_failure_rate) if args.mock else stt_client
+        self.out_dir = BACKFILL_DIR / f"{args.run}-out"
+        self.audio_s = 0.0
+        self.skipped = 0
+
+    async def _timed(self, stage: str, job: BackfillJob, step: Callable[[BackfillJob], Awaitable[Optional[str]]]):
+        stats = self.stats[stage]
+        started = time.perf_counter()
+        try:
+            next_stage = await step(job)
+        except Exception as e:
+            stats.failures += 1
+            logger.error("Backfill of %s failed at %s: %r", job.meeting_id, stage, e)
+            # The last completed stage survives repeated failures, so a resume does not redo paid-for work.
+            previous = self.checkpoint.state.get(job.meeting_id) or {}
+            last_stage = previous.get("last_stage") if previous.get("stage") == FAILED else previous.get("stage")
+            self.checkpoint.record(
+                job.meeting_id,
+                FAILED,
+                failed_stage=stage,
+                last_stage=last_stage,
+                duration_s=job.duration_s if job.duration_s is not None else previous.get("duration_s"),
+                error=repr(e),
+            )
+            return
+        finally:
+            elapsed = time.perf_counter() - started
+            stats.busy_s += elapsed
+        stats.count += 1
+        stats.latencies.append(elapsed)
+        if next_stage is not None:
+            await self.queues[next_stage].put(job)
+
+    async def _worker(self, stage: str, step):
+        queue = self.queues[stage]
+        while True:
+            job = await queue.get()
+            try:
+                await self._timed(stage, job, step)
+            finally:
+                queue.task_done()
+
+    async def compress(self, job: BackfillJob) -> str:
+        loop = asyncio.get_running_loop()
+        if job.job_id is not None:
+            # The server's maintenance may have moved the recording to the cold tier since it was discovered.
+            stored = await loop.run_in_executor(None, self.store.get, job.job_id)
+            if stored is None:
+                raise FileNotFoundError(f"Recording {job.job_id} was evicted")
+            if stored.active:
+                raise RuntimeError(f"Recording {job.job_id} is still being written")
+            job.path = Path(stored.path)
+            await loop.run_in_executor(None, self.store.touch, job.job_id)
+        if job.path.suffix != ".mp3":
+            job.duration_s = await loop.run_in_executor(None, wav_duration, job.path)
+        # Mock runs stay off ffmpeg too, so they work on any machine; the provider gets the raw WAV bytes.
+        job.audio = await read_recording(job.path) if self.args.mock else await compress_audio_async(job.path)
+        if not job.audio:
+            raise RuntimeError(f"Could not compress recording {job.path}")
+        return "transcribe"
+
+    async def transcribe(self, job: BackfillJob) -> str:
+        response = await self.stt.transcribe(job.audio, f"{job.meeting_id}_record.mp3")
+        job.audio = None
+        job.payload = build_transcript_payload(job.meeting_id, response)
+        self.audio_s += job.duration_s or 0.0
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.checkpoint.save_payload, job.meeting_id, job.payload
+        )
+        self.checkpoint.record(job.meeting_id, TRANSCRIBED, duration_s=job.duration_s)
+        return "deliver"
+
+    async def deliver(self, job: BackfillJob) -> Optional[str]:
+        loop = asyncio.get_running_loop()
+        if job.payload is None:
+            job.payload = await loop.run_in_executor(None, self.checkpoint.load_payload, job.meeting_id)
+        if self.args.mock:
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            target = self.out_dir / f"{job.meeting_id}.json"
+            await loop.run_in_executor(None, target.write_text, json.dumps(job.payload, ensure_ascii=False), "utf-8")
+        else:
+            await loop.run_in_executor(None, save_transcript, job.meeting_id, job.payload)
+            if self.args.deliver_url:
+                async with httpx.AsyncClient(timeout=120) as http_client:
+                    response = await http_client.post(self.args.deliver_url, json=job.payload)
+                response.raise_for_status()
+        job.payload = None
+        if self._jira_request_path(job.meeting_id) is not None:
+            self.checkpoint.record(job.meeting_id, DELIVERED)
+            return "jira"
+        self.checkpoint.record(job.meeting_id, DONE)
+        return None
+
+    def _jira_request_path(self, meeting_id: str) -> Optional[Path]:
+        if not self.args.jira_dir:
+            return None
+        path = Path(self.args.jira_dir) / f"{meeting_id}.json"
+        return path if path.exists() else None
+
+    async def jira(self, job: BackfillJob) -> None:
+        request = JiraTaskRequest.model_validate_json(self._jira_request_path(job.meeting_id).read_text(encoding="utf-8"))
+        if self.args.mock:
+            await asyncio.sleep(0.001 * (len(request.features) + len(request.bugs)))
+        else:
+            from app.services.jira_service import _create_issues
+
+            await _create_issues(request)
+        self.checkpoint.record(job.meeting_id, DONE)
+        return None
+
+    def _entry_stage(self, job: BackfillJob) -> Optional[str]:
+        stage = self.checkpoint.stage(job.meeting_id)
+        if stage == DONE:
+            return None
+        if stage == FAILED:
+            record = self.checkpoint.state[job.meeting_id]
+            if record.get("failed_stage") in ("deliver", "jira") and self.checkpoint.payload_path(job.meeting_id).exists():
+                # The transcript is already on disk; only the step that failed is retried.
+                stage = TRANSCRIBED if record["failed_stage"] == "deliver" else DELIVERED
+        if stage == TRANSCRIBED and self.checkpoint.payload_path(job.meeting_id).exists():
+            job.duration_s = self.checkpoint.state[job.meeting_id].get("duration_s")
+            return "deliver"
+        if stage == DELIVERED:
+            return "jira" if self._jira_request_path(job.meeting_id) else None
+        return "compress"
+
+    async def run(self) -> dict:
+        args = self.args
+        since = time.time() - args.since_days * 86400 if args.since_days else None
+        jobs = discover_recordings(self.store, since=since, meeting_ids=args.meeting or None)
+        if args.limit:
+            jobs = jobs[: args.limit]
+        logger.info("Backfill run %s: %d recordings discovered", args.run, len(jobs))
+
+        steps = {"compress": self.compress, "transcribe": self.transcribe, "deliver": self.deliver, "jira": self.jira}
+        workers = [
+            asyncio.create_task(self._worker(stage, steps[stage]))
+            for stage in STAGES
+            for _ in range(self.stats[stage].workers)
+        ]
+        started = time.perf_counter()
+        try:
+            for job in jobs:
+                entry = self._entry_stage(job)
+                if entry is None:
+                    self.skipped += 1
+                    continue
+                await self.queues[entry].put(job)
+            # Every stage queues its output before marking its input done, so joining in order drains the pipeline.
+            for stage in STAGES:
+                await self.queues[stage].join()
+        finally:
+            wall_s = time.perf_counter() - started
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self.checkpoint.close()
+        return self.report(len(jobs), wall_s)
+
+    def report(self, discovered: int, wall_s: float) -> dict:
+        failed = sorted(m for m, r in self.checkpoint.state.items() if r["stage"] == FAILED)
+        return {
+            "run": self.args.run,
+            "mock": self.args.mock,
+            "discovered": discovered,
+            "skipped_done": self.skipped,
+            "done": sum(1 for r in self.checkpoint.state.values() if r["stage"] == DONE),
+            "failed": failed,
+            "wall_s": round(wall_s, 3),
+            "audio_h": round(self.audio_s / 3600, 3),
+            "audio_h_per_wall_h": round(self.audio_s / wall_s, 1) if wall_s > 0 else None,
+            "stages": {stage: self.stats[stage].summary(wall_s) for stage in STAGES},
+        }
+
+
+def print_report(report: dict):
+    print(f"Backfill run {report['run']}{' (mock)' if report['mock'] else ''}")
+    print(
+        f"  discovered={report['discovered']} already_done={report['skipped_done']} done={report['done']}"
+        f" failed={len(report['failed'])} wall={report['wall_s']:.1f}s"
+        f" audio={report['audio_h']:.2f}h ({report['audio_h_per_wall_h']}x realtime)"
+    )
+    print(f"  {'stage':<11}{'workers':>8}{'count':>7}{'fail':>6}{'avg s':>9}{'p95 s':>9}{'/min':>9}{'util':>7}")
+    for stage, s in report["stages"].items():
+        print(
+            f"  {stage:<11}{s['workers']:>8}{s['count']:>7}{s['failures']:>6}"
+            f"{s['avg_s'] if s['avg_s'] is not None else '-':>9}{s['p95_s'] if s['p95_s'] is not None else '-':>9}"
+            f"{s['per_min'] if s['per_min'] is not None else '-':>9}{s['utilization'] if s['utilization'] is not None else '-':>7}"
+        )
+    for meeting_id in report["failed"]:
+        print(f"  failed: {meeting_id}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.workers.backfill",
+        description="Reprocess stored recordings: compress, transcribe, deliver and optionally create Jira issues.",
+    )
+    parser.add_argument("--run", default=None, help="run id; reuse it to resume an interrupted run")
+    parser.add_argument("--root", default=str(recording_store.root))
+    parser.add_argument("--meeting", action="append", help="only this meeting (repeatable)")
+    parser.add_argument("--since-days", type=float, default=None)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--compress-workers", type=int, default=2)
+    parser.add_argument("--transcribe-workers", type=int, default=4)
+    parser.add_argument("--deliver-workers", type=int, default=4)
+    parser.add_argument("--jira-workers", type=int, default=1)
+    parser.add_argument("--queue-size", type=int, default=8, help="jobs buffered between stages (bounds memory)")
+    parser.add_argument("--deliver-url", default=None, help="also POST each transcript here, e.g. an n8n webhook")
+    parser.add_argument("--jira-dir", default=None, help="directory of <meeting_id>.json JiraTaskRequest files")
+    parser.add_argument("--mock", action="store_true", help="offline providers: no ffmpeg, STT, HTTP or Jira")
+    parser.add_argument("--mock-latency-ms", type=float, default=200.0)
+    parser.add_argument("--mock-failure-rate", type=float, default=0.0)
+    parser.add_argument("--report-json", default=None)
+    args = parser.parse_args(argv)
+    args.run = args.run or time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    try:
+        report = asyncio.run(BackfillRunner(args).run())
+    except KeyboardInterrupt:
+        print(f"Interrupted; resume with --run {args.run}")
+        return 130
+    print_report(report)
+    if args.report_json:
+        Path(args.report_json).write_text(json.dumps(report, indent=2))
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
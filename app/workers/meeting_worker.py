@@ -1,6 +1,9 @@
 import asyncio
+import os
+import time
 from concurrent.futures import ThreadPoolExecutor
-from typing import Dict
+from functools import partial
+from typing import Dict, Optional
 
 from app.models.MeetingStatusResponse import MeetingStatus, MeetingState
 from app.services import (
@@ -10,29 +13,56 @@ from app.services import (
     wait_for_approve,
     wait_for_meeting_end,
 )
-from app.services.meeting_service.meeting_service import mute_microphone
+from app.services.artifact_service.artifact_service import wav_duration
+from app.services.caption_service.caption_service import (
+    CaptionCollector,
+    deliver_caption_transcript,
+    enable_captions,
+)
+from app.services.meeting_service.meeting_service import leave_meeting, mute_microphone
+from app.services.ledger_service.browser_usage import BrowserUsageSampler
+from app.services.ledger_service.ledger_store import ledger_store
+from app.services.meeting_service.participants import AlonePolicy, ParticipantTracker
+from app.services.recording_service.audio_health import NO_AUDIO, SilencePolicy
 from app.services.recording_service.recording_service import (
     stop_recording,
     start_recording,
-    pick_loopback_device,
+    current_audio_health,
+    device_registry,
 )
+from app.services.storage_service.recording_store import recording_store
 from app.services.transcription_service.transcription_service import (
-    generate_transcription,
+    generate_transcription_async,
 )
-from app.utils import get_logger
+from app.utils import get_logger, meeting_context, ResourceScope
+from app.utils.diagnostics import DiagnosticsRing
 
 logger = get_logger("meeting_worker")
-executor = ThreadPoolExecutor()
+# PortAudio enumeration and recorder start/stop block; they must never run on the event loop.
+executor = ThreadPoolExecutor(thread_name_prefix="meeting-blocking")
+
+# Transcriptions run on the event loop; this bounds how many are in flight at once.
+transcription_slots = asyncio.Semaphore(int(os.getenv("TRANSCRIPTION_CONCURRENCY", "16")))
 
 
 async def process_and_send_recording(
     meeting_id: str, active_sessions: Dict[str, MeetingState], audio_path: str
 ):
-    loop = asyncio.get_running_loop()
+    async with transcription_slots:
+        await generate_transcription_async(active_sessions, meeting_id, audio_path)
 
-    await loop.run_in_executor(
-        executor, generate_transcription, active_sessions, meeting_id, audio_path
-    )
+
+async def watch_audio_health(
+    policy: SilencePolicy, participants: Optional[ParticipantTracker] = None, *, poll_s: float = 5.0
+) -> str:
+    while True:
+        await asyncio.sleep(poll_s)
+        health = current_audio_health()
+        if health is None:
+            continue
+        verdict = policy.evaluate(health, participants.with_others_s() if participants is not None else None)
+        if verdict is not None:
+            return verdict
 
 
 async def join_and_record_meeting(
@@ -40,50 +70,173 @@ async def join_and_record_meeting(
     active_sessions: Dict[str, MeetingState],
     *,
     batch_duration: int = 25,
+    join_at: Optional[float] = None,
+    transcript_mode: str = "stt",
+):
+    with meeting_context(meeting_id):
+        await _join_and_record_meeting(
+            meeting_id,
+            active_sessions,
+            batch_duration=batch_duration,
+            join_at=join_at,
+            transcript_mode=transcript_mode,
+        )
+
+
+async def _join_and_record_meeting(
+    meeting_id: str,
+    active_sessions: Dict[str, MeetingState],
+    *,
+    batch_duration: int,
+    join_at: Optional[float],
+    transcript_mode: str,
 ):
     active_sessions[meeting_id].status = MeetingStatus.STARTING
 
+    resources = ResourceScope(f"meeting:{meeting_id}", executor=executor)
+    ledger = active_sessions[meeting_id].ledger
+    page = None
     browser = None
-    recording_started = False
+    usage = BrowserUsageSampler(ledger)
+    usage_task: Optional[asyncio.Task] = None
+    diagnostics = DiagnosticsRing(meeting_id)
+    captions: Optional[CaptionCollector] = None
     recording_stopped = False
     audio_path = ""
+    job_id = None
     meeting_url = f"https://meet.google.com/{meeting_id}"
+    loop = asyncio.get_running_loop()
 
     try:
-        page, browser = await connect_meeting(meeting_url)
+        page, browser = await connect_meeting(meeting_url, diagnostics, resources)
+        usage_task = asyncio.create_task(usage.run(browser))
         active_sessions[meeting_id].status = MeetingStatus.CONNECTED
-        _, device, _ = pick_loopback_device()
-        await select_recording_device(page, device)
+        # Resolved once: the browser plays into exactly the device the recorder captures.
+        device = await loop.run_in_executor(executor, device_registry.resolve_loopback)
+        await select_recording_device(page, device.name)
         await mute_microphone(page)
+
+        if join_at is not None:
+            # Pre-warmed: browser is up and parked on the pre-join screen until the meeting starts.
+            wait_s = join_at - time.time()
+            if wait_s > 0:
+                logger.info("Pre-join ready; waiting %.0fs for meeting start", wait_s)
+                await asyncio.sleep(wait_s)
+
         await ask_to_join(page)
         approved = await wait_for_approve(page, timeout_s=120)
         if not approved:
+            await page.capture_failure("approve")
             active_sessions[meeting_id].status = MeetingStatus.CRASHED
             logger.error("Bot was not approved to join meeting")
             return
 
         active_sessions[meeting_id].status = MeetingStatus.RECORDING
-        audio_path = f"./app/data/recordings/{meeting_id}_record.wav"
-        start_recording(output_path=audio_path, channels=2)
-        recording_started = True
-        ended = await wait_for_meeting_end(page, timeout_s=batch_duration, poll_ms=1000)
-        if ended:
-            logger.info(
-                "Meeting ended early (meeting_id=%s). Stopping recording.", meeting_id
+        # Every join gets its own job directory, so a re-joined meeting never overwrites an earlier take.
+        job_id, audio_path = await loop.run_in_executor(
+            executor, recording_store.allocate, meeting_id
+        )
+        active_sessions[meeting_id].audio_path = audio_path
+        active_sessions[meeting_id].job_id = job_id
+        ledger.job_id = job_id
+        try:
+            await loop.run_in_executor(
+                executor,
+                partial(start_recording, output_path=audio_path, channels=2, device=device, overwrite=False),
             )
+        except Exception as e:
+            # The open failure already invalidated the cache (device unplugged or renumbered); re-resolve and
+            # move the browser too if the device itself changed, then try once more.
+            logger.warning("Could not open %s, re-resolving audio device: %s", device.name, e)
+            retry = await loop.run_in_executor(executor, device_registry.resolve_loopback)
+            if retry.name != device.name:
+                await select_recording_device(page, retry.name)
+            device = retry
+            await loop.run_in_executor(
+                executor,
+                partial(start_recording, output_path=audio_path, channels=2, device=device, overwrite=False),
+            )
+        resources.add("recorder", partial(stop_recording, timeout_s=15.0), timeout_s=20.0)
+
+        if transcript_mode != "stt":
+            # Caption timestamps are relative to the recording start, like the STT word timings.
+            captions = CaptionCollector()
+            try:
+                await enable_captions(page)
+                await captions.attach(page)
+            except Exception as e:
+                logger.warning("Live captions unavailable, falling back to STT: %s", e)
+                captions = None
+
+        watches = set()
+        participants = ParticipantTracker()
+        try:
+            await participants.attach(page)
+            alone_watch = asyncio.create_task(participants.wait_until_alone(AlonePolicy.from_env()))
+            watches.add(alone_watch)
+        except Exception as e:
+            logger.warning("Participant tracking unavailable: %s", e)
+            alone_watch = None
 
-        active_sessions[meeting_id].status = MeetingStatus.FINISHED
+        end_watch = asyncio.create_task(
+            wait_for_meeting_end(page, timeout_s=batch_duration, poll_ms=1000)
+        )
+        health_watch = asyncio.create_task(
+            watch_audio_health(SilencePolicy.from_env(), participants if alone_watch is not None else None)
+        )
+        watches |= {end_watch, health_watch}
+        done, pending = await asyncio.wait(watches, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        if alone_watch in done:
+            logger.info(
+                "Bot alone in the call for %.0fs (peak %d participants); leaving (meeting_id=%s)",
+                alone_watch.result(),
+                participants.peak,
+                meeting_id,
+            )
+            await leave_meeting(page)
+            active_sessions[meeting_id].status = MeetingStatus.FINISHED
+        elif health_watch in done:
+            verdict = health_watch.result()
+            logger.warning(
+                "Leaving meeting on audio policy '%s' (meeting_id=%s): %s",
+                verdict,
+                meeting_id,
+                current_audio_health().snapshot(last_windows=0),
+            )
+            await leave_meeting(page)
+            # No signal at all means a broken audio route, not an empty meeting: nothing to transcribe.
+            active_sessions[meeting_id].status = (
+                MeetingStatus.NO_AUDIO if verdict == NO_AUDIO else MeetingStatus.FINISHED
+            )
+        else:
+            if end_watch.result():
+                logger.info(
+                    "Meeting ended early (meeting_id=%s). Stopping recording.", meeting_id
+                )
+            active_sessions[meeting_id].status = MeetingStatus.FINISHED
 
     except Exception as e:
         active_sessions[meeting_id].status = MeetingStatus.CRASHED
         logger.exception("Failed to join meeting (meeting_id=%s): %s", meeting_id, e)
+        if page is not None:
+            await page.capture_failure("join")
 
     finally:
-        if recording_started:
+        if captions is not None:
+            await captions.drain(page)
+
+        # Everything live-call related is released before post-processing starts: recorder first so the
+        # file is complete, then page -> browser -> Playwright driver (each bounded by its own timeout).
+        if "recorder" in resources:
             try:
-                path = stop_recording(timeout_s=15.0)
+                path = await resources.release("recorder")
                 logger.info("Recording stopped. Saved to: %s", path)
                 recording_stopped = True
+                ledger.audio_recorded_s = await loop.run_in_executor(executor, wav_duration, audio_path) or 0.0
             except Exception as e:
                 active_sessions[meeting_id].status = MeetingStatus.CRASHED
                 logger.exception(
@@ -92,7 +245,35 @@ async def join_and_record_meeting(
                     e,
                 )
 
-        if recording_stopped:
+        if usage_task is not None:
+            usage_task.cancel()
+            await asyncio.gather(usage_task, return_exceptions=True)
+            # Last reading while the browser is still up; it covers the whole call.
+            try:
+                await usage.sample(browser)
+            except Exception as e:
+                logger.debug("Final browser usage sample failed: %s", e)
+
+        await resources.aclose()
+
+        caption_segments = captions.segments() if captions is not None else []
+        if caption_segments and active_sessions[meeting_id].status == MeetingStatus.FINISHED:
+            try:
+                await deliver_caption_transcript(
+                    active_sessions,
+                    meeting_id,
+                    caption_segments,
+                    draft=transcript_mode == "draft",
+                )
+            except Exception as e:
+                logger.exception("Failed to send caption transcript (meeting_id=%s): %s", meeting_id, e)
+
+        # Caption-only meetings skip STT once captions were delivered; the recording is still kept.
+        status = active_sessions[meeting_id].status
+        needs_stt = status != MeetingStatus.NO_AUDIO and (
+            transcript_mode != "captions" or status != MeetingStatus.TRANSCRIBED
+        )
+        if recording_stopped and needs_stt:
             try:
                 logger.info("Processing recording (meeting_id=%s", meeting_id)
                 await process_and_send_recording(
@@ -106,10 +287,22 @@ async def join_and_record_meeting(
                     e,
                 )
 
-        if browser is not None:
+        # Only now may maintenance recompress or evict the recording: captions and STT have read it.
+        if job_id is not None:
             try:
-                await browser.close()
+                await loop.run_in_executor(executor, recording_store.mark_complete, job_id)
             except Exception as e:
-                logger.exception(
-                    "Failed to close browser (meeting_id=%s): %s", meeting_id, e
-                )
+                logger.exception("Failed to register recording %s: %s", job_id, e)
+
+        if active_sessions[meeting_id].status == MeetingStatus.CRASHED:
+            try:
+                await loop.run_in_executor(executor, diagnostics.flush)
+            except Exception as e:
+                logger.exception("Failed to write diagnostics (meeting_id=%s): %s", meeting_id, e)
+        else:
+            diagnostics.discard()
+
+        try:
+            await loop.run_in_executor(executor, ledger_store.save, ledger)
+        except Exception as e:
+            logger.exception("Failed to save cost ledger (meeting_id=%s): %s", meeting_id, e)
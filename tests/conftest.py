@@ -0,0 +1,101 @@
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Stores, transcripts and logs live under ./app relative to the working directory; keep them out of the checkout.
+os.chdir(tempfile.mkdtemp(prefix="meeting-bot-tests-"))
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def write_recording(path, seconds: float = 0.5, samplerate: int = 16000):
+    import numpy as np
+
+    from app.services.recording_service.chunked_recording import ChunkedRecordingWriter
+
+    t = np.arange(int(seconds * samplerate)) / samplerate
+    tone = np.sin(2 * np.pi * 440 * t).astype(np.float32) * 0.2
+    with ChunkedRecordingWriter(path, samplerate=samplerate, channels=2) as writer:
+        writer.write(np.stack([tone, tone], axis=1))
+
+
+class FakePage:
+    # Stands in for the PlaywrightWrapper: no Playwright page, so DOM-driven features fail to attach.
+    def __init__(self):
+        self.page = None
+        self.failures = []
+
+    async def capture_failure(self, label: str):
+        self.failures.append(label)
+
+
+@pytest.fixture
+def offline_meeting(monkeypatch, workdir):
+    # Runs join_and_record_meeting end to end without a browser, audio device, ffmpeg or network.
+    from types import SimpleNamespace
+
+    from app.models.MeetingStatusResponse import MeetingState, MeetingStatus
+    from app.services.ledger_service.ledger_store import LedgerStore
+    from app.services.storage_service.recording_store import RecordingStore
+    from app.workers import meeting_worker
+
+    harness = SimpleNamespace(
+        page=FakePage(),
+        browser=SimpleNamespace(),
+        store=RecordingStore(str(workdir / "recordings")),
+        meeting_length_s=0.2,
+        processed=[],
+    )
+
+    async def noop(*args, **kwargs):
+        return None
+
+    async def approved(*args, **kwargs):
+        return True
+
+    async def connect(meeting_url, diagnostics, resources):
+        return harness.page, harness.browser
+
+    async def meeting_ends(page, timeout_s, poll_ms):
+        await asyncio.sleep(harness.meeting_length_s)
+        return True
+
+    def start(output_path, **kwargs):
+        write_recording(output_path)
+
+    async def process(meeting_id, active_sessions, audio_path):
+        harness.processed.append((meeting_id, audio_path))
+        active_sessions[meeting_id].status = MeetingStatus.TRANSCRIBED
+
+    def sessions(*meeting_ids):
+        return {
+            m: MeetingState(status=MeetingStatus.STARTING, resume_url=f"http://n8n.local/resume/{m}", meeting_id=m)
+            for m in meeting_ids
+        }
+
+    harness.sessions = sessions
+    monkeypatch.setattr(meeting_worker, "connect_meeting", connect)
+    monkeypatch.setattr(meeting_worker, "select_recording_device", noop)
+    monkeypatch.setattr(meeting_worker, "mute_microphone", noop)
+    monkeypatch.setattr(meeting_worker, "leave_meeting", noop)
+    monkeypatch.setattr(meeting_worker, "ask_to_join", noop)
+    monkeypatch.setattr(meeting_worker, "wait_for_approve", approved)
+    monkeypatch.setattr(meeting_worker, "wait_for_meeting_end", meeting_ends)
+    monkeypatch.setattr(meeting_worker.device_registry, "resolve_loopback", lambda: SimpleNamespace(name="Loopback"))
+    monkeypatch.setattr(meeting_worker, "start_recording", start)
+    monkeypatch.setattr(meeting_worker, "stop_recording", lambda timeout_s: "recording")
+    monkeypatch.setattr(meeting_worker, "process_and_send_recording", process)
+    monkeypatch.setattr(meeting_worker, "recording_store", harness.store)
+    monkeypatch.setattr(meeting_worker, "ledger_store", LedgerStore(str(workdir / "ledger.db")))
+    return harness
@@ -0,0 +1,114 @@
+import asyncio
+import io
+import json
+import time
+
+import httpx
+import pytest
+
+from app import main
+from app.services.artifact_service.artifact_service import ArtifactStore, ArtifactTokenError, _b64, _unb64
+
+DATA = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def store(workdir, monkeypatch):
+    store = ArtifactStore(str(workdir / "artifacts"), secret="s3cret", base_url="http://node-1:8000")
+    monkeypatch.setattr(main, "artifact_store", store)
+    return store
+
+
+def token_of(ref) -> str:
+    return ref.url.rsplit("/", 1)[1]
+
+
+def get(path: str, **headers):
+    async def request():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bot") as client:
+            return await client.get(path, headers=headers)
+
+    return asyncio.run(request())
+
+
+def test_link_survives_a_restart_with_the_same_secret(store, workdir):
+    ref = store.publish(io.BytesIO(DATA), ".mp3", duration=1.5)
+    assert ref.url.startswith("http://node-1:8000/artifacts/") and ref.size == len(DATA)
+
+    restarted = ArtifactStore(str(workdir / "artifacts"), secret="s3cret")
+    path, content_type = restarted.resolve(token_of(ref))
+    assert path.read_bytes() == DATA and content_type == "audio/mpeg"
+
+    with pytest.raises(ArtifactTokenError, match="invalid"):
+        ArtifactStore(str(workdir / "artifacts"), secret="other").resolve(token_of(ref))
+
+
+def test_tampered_tokens_are_rejected(store):
+    token = token_of(store.publish(io.BytesIO(DATA), ".mp3"))
+    body, signature = token.split(".")
+
+    claims = json.loads(_unb64(body))
+    claims["e"] += 86400
+    extended = _b64(json.dumps(claims, separators=(",", ":")).encode())
+    flipped = signature[:-1] + ("A" if signature[-1] != "A" else "B")
+
+    for forged in (f"{extended}.{signature}", f"{body}.{flipped}", body, f"{body}."):
+        with pytest.raises(ArtifactTokenError, match="invalid"):
+            store.resolve(forged)
+
+    # A validly signed token still cannot name a file outside the artifact directory.
+    escape = store.token_for("../recordings.db", int(time.time()) + 60)
+    with pytest.raises(ArtifactTokenError, match="invalid artifact name"):
+        store.resolve(escape)
+
+
+def test_expired_tokens_are_rejected(store):
+    ref = store.publish(io.BytesIO(DATA), ".mp3")
+    name = ref.sha256 + ".mp3"
+    with pytest.raises(ArtifactTokenError, match="expired"):
+        store.resolve(store.token_for(name, int(time.time()) - 1))
+
+
+def test_artifact_endpoint_serves_ranges(store):
+    token = token_of(store.publish(io.BytesIO(DATA), ".mp3"))
+
+    full = get(f"/artifacts/{token}")
+    assert full.status_code == 200 and full.content == DATA
+    assert full.headers["content-type"] == "audio/mpeg"
+    assert full.headers["accept-ranges"] == "bytes"
+
+    # A download that dropped at byte 1000 picks up from there.
+    tail = get(f"/artifacts/{token}", Range="bytes=1000-")
+    assert tail.status_code == 206 and tail.content == DATA[1000:]
+    assert tail.headers["content-range"] == f"bytes 1000-{len(DATA) - 1}/{len(DATA)}"
+
+    middle = get(f"/artifacts/{token}", Range="bytes=10-19")
+    assert middle.status_code == 206 and middle.content == DATA[10:20]
+
+    assert get(f"/artifacts/{token}", Range=f"bytes={len(DATA)}-").status_code == 416
+
+
+def test_artifact_endpoint_rejects_bad_and_missing(store):
+    ref = store.publish(io.BytesIO(DATA), ".mp3")
+    token = token_of(ref)
+    assert get(f"/artifacts/{token[:-2]}xx").status_code == 403
+    assert get(f"/artifacts/{store.token_for(ref.sha256 + '.mp3', int(time.time()) - 1)}").status_code == 403
+
+    (store.root / f"{ref.sha256}.mp3").unlink()
+    assert get(f"/artifacts/{token}").status_code == 404
+
+
+def test_reference_handoff_without_a_secret_is_refused(workdir, monkeypatch):
+    monkeypatch.setattr(main, "artifact_store", ArtifactStore(str(workdir / "artifacts")))
+    monkeypatch.setattr(main, "AUDIO_HANDOFF", "reference")
+
+    async def start():
+        async with main.lifespan(main.app):
+            pass
+
+    with pytest.raises(RuntimeError, match="ARTIFACT_SECRET"):
+        asyncio.run(start())
+
+    monkeypatch.setattr(main, "AUDIO_HANDOFF", "multipart")
+    response = get("/download-file?meeting_id=m1&mode=reference")
+    assert response.status_code == 409
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from app.services.meeting_service.participants import ParticipantTracker
+from app.services.recording_service.audio_health import NO_AUDIO, SILENCE, AudioHealthMonitor, SilencePolicy
+
+SAMPLERATE = 100
+
+
+def record(monitor: AudioHealthMonitor, seconds: int, level: float = 0.0):
+    for _ in range(seconds):
+        monitor.update(np.full((SAMPLERATE, 2), level, dtype=np.float32))
+
+
+def test_snapshot_without_windows_lists_none():
+    monitor = AudioHealthMonitor(SAMPLERATE)
+    record(monitor, 30, level=0.1)
+
+    assert monitor.snapshot(last_windows=0)["recent_windows"] == []
+    assert len(monitor.snapshot(last_windows=3)["recent_windows"]) == 3
+
+
+def test_empty_room_is_not_a_broken_audio_route():
+    policy = SilencePolicy(fail_without_signal_s=120, end_after_silence_s=600)
+    monitor = AudioHealthMonitor(SAMPLERATE)
+    record(monitor, 300)
+
+    # Five minutes alone in the room, well inside the empty-room grace: nobody spoke because nobody is there.
+    assert policy.evaluate(monitor, with_others_s=0.0) is None
+    assert policy.evaluate(monitor, with_others_s=119.0) is None
+    assert policy.evaluate(monitor, with_others_s=120.0) == NO_AUDIO
+    # Without a participant count every recorded second counts.
+    assert policy.evaluate(monitor) == NO_AUDIO
+
+
+def test_silence_after_speech_ends_the_recording():
+    policy = SilencePolicy(fail_without_signal_s=120, end_after_silence_s=60)
+    monitor = AudioHealthMonitor(SAMPLERATE)
+    record(monitor, 5, level=0.1)
+    record(monitor, 59)
+    assert policy.evaluate(monitor, with_others_s=0.0) is None
+
+    record(monitor, 1)
+    assert policy.evaluate(monitor, with_others_s=0.0) == SILENCE
+
+
+def test_tracker_counts_only_time_spent_with_others(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("app.services.meeting_service.participants.time.monotonic", lambda: clock[0])
+    tracker = ParticipantTracker()
+    assert tracker.with_others_s() is None
+
+    tracker.on_count(None, 1)
+    clock[0] += 300
+    tracker.on_count(None, 3)
+    clock[0] += 40
+    tracker.on_count(None, 1)
+    clock[0] += 100
+    tracker.on_count(None, 2)
+    clock[0] += 5
+
+    assert tracker.with_others_s() == pytest.approx(45.0)
@@ -0,0 +1,141 @@
+import asyncio
+import json
+from collections import Counter
+
+import pytest
+
+from app.services.storage_service.recording_store import RecordingStore
+from app.workers import backfill
+from app.workers.backfill import BACKFILL_DIR, DONE, FAILED, TRANSCRIBED, BackfillRunner, parse_args
+
+from .conftest import write_recording
+
+MEETINGS = [f"m{i}" for i in range(6)]
+
+
+@pytest.fixture
+def root(workdir):
+    store = RecordingStore(str(workdir / "recordings"))
+    for meeting_id in MEETINGS:
+        job_id, path = store.allocate(meeting_id)
+        write_recording(path, seconds=0.2)
+        store.mark_complete(job_id)
+    # Still being recorded by the server: the backfill must not touch it.
+    _, live_path = store.allocate("live")
+    write_recording(live_path, seconds=0.2)
+    return str(store.root)
+
+
+def runner_for(root, *extra):
+    args = parse_args(["--run", "r1", "--root", root, "--mock", "--mock-latency-ms", "5", *extra])
+    runner = BackfillRunner(args)
+    runner.stt_calls = 0
+    transcribe = runner.stt.transcribe
+
+    async def counting(audio, filename):
+        runner.stt_calls += 1
+        return await transcribe(audio, filename)
+
+    runner.stt.transcribe = counting
+    return runner
+
+
+def checkpoint_records():
+    with open(BACKFILL_DIR / "r1.jsonl", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_interrupted_run_resumes_and_finishes_each_recording_once(root):
+    async def interrupted():
+        runner = runner_for(root, "--transcribe-workers", "1")
+        deliver = runner.deliver
+        stalled = asyncio.Event()
+
+        async def deliver_two(job):
+            if runner.stats["deliver"].count >= 2:
+                await stalled.wait()
+            return await deliver(job)
+
+        runner.deliver = deliver_two
+        task = asyncio.create_task(runner.run())
+        while sum(r["stage"] == DONE for r in runner.checkpoint.state.values()) < 2:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return runner
+
+    first = asyncio.run(interrupted())
+    stages = {m: r["stage"] for m, r in first.checkpoint.state.items()}
+    assert sum(s == DONE for s in stages.values()) == 2
+    untranscribed = [m for m in MEETINGS if stages.get(m) not in (TRANSCRIBED, DONE)]
+    assert untranscribed
+
+    second = runner_for(root)
+    report = asyncio.run(second.run())
+
+    assert report["failed"] == []
+    assert report["skipped_done"] == 2
+    # Transcripts saved before the interruption are delivered from disk, not sent to STT again.
+    assert second.stt_calls == len(untranscribed)
+    done = Counter(r["meeting_id"] for r in checkpoint_records() if r["stage"] == DONE)
+    assert done == {m: 1 for m in MEETINGS}
+    assert sorted(p.stem for p in (BACKFILL_DIR / "r1-out").iterdir()) == MEETINGS
+
+
+def test_resume_after_delivery_failure_does_not_transcribe_again(root):
+    first = runner_for(root)
+    deliver = first.deliver
+
+    async def failing_deliver(job):
+        if job.meeting_id == "m1":
+            raise ConnectionError("webhook down")
+        return await deliver(job)
+
+    first.deliver = failing_deliver
+    report = asyncio.run(first.run())
+    assert report["failed"] == ["m1"]
+    assert first.stt_calls == len(MEETINGS)
+    record = first.checkpoint.state["m1"]
+    assert (record["stage"], record["failed_stage"], record["last_stage"]) == (FAILED, "deliver", TRANSCRIBED)
+    assert record["duration_s"] == pytest.approx(0.2)
+
+    second = runner_for(root)
+    delivered = []
+    deliver = second.deliver
+
+    async def counting_deliver(job):
+        delivered.append(job.meeting_id)
+        return await deliver(job)
+
+    second.deliver = counting_deliver
+    report = asyncio.run(second.run())
+
+    assert report["failed"] == []
+    assert second.stt_calls == 0
+    assert delivered == ["m1"]
+    assert second.checkpoint.state["m1"]["stage"] == DONE
+
+
+def test_repeated_failures_keep_the_last_completed_stage(root):
+    first = runner_for(root, "--meeting", "m0")
+
+    async def down(job):
+        raise ConnectionError("webhook down")
+
+    first.deliver = down
+    asyncio.run(first.run())
+    second = runner_for(root, "--meeting", "m0")
+    second.deliver = down
+    asyncio.run(second.run())
+
+    record = second.checkpoint.state["m0"]
+    assert (record["failed_stage"], record["last_stage"]) == ("deliver", TRANSCRIBED)
+    assert second.stt_calls == 0
+
+
+def test_active_recordings_are_not_backfilled(root):
+    store = RecordingStore(root)
+    jobs = backfill.discover_recordings(store)
+    assert [job.meeting_id for job in jobs] == MEETINGS
+    assert store.latest_for_meeting("live").active
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from app.services.outbox_service import callback_outbox as outbox_module
+from app.services.outbox_service.callback_outbox import DEAD, DELIVERED, PENDING, CallbackOutbox, is_permanent
+
+RESUME_URL = "http://n8n.local/webhook-waiting/1"
+
+
+class Webhook:
+    # Stands in for n8n: answers each URL from a script of responses, then 200 once the script runs out.
+    def __init__(self):
+        self.scripts = {}
+        self.requests = []
+
+    def script(self, url, *answers):
+        self.scripts.setdefault(url, []).extend(answers)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append((time.monotonic(), request))
+        answers = self.scripts.get(str(request.url))
+        answer = answers.pop(0) if answers else 200
+        if isinstance(answer, Exception):
+            raise answer
+        if callable(answer):
+            return await answer(request)
+        if isinstance(answer, int):
+            return httpx.Response(answer)
+        return answer
+
+    def bodies(self, url=RESUME_URL):
+        return [json.loads(r.content) for _, r in self.requests if str(r.url) == url]
+
+
+@pytest.fixture
+def webhook(monkeypatch):
+    webhook = Webhook()
+    client = httpx.AsyncClient
+    monkeypatch.setattr(
+        outbox_module.httpx,
+        "AsyncClient",
+        lambda **kwargs: client(transport=httpx.MockTransport(webhook.handle), **kwargs),
+    )
+    return webhook
+
+
+def new_outbox(workdir, **kwargs) -> CallbackOutbox:
+    kwargs.setdefault("backoff_base_s", 0.01)
+    return CallbackOutbox(str(workdir / "outbox.db"), **kwargs)
+
+
+def deliver(outbox: CallbackOutbox, until, timeout_s: float = 5.0):
+    async def main():
+        runner = asyncio.create_task(outbox.run(idle_poll_s=0.05))
+        deadline = time.monotonic() + timeout_s
+        try:
+            while not until() and time.monotonic() < deadline:
+                await asyncio.sleep(0.02)
+        finally:
+            runner.cancel()
+            await asyncio.gather(runner, return_exceptions=True)
+
+    asyncio.run(main())
+
+
+def settled(outbox: CallbackOutbox):
+    return lambda: outbox.counts().get(PENDING, 0) == 0
+
+
+def test_drops_and_overload_are_retried_until_delivered(workdir, webhook):
+    outbox = new_outbox(workdir)
+    webhook.script(
+        RESUME_URL,
+        httpx.ConnectError("connection refused"),
+        httpx.ReadTimeout("timed out"),
+        503,
+        httpx.Response(429, headers={"Retry-After": "0.3"}),
+    )
+    entry_id = outbox.enqueue("m1", RESUME_URL, {"text": "hello"}, kind="transcript")
+
+    deliver(outbox, settled(outbox))
+
+    [entry] = outbox.entries("m1")
+    assert (entry.id, entry.status, entry.attempts) == (entry_id, DELIVERED, 5)
+    assert webhook.bodies() == [{"text": "hello"}] * 5
+    assert len({r.headers["Idempotency-Key"] for _, r in webhook.requests}) == 1
+    # Retry-After outranks the much shorter backoff.
+    assert webhook.requests[4][0] - webhook.requests[3][0] >= 0.3
+
+
+def test_callbacks_of_one_meeting_arrive_in_order_without_holding_up_others(workdir, webhook):
+    outbox = new_outbox(workdir)
+    webhook.script(RESUME_URL, 503, 503)
+    for step in ("joined", "recording", "transcript"):
+        outbox.enqueue("m1", RESUME_URL, {"step": step}, kind=step)
+    outbox.enqueue("m2", "http://n8n.local/webhook-waiting/2", {"step": "transcript"}, kind="transcript")
+
+    deliver(outbox, settled(outbox))
+
+    assert [b["step"] for b in webhook.bodies()] == ["joined", "joined", "joined", "recording", "transcript"]
+    first_m2 = next(i for i, (_, r) in enumerate(webhook.requests) if str(r.url).endswith("/2"))
+    assert first_m2 < 3
+    assert outbox.counts() == {DELIVERED: 4}
+
+
+def test_a_repeated_enqueue_is_sent_once(workdir, webhook):
+    outbox = new_outbox(workdir)
+    first = outbox.enqueue("m1", RESUME_URL, {"text": "hello"}, kind="transcript")
+    again = outbox.enqueue("m1", RESUME_URL, {"text": "hello"}, kind="transcript")
+    keyed = outbox.enqueue("m1", RESUME_URL, {"v": 1}, kind="status", dedupe_key="m1:status:finished")
+    rekeyed = outbox.enqueue("m1", RESUME_URL, {"v": 2}, kind="status", dedupe_key="m1:status:finished")
+
+    deliver(outbox, settled(outbox))
+
+    assert (first, keyed) == (again, rekeyed)
+    assert webhook.bodies() == [{"text": "hello"}, {"v": 1}]
+    assert webhook.requests[1][1].headers["Idempotency-Key"] == "m1:status:finished"
+
+
+@pytest.mark.parametrize("status", [302, 400, 404, 410])
+def test_answers_that_cannot_change_kill_the_callback_at_once(workdir, webhook, status):
+    outbox = new_outbox(workdir)
+    webhook.script(RESUME_URL, status)
+    outbox.enqueue("m1", RESUME_URL, {"text": "hello"}, kind="transcript")
+
+    deliver(outbox, settled(outbox))
+
+    [entry] = outbox.entries("m1")
+    assert (entry.status, entry.attempts, entry.last_error) == (DEAD, 1, f"HTTP {status}")
+
+
+@pytest.mark.parametrize(
+    "status, permanent",
+    [(200, False), (204, False), (301, True), (307, True), (404, True), (408, False), (425, False), (429, False),
+     (500, False), (503, False)],
+)
+def test_is_permanent(status, permanent):
+    assert is_permanent(status) is permanent
+
+
+def test_retried_dead_callback_gets_a_fresh_give_up_window(workdir, webhook):
+    outbox = new_outbox(workdir, give_up_after_s=0.3)
+    webhook.script(RESUME_URL, 404)
+    outbox.enqueue("m1", RESUME_URL, {"text": "hello"}, kind="transcript")
+    deliver(outbox, settled(outbox))
+    time.sleep(0.4)
+
+    # The workflow is fixed; n8n is still restarting when the operator re-queues.
+    webhook.script(RESUME_URL, 503)
+    assert outbox.retry_dead("m1") == 1
+    deliver(outbox, lambda: outbox.counts() == {DELIVERED: 1})
+
+    [entry] = outbox.entries("m1")
+    assert (entry.status, entry.attempts, entry.last_error) == (DELIVERED, 2, None)
+
+
+def test_callbacks_left_by_a_previous_process_are_replayed(workdir, webhook):
+    stalled = asyncio.Event()
+
+    async def hang(request):
+        stalled.set()
+        await asyncio.sleep(60)
+
+    webhook.script(RESUME_URL, hang)
+    crashed = new_outbox(workdir)
+    crashed.enqueue("m1", RESUME_URL, {"step": "recording"}, kind="recording")
+    crashed.enqueue("m1", RESUME_URL, {"step": "transcript"}, kind="transcript")
+    # The process dies while the first callback is on the wire.
+    deliver(crashed, stalled.is_set)
+
+    restarted = new_outbox(workdir)
+    deliver(restarted, settled(restarted))
+
+    assert [b["step"] for b in webhook.bodies()] == ["recording", "recording", "transcript"]
+    assert restarted.counts() == {DELIVERED: 2}
@@ -0,0 +1,176 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from app.models.MeetingStatusResponse import MeetingState, MeetingStatus
+from app.services.caption_service import caption_service
+from app.services.caption_service.caption_service import CaptionCollector, deliver_caption_transcript, enable_captions
+from app.services.outbox_service.callback_outbox import PENDING, SUPERSEDED, CallbackOutbox
+from app.services.search_service.transcript_index import TranscriptIndex
+from app.services.transcription_service import transcript_store, transcription_service
+from app.services.transcription_service.transcript_store import load_transcript
+
+FIXTURE = Path(__file__).parent / "fixtures" / "meet_captions.html"
+SEGMENTS = [
+    {"speaker": "Anna Kowalska", "text": "Let's start with the budget.", "start": 0.0, "end": 2.1},
+    {"speaker": "Piotr Nowak", "text": "Sounds good.", "start": 2.4, "end": 3.0},
+]
+
+
+def run_in_meet_page(body):
+    async_api = pytest.importorskip("playwright.async_api")
+    from app.utils import PlaywrightWrapper
+
+    async def main():
+        async with async_api.async_playwright() as p:
+            try:
+                browser = await p.chromium.launch(headless=True)
+            except Exception as e:
+                pytest.skip(f"Chromium not available: {str(e).splitlines()[0]}")
+            try:
+                page = await browser.new_page()
+                await page.goto(FIXTURE.as_uri())
+                return await body(PlaywrightWrapper(page, 3000))
+            finally:
+                await browser.close()
+
+    return asyncio.run(main())
+
+
+def test_collector_follows_the_caption_dom():
+    async def body(page):
+        assert await enable_captions(page)
+        collector = CaptionCollector(flush_ms=50)
+        await collector.attach(page)
+        await page.page.evaluate("() => rewrite(0, \"Let's start with the budget.\")")
+        await page.page.evaluate("() => say('Piotr Nowak', 'Sounds good.')")
+        await page.page.wait_for_timeout(200)
+        await collector.drain(page)
+        await page.page.wait_for_timeout(50)
+        return collector.segments(), await page.page.evaluate("() => window.keys")
+
+    segments, keys = run_in_meet_page(body)
+
+    assert [(s["speaker"], s["text"]) for s in segments] == [(s["speaker"], s["text"]) for s in SEGMENTS]
+    assert keys == []
+
+
+class FakeMeetPage:
+    # Captions toggle only: the "Turn on captions" button exists while captions are off, if the toolbar shows it.
+    def __init__(self, *, captions_on: bool, toolbar_button: bool):
+        self.captions_on = captions_on
+        self.toolbar_button = toolbar_button
+        self.keys = []
+        self.page = self
+        self.keyboard = self
+
+    def locator(self, selector):
+        page = self
+
+        class Locator:
+            async def count(self):
+                return int(page.captions_on)
+
+        return Locator()
+
+    async def safe_click(self, selector, timeout):
+        if self.captions_on or not self.toolbar_button:
+            return False
+        self.captions_on = True
+        return True
+
+    async def press(self, key):
+        self.keys.append(key)
+        if key == "c":
+            self.captions_on = not self.captions_on
+
+    async def wait_for_selector(self, selector, state, timeout):
+        if not self.captions_on:
+            raise TimeoutError(selector)
+
+
+@pytest.mark.parametrize(
+    "captions_on, toolbar_button, keys",
+    [(True, True, []), (True, False, []), (False, True, []), (False, False, ["c"])],
+)
+def test_enable_captions_never_toggles_them_off(captions_on, toolbar_button, keys):
+    page = FakeMeetPage(captions_on=captions_on, toolbar_button=toolbar_button)
+
+    assert asyncio.run(enable_captions(page))
+
+    assert page.captions_on
+    assert page.keys == keys
+
+
+@pytest.fixture
+def outbox(workdir, monkeypatch):
+    outbox = CallbackOutbox(str(workdir / "outbox.db"))
+    monkeypatch.setattr(caption_service, "callback_outbox", outbox)
+    monkeypatch.setattr(transcription_service, "callback_outbox", outbox)
+    monkeypatch.setattr(transcript_store, "transcript_index", TranscriptIndex(str(workdir / "index.db")))
+    return outbox
+
+
+def finished(meeting_id: str):
+    return {
+        meeting_id: MeetingState(
+            status=MeetingStatus.FINISHED, resume_url=f"http://n8n.local/resume/{meeting_id}", meeting_id=meeting_id
+        )
+    }
+
+
+def test_draft_is_stored_but_never_sent_to_the_resume_url(outbox, monkeypatch):
+    monkeypatch.setattr(caption_service, "CAPTION_DRAFT_URL", None)
+    sessions = finished("m1")
+
+    asyncio.run(deliver_caption_transcript(sessions, "m1", SEGMENTS, draft=True))
+
+    assert outbox.entries("m1") == []
+    assert load_transcript("m1")["draft"] is True
+    assert sessions["m1"].status == MeetingStatus.FINISHED
+
+
+def test_draft_goes_to_its_own_webhook_and_gives_way_to_the_stt_transcript(outbox, monkeypatch):
+    monkeypatch.setattr(caption_service, "CAPTION_DRAFT_URL", "http://n8n.local/webhook/caption-draft")
+    sessions = finished("m1")
+
+    async def compress(audio_path, **kwargs):
+        return b"ID3"
+
+    async def send(audio, filename):
+        return {"text": "hello", "words": [{"text": "hello", "start": 0.0, "end": 0.4, "speaker_id": "speaker_0"}]}
+
+    monkeypatch.setattr(transcription_service, "compress_audio_async", compress)
+    monkeypatch.setattr(transcription_service.stt_client, "send", send)
+
+    async def main():
+        await deliver_caption_transcript(sessions, "m1", SEGMENTS, draft=True)
+        await transcription_service.generate_transcription_async(sessions, "m1", "m1_record.mp3")
+
+    asyncio.run(main())
+
+    entries = outbox.entries("m1")
+    assert [(e.kind, e.url, e.status) for e in entries] == [
+        ("caption-draft", "http://n8n.local/webhook/caption-draft", SUPERSEDED),
+        ("transcript", "http://n8n.local/resume/m1", PENDING),
+    ]
+    assert load_transcript("m1")["full_text"] == "hello"
+    assert sessions["m1"].status == MeetingStatus.TRANSCRIBED
+
+
+def test_final_captions_are_queued_before_the_meeting_counts_as_transcribed(outbox, monkeypatch):
+    sessions = finished("m1")
+    seen = []
+
+    def enqueue(meeting_id, url, payload, **kwargs):
+        seen.append(sessions[meeting_id].status)
+        raise OSError("disk full")
+
+    monkeypatch.setattr(outbox, "enqueue", enqueue)
+
+    with pytest.raises(OSError):
+        asyncio.run(deliver_caption_transcript(sessions, "m1", SEGMENTS, draft=False))
+
+    assert seen == [MeetingStatus.FINISHED]
+    assert sessions["m1"].status == MeetingStatus.FINISHED
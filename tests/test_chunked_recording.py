@@ -0,0 +1,155 @@
+import json
+import struct
+import wave
+
+import numpy as np
+import pytest
+
+from app.services.recording_service.chunked_recording import (
+    MANIFEST_FILE,
+    WAV_MAX_SIZE,
+    ChunkEntry,
+    ChunkedRecordingReader,
+    ChunkedRecordingWriter,
+    open_recording_stream,
+    recording_stream_size,
+    recover_recording,
+)
+from app.services.storage_service.recording_store import RecordingStore
+
+SAMPLERATE = 8000
+
+
+def tone(seconds: float) -> np.ndarray:
+    frames = np.arange(int(seconds * SAMPLERATE), dtype=np.int64)
+    left = (frames % 32768).astype(np.int16)
+    return np.stack([left, -left], axis=1)
+
+
+@pytest.fixture
+def recording(workdir):
+    audio = tone(2.5)
+    directory = workdir / "rec"
+    with ChunkedRecordingWriter(directory, SAMPLERATE, 2, chunk_seconds=1.0) as writer:
+        # Uneven blocks, so chunk boundaries fall inside a write.
+        for start in range(0, len(audio), 3000):
+            writer.write(audio[start:start + 3000])
+    return directory, audio
+
+
+def test_writer_commits_fixed_size_chunks_and_reads_back_as_one_wav(recording):
+    directory, audio = recording
+    reader = ChunkedRecordingReader(directory)
+
+    assert [(c.start_frame, c.frames) for c in reader.chunks] == [(0, 8000), (8000, 8000), (16000, 4000)]
+    assert sorted(p.name for p in directory.glob("chunk_*")) == [c.file for c in reader.chunks]
+    assert reader.duration_s == 2.5
+
+    with open_recording_stream(directory) as stream:
+        data = stream.read()
+    assert len(data) == recording_stream_size(directory)
+    with wave.open(open_recording_stream(directory)) as wav:
+        assert (wav.getframerate(), wav.getnchannels(), wav.getnframes()) == (SAMPLERATE, 2, len(audio))
+        assert np.array_equal(np.frombuffer(wav.readframes(len(audio)), dtype=np.int16).reshape(-1, 2), audio)
+
+
+def test_float_blocks_are_converted_to_pcm16(workdir):
+    with ChunkedRecordingWriter(workdir / "rec", SAMPLERATE, 1) as writer:
+        writer.write(np.array([0.0, 0.5, -2.0], dtype=np.float32))
+
+    [view] = ChunkedRecordingReader(workdir / "rec").read_range(0)
+    assert view[:, 0].tolist() == [0, 16383, -32767]
+
+
+@pytest.mark.parametrize("start_s, end_s", [(0.0, None), (0.5, 1.5), (0.9, 2.1), (1.0, 2.0), (2.4, 9.0)])
+def test_read_range_maps_only_the_chunks_it_touches(recording, start_s, end_s):
+    directory, audio = recording
+    reader = ChunkedRecordingReader(directory)
+
+    views = reader.read_range(start_s, end_s)
+
+    end = len(audio) if end_s is None else min(len(audio), int(end_s * SAMPLERATE))
+    assert np.array_equal(np.concatenate(views), audio[int(start_s * SAMPLERATE):end])
+    assert all(isinstance(v, np.memmap) and not v.flags.writeable for v in views)
+
+
+def test_read_range_edges(recording):
+    directory, _ = recording
+
+    assert len(ChunkedRecordingReader(directory).read_range(0.9, 2.1)) == 3
+    assert ChunkedRecordingReader(directory).read_range(3.0) == []
+    assert ChunkedRecordingReader(directory).read_range(1.0, 1.0) == []
+
+
+def test_torn_manifest_tail_is_ignored_and_then_cut(recording):
+    directory, audio = recording
+    manifest = directory / MANIFEST_FILE
+    with open(manifest, "a") as f:
+        f.write('{"index": 3, "file": "chunk_0000')
+
+    assert ChunkedRecordingReader(directory).frames == len(audio)
+
+    reader = recover_recording(directory)
+    assert reader.frames == len(audio)
+    assert manifest.read_text().endswith("}\n")
+    assert len(manifest.read_text().splitlines()) == 3
+
+
+def crash_mid_chunk(directory, audio):
+    # A writer killed without close(): the open chunk is still a .part file, possibly ending mid-frame.
+    writer = ChunkedRecordingWriter(directory, SAMPLERATE, 2, chunk_seconds=1.0)
+    writer.write(audio)
+    writer._chunk.write(b"\x01")
+    writer._chunk.flush()
+    writer._manifest.close()
+
+
+def test_recovery_keeps_the_whole_frames_of_the_open_chunk(workdir):
+    audio = tone(1.7)
+    directory = workdir / "rec"
+    crash_mid_chunk(directory, audio)
+    (directory / "chunk_000007.pcm.part").write_bytes(b"\0" * 16)
+
+    assert ChunkedRecordingReader(directory).frames == 8000
+
+    reader = recover_recording(directory)
+
+    assert reader.frames == len(audio)
+    assert np.array_equal(np.concatenate(reader.read_range(0)), audio)
+    assert sorted(p.name for p in directory.glob("chunk_*")) == ["chunk_000000.pcm", "chunk_000001.pcm"]
+    assert recover_recording(directory).frames == len(audio)
+
+
+def test_recovery_commits_a_chunk_renamed_before_its_manifest_line(recording):
+    directory, audio = recording
+    manifest = directory / MANIFEST_FILE
+    lines = manifest.read_text().splitlines(keepends=True)
+    manifest.write_text("".join(lines[:-1]))
+
+    reader = recover_recording(directory)
+
+    assert reader.frames == len(audio)
+    assert [c.file for c in reader.chunks] == [json.loads(line)["file"] for line in lines]
+
+
+def test_server_startup_recovers_recordings_cut_off_by_a_crash(workdir):
+    store = RecordingStore(str(workdir / "recordings"))
+    job_id, path = store.allocate("m1")
+    audio = tone(1.2)
+    crash_mid_chunk(path, audio)
+
+    assert RecordingStore(str(workdir / "recordings")).recover_orphans() == [job_id]
+
+    assert ChunkedRecordingReader(path).frames == len(audio)
+    assert store.get(job_id).size_bytes >= audio.nbytes
+
+
+def test_wav_header_saturates_past_4_gib(recording):
+    directory, _ = recording
+    reader = ChunkedRecordingReader(directory)
+    reader.chunks = [ChunkEntry(0, "chunk_000000.pcm", 0, 2 ** 31, 0.0, 0.0)]
+
+    riff_size, = struct.unpack("<I", reader.wav_header()[4:8])
+    data_size, = struct.unpack("<I", reader.wav_header()[40:44])
+
+    assert (riff_size, data_size) == (WAV_MAX_SIZE, WAV_MAX_SIZE - 36)
@@ -0,0 +1,111 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.MeetingStatusResponse import MeetingStatus
+from app.services.recording_service import device_registry as registry_module
+from app.services.recording_service.device_registry import AudioDevice, AudioDeviceRegistry, DeviceInventory
+from app.workers import meeting_worker
+
+
+def inventory(names, generation):
+    devices = tuple(AudioDevice(i, name, "Core Audio", 16, 0, 48000.0) for i, name in enumerate(names))
+    by_name = {}
+    for dev in devices:
+        by_name.setdefault(dev.name.lower(), []).append(dev)
+    return DeviceInventory(devices, by_name, {"CORE AUDIO": list(devices)}, time.time(), 0.001, generation)
+
+
+@pytest.fixture
+def portaudio(monkeypatch):
+    # Stands in for sounddevice: the device list it reports, and every enumeration the registry asks for.
+    state = SimpleNamespace(names=["MacBook Microphone", "BlackHole 2ch"], calls=[])
+
+    def enumerate_devices(generation, *, reinitialize=False):
+        state.calls.append(reinitialize)
+        return inventory(list(state.names), generation)
+
+    monkeypatch.setattr(registry_module, "enumerate_devices", enumerate_devices)
+    monkeypatch.setattr(registry_module.platform, "system", lambda: "Darwin")
+    return state
+
+
+def test_one_enumeration_serves_every_join(portaudio):
+    registry = AudioDeviceRegistry()
+
+    resolved = [registry.resolve_loopback() for _ in range(5)]
+
+    assert portaudio.calls == [False]
+    assert {r.name for r in resolved} == {"BlackHole 2ch"}
+    assert resolved[0] is resolved[-1]
+    assert registry.device(1).name == "BlackHole 2ch"
+    with pytest.raises(ValueError):
+        registry.device(7)
+
+
+def test_invalidation_reinitializes_and_picks_up_a_hotplugged_device(portaudio):
+    registry = AudioDeviceRegistry()
+    first = registry.resolve_loopback()
+    portaudio.names = ["BlackHole 16ch", "MacBook Microphone", "BlackHole 2ch"]
+
+    assert registry.resolve_loopback() is first
+    registry.invalidate("stream open failed")
+    second = registry.resolve_loopback()
+
+    assert portaudio.calls == [False, True]
+    assert (second.name, second.index) == ("BlackHole 16ch", 0)
+    assert second.generation > first.generation
+
+
+def test_reinitialization_waits_while_a_recording_is_running(portaudio):
+    recording = [True]
+    registry = AudioDeviceRegistry(streams_open=lambda: recording[0])
+    registry.resolve_loopback()
+
+    registry.invalidate("device list changed")
+    registry.resolve_loopback()
+    recording[0] = False
+    registry.invalidate("device list changed")
+    registry.resolve_loopback()
+    registry.invalidate("device list changed")
+    registry.resolve_loopback()
+
+    # Re-init is deferred, not dropped, and a completed one is not repeated without a new invalidation.
+    assert portaudio.calls == [False, False, True, True]
+
+
+def test_inventory_ages_out(portaudio):
+    registry = AudioDeviceRegistry(max_age_s=60)
+    registry.resolve_loopback()
+    registry._inventory.enumerated_at -= 61
+
+    registry.resolve_loopback()
+
+    assert portaudio.calls == [False, False]
+    assert registry.enumerations == 2
+
+
+def test_worker_re_resolves_and_moves_the_browser_when_the_device_fails_to_open(offline_meeting, monkeypatch):
+    devices = iter([SimpleNamespace(name="BlackHole 2ch"), SimpleNamespace(name="BlackHole 16ch")])
+    selected, opened = [], []
+
+    async def select(page, name):
+        selected.append(name)
+
+    def start(output_path, device, **kwargs):
+        opened.append(device.name)
+        if len(opened) == 1:
+            raise OSError("PortAudio error: device unavailable")
+
+    monkeypatch.setattr(meeting_worker.device_registry, "resolve_loopback", lambda: next(devices))
+    monkeypatch.setattr(meeting_worker, "select_recording_device", select)
+    monkeypatch.setattr(meeting_worker, "start_recording", start)
+    sessions = offline_meeting.sessions("m1")
+
+    asyncio.run(meeting_worker.join_and_record_meeting("m1", sessions, batch_duration=5))
+
+    assert opened == ["BlackHole 2ch", "BlackHole 16ch"]
+    assert selected == ["BlackHole 2ch", "BlackHole 16ch"]
+    assert sessions["m1"].status == MeetingStatus.TRANSCRIBED
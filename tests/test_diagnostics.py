@@ -0,0 +1,97 @@
+import asyncio
+import json
+import zipfile
+
+from app.models.MeetingStatusResponse import MeetingStatus
+from app.utils.diagnostics import DiagnosticsRing
+from app.workers import meeting_worker
+
+
+class FailingPage:
+    url = "https://meet.google.com/abc-defg-hij"
+
+    def __init__(self, dom: str, screenshot_error: Exception = None):
+        self.dom = dom
+        self.screenshot_error = screenshot_error
+
+    async def screenshot(self, timeout):
+        if self.screenshot_error:
+            raise self.screenshot_error
+        return b"\x89PNG"
+
+    async def content(self):
+        return self.dom
+
+
+def test_ring_keeps_only_the_newest_actions_and_snapshots():
+    ring = DiagnosticsRing("m1", max_actions=3, max_snapshots=2)
+    for i in range(5):
+        ring.record("click", f"button-{i}", ok=i != 4, duration_ms=1.0, error=None if i != 4 else TimeoutError("x"))
+
+    async def capture():
+        for label in ("join", "approve", "record"):
+            await ring.capture_failure(FailingPage("<html/>"), label)
+
+    asyncio.run(capture())
+
+    assert [a[2] for a in ring.actions] == ["button-2", "button-3", "button-4"]
+    assert ring.actions[-1][5] == "TimeoutError('x')"
+    assert [s["label"] for s in ring.snapshots] == ["approve", "record"]
+
+
+def test_flush_writes_one_archive_and_empties_the_ring(workdir):
+    ring = DiagnosticsRing("m1", max_dom_bytes=10)
+    ring.record("goto", "meet", ok=True, duration_ms=812.345)
+    ring.record("click", "join", ok=False, duration_ms=5000.0, error=TimeoutError("join"))
+
+    async def capture():
+        await ring.capture_failure(FailingPage("<html>" + "x" * 100), "join")
+        await ring.capture_failure(FailingPage("", screenshot_error=RuntimeError("page closed")), "approve")
+
+    asyncio.run(capture())
+
+    target = ring.flush(workdir / "diagnostics")
+
+    assert [p.name for p in (workdir / "diagnostics").iterdir()] == [target.name]
+    with zipfile.ZipFile(target) as archive:
+        assert sorted(archive.namelist()) == ["meta.json", "snapshot_0_join.html", "snapshot_0_join.png", "trace.jsonl"]
+        meta = json.loads(archive.read("meta.json"))
+        trace = [json.loads(line) for line in archive.read("trace.jsonl").splitlines()]
+        assert archive.read("snapshot_0_join.html") == b"<html>xxxx"
+    assert meta["meeting_id"] == "m1"
+    assert [s["label"] for s in meta["snapshots"]] == ["join", "approve"]
+    assert meta["snapshots"][1]["error"] == "RuntimeError('page closed')"
+    assert [(t["action"], t["ok"], t["duration_ms"], t["error"]) for t in trace] == [
+        ("goto", True, 812.35, None),
+        ("click", False, 5000.0, "TimeoutError('join')"),
+    ]
+    assert not ring.actions and not ring.snapshots
+
+
+def test_discard_writes_nothing(workdir):
+    ring = DiagnosticsRing("m1")
+    ring.record("goto", "meet", ok=True, duration_ms=1.0)
+
+    ring.discard()
+
+    assert not ring.actions
+    assert not (workdir / "diagnostics").exists()
+
+
+def test_worker_keeps_diagnostics_only_for_crashed_meetings(offline_meeting, workdir, monkeypatch):
+    async def refuse(*args, **kwargs):
+        return False
+
+    sessions = offline_meeting.sessions("ok", "refused")
+
+    async def main():
+        await meeting_worker.join_and_record_meeting("ok", sessions, batch_duration=5)
+        monkeypatch.setattr(meeting_worker, "wait_for_approve", refuse)
+        await meeting_worker.join_and_record_meeting("refused", sessions, batch_duration=5)
+
+    asyncio.run(main())
+
+    assert sessions["refused"].status == MeetingStatus.CRASHED
+    archives = list((workdir / "app" / "logs" / "diagnostics").glob("*.zip"))
+    assert [a.name.split("-")[0] for a in archives] == ["refused"]
+    assert offline_meeting.page.failures == ["approve"]
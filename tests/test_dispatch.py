@@ -0,0 +1,230 @@
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app import main
+from app.models.MeetingStatusResponse import MeetingState, MeetingStatus
+from app.models.NodeInfo import NodeCapacity, NodeHeartbeat
+from app.services.dispatch_service import dispatch_service
+from app.services.dispatch_service.dispatch_service import NodeRegistry, forward_request, local_capacity
+
+from .conftest import ROOT
+
+WORKERS = 3
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn(workdir, port: int, **env) -> subprocess.Popen:
+    workdir.mkdir()
+    log = open(workdir / "server.log", "wb")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=workdir,
+        env={**os.environ, "PYTHONPATH": str(ROOT), **env},
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+
+
+def wait_for(predicate, timeout_s: float = 20.0):
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            if predicate():
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise TimeoutError("cluster did not come up")
+
+
+@pytest.fixture
+def cluster(workdir):
+    coordinator_port = free_port()
+    coordinator = f"http://127.0.0.1:{coordinator_port}"
+    processes = [spawn(workdir / "coordinator", coordinator_port, NODE_ROLE="coordinator")]
+    for i in range(WORKERS):
+        port = free_port()
+        processes.append(
+            spawn(
+                workdir / f"worker-{i}",
+                port,
+                NODE_ROLE="worker",
+                NODE_ID=f"worker-{i}",
+                NODE_URL=f"http://127.0.0.1:{port}",
+                COORDINATOR_URL=coordinator,
+                NODE_HEARTBEAT_S="0.2",
+                MAX_BROWSER_SLOTS="1",
+                MAX_AUDIO_SINKS="1",
+            )
+        )
+    try:
+        wait_for(lambda: len(httpx.get(f"{coordinator}/nodes").json()) == WORKERS)
+        yield coordinator
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+
+def schedule(coordinator: str, meeting_id: str) -> httpx.Response:
+    start_at = datetime.now(timezone.utc) + timedelta(minutes=10)
+    return httpx.post(
+        f"{coordinator}/schedule-meeting",
+        json={
+            "meeting_id": meeting_id,
+            "estimated_duration": 30,
+            "resume_url": f"http://n8n.local/resume/{meeting_id}",
+            "start_at": start_at.isoformat(),
+        },
+        timeout=10,
+    )
+
+
+def test_scheduled_meetings_spread_over_worker_processes(cluster):
+    for i in range(WORKERS):
+        assert schedule(cluster, f"m{i}").status_code == 200
+
+    # After the nodes report their bookings, every slot is still taken by a scheduled join.
+    time.sleep(1.0)
+    nodes = httpx.get(f"{cluster}/nodes").json()
+    assert sorted(m for n in nodes for m in n["meetings"]) == [f"m{i}" for i in range(WORKERS)]
+    assert all(len(n["meetings"]) == 1 and n["capacity"]["free_browser_slots"] == 0 for n in nodes)
+
+    overflow = schedule(cluster, "overflow")
+    assert overflow.status_code == 503
+
+    listed = httpx.get(f"{cluster}/meetings", params={"status": "scheduled"}).json()
+    assert sorted(m["meeting_id"] for m in listed) == [f"m{i}" for i in range(WORKERS)]
+
+    events = []
+    with httpx.stream("GET", f"{cluster}/meetings/events", timeout=10) as response:
+        for line in response.iter_lines():
+            if line.startswith("data: "):
+                events.append(json.loads(line[len("data: "):]))
+            if len(events) == WORKERS:
+                break
+    assert sorted(e["meeting_id"] for e in events) == [f"m{i}" for i in range(WORKERS)]
+    assert {e["status"] for e in events} == {"scheduled"}
+
+
+def test_scheduled_join_counts_against_capacity_only_near_its_window(monkeypatch):
+    monkeypatch.setenv("MAX_BROWSER_SLOTS", "2")
+    monkeypatch.setenv("CAPACITY_HORIZON_S", "3600")
+    now = time.time()
+    sessions = {
+        "soon": MeetingState(status=MeetingStatus.SCHEDULED, resume_url="", join_window=(now + 600, now + 4200)),
+        "tomorrow": MeetingState(
+            status=MeetingStatus.SCHEDULED, resume_url="", join_window=(now + 86400, now + 90000)
+        ),
+    }
+
+    capacity = local_capacity(sessions)
+
+    assert capacity.free_browser_slots == 1
+    assert capacity.free_audio_sinks == 0
+
+
+def heartbeat(node_id: str) -> NodeHeartbeat:
+    return NodeHeartbeat(
+        node_id=node_id,
+        url=f"http://{node_id}.local",
+        capacity=NodeCapacity(browser_slots=1, free_browser_slots=1, audio_sinks=1, free_audio_sinks=1, load=0.0),
+    )
+
+
+def test_forward_passes_non_json_error_bodies_through(monkeypatch):
+    transport = httpx.MockTransport(lambda request: httpx.Response(502, text="<html>Bad Gateway</html>"))
+    client = httpx.AsyncClient
+    monkeypatch.setattr(dispatch_service.httpx, "AsyncClient", lambda **kwargs: client(transport=transport, **kwargs))
+
+    status_code, body = asyncio.run(forward_request(NodeRegistry().heartbeat(heartbeat("n1")), "GET", "/meetings/m1"))
+
+    assert (status_code, body) == (502, "<html>Bad Gateway</html>")
+
+
+def test_failed_forward_releases_the_placement(monkeypatch):
+    registry = NodeRegistry()
+    registry.heartbeat(heartbeat("n1"))
+
+    async def unreachable(*args, **kwargs):
+        raise httpx.ConnectError("connection refused")
+
+    monkeypatch.setattr(main, "node_registry", registry)
+    monkeypatch.setattr(main, "forward_request", unreachable)
+
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(main.dispatch_to_node("m1", "POST", "/join-meeting", json={}, place=True))
+
+    assert raised.value.status_code == 502
+    assert registry.node_for("m1") is None
+
+
+def test_heartbeat_outlives_failures_that_are_not_http_errors(monkeypatch):
+    posts = []
+
+    def coordinator(request):
+        posts.append(json.loads(request.content)["node_id"])
+        if len(posts) == 2:
+            raise httpx.InvalidURL("coordinator answered with a redirect to a malformed URL")
+        return httpx.Response(200, json={})
+
+    transport = httpx.MockTransport(coordinator)
+    client = httpx.AsyncClient
+    monkeypatch.setattr(dispatch_service.httpx, "AsyncClient", lambda **kwargs: client(transport=transport, **kwargs))
+    monkeypatch.setenv("COORDINATOR_URL", "http://coordinator.local")
+    monkeypatch.setenv("NODE_URL", "http://n1.local")
+    monkeypatch.setenv("NODE_ID", "n1")
+    probes = []
+
+    def capacity(sessions):
+        probes.append(None)
+        if len(probes) == 1:
+            raise RuntimeError("loadavg unavailable")
+        return heartbeat("n1").capacity
+
+    async def beat():
+        task = asyncio.create_task(dispatch_service.run_heartbeat({}, interval_s=0.01, capacity=capacity))
+        while len(posts) < 4 and not task.done():
+            await asyncio.sleep(0.01)
+        task.cancel()
+        return await asyncio.gather(task, return_exceptions=True)
+
+    [outcome] = asyncio.run(beat())
+
+    assert isinstance(outcome, asyncio.CancelledError)
+    assert posts == ["n1"] * 4
+    assert len(probes) == 5
+
+
+def test_lifespan_reports_a_background_task_that_dies(monkeypatch):
+    async def broken():
+        raise RuntimeError("Worker node requires COORDINATOR_URL and NODE_URL")
+
+    errors = []
+    monkeypatch.setattr(main.logger, "error", lambda msg, *args, **kwargs: errors.append(msg % args))
+
+    async def run():
+        task = asyncio.create_task(broken(), name="heartbeat")
+        task.add_done_callback(main.report_background_failure)
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+
+    assert errors == ["Background task heartbeat stopped: RuntimeError('Worker node requires COORDINATOR_URL and NODE_URL')"]
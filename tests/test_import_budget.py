@@ -0,0 +1,48 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from .conftest import ROOT
+
+HEAVY_MODULES = ("numpy", "playwright", "pydub", "sounddevice", "elevenlabs")
+MAX_MODULES = 700
+
+PROBE = """
+import json, sys
+import app.main
+print(json.dumps({
+    "modules": len(sys.modules),
+    "heavy": sorted(m for m in %r if m in sys.modules),
+}))
+""" % (HEAVY_MODULES,)
+
+
+def import_app(tmp_path, **env) -> dict:
+    # A fresh interpreter: the test process itself has long imported everything.
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=tmp_path,
+        env={**os.environ, "PYTHONPATH": str(ROOT), **env},
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=60,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("profile", ["full", "api"])
+def test_importing_the_app_loads_no_heavy_dependency(tmp_path, profile):
+    probe = import_app(tmp_path, APP_PROFILE=profile, JIRA_DUPLICATE_POLICY="skip")
+
+    assert probe["heavy"] == []
+    assert probe["modules"] < MAX_MODULES
+
+
+def test_import_touches_no_files(tmp_path):
+    import_app(tmp_path)
+
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import random
+import threading
+
+import httpx
+import pytest
+
+from app.models.JiraTaskRequest import JiraBug, JiraFeature, JiraTaskRequest
+from app.services import jira_service
+from app.services.issue_index_service.duplicate_index import DuplicateIndex, IssueText
+
+EXISTING = IssueText(
+    "MB-7",
+    "Export meeting transcript to PDF",
+    "Users can download the meeting transcript as a PDF file with speaker names and timestamps.",
+)
+
+
+def feature(name: str, description: str) -> JiraFeature:
+    return JiraFeature(
+        feature_name=name, feature_description=description, acceptance_criteria="", story_points=3,
+        assigned_to="Jakub", tasks=[],
+    )
+
+
+def bug(name: str, description: str) -> JiraBug:
+    return JiraBug(
+        bug_name=name, bug_description=description, reproduction_steps="", story_points=1, assigned_to="Jakub",
+    )
+
+
+REPHRASED = feature(
+    "Export the meeting transcript as PDF",
+    "Users should be able to download the meeting transcript as a PDF file with speaker names and timestamps",
+)
+UNRELATED = feature("Add dark mode to the settings page", "Toggle between light and dark themes in the settings")
+
+
+@pytest.fixture
+def jira(workdir, monkeypatch):
+    index = DuplicateIndex(str(workdir / "issues.db"))
+    created = []
+    searches = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content or b"{}")
+        if request.url.path == "/rest/api/3/search/jql":
+            searches.append(body["jql"])
+            issue = {
+                "key": EXISTING.key,
+                "fields": {
+                    "summary": EXISTING.summary,
+                    "description": {"type": "doc", "content": [
+                        {"type": "paragraph", "content": [{"type": "text", "text": EXISTING.description}]}
+                    ]},
+                    "status": {"statusCategory": {"key": "indeterminate"}},
+                },
+            }
+            return httpx.Response(200, json={"issues": [issue], "isLast": True})
+        created.append(body["fields"])
+        return httpx.Response(201, json={"key": f"MB-{100 + len(created)}"})
+
+    real = httpx.AsyncClient
+    monkeypatch.setattr(jira_service.httpx, "AsyncClient", lambda **kw: real(transport=httpx.MockTransport(handler), **kw))
+    monkeypatch.setenv("JIRA_SERVICE_URL", "http://jira.local")
+    monkeypatch.setenv("JIRA_API_MAIL", "bot@example.com")
+    monkeypatch.setenv("JIRA_API_TOKEN", "token")
+    monkeypatch.setattr(jira_service, "duplicate_index", index)
+    monkeypatch.setattr(jira_service, "_index_sync_lock", None)
+    return index, created, searches
+
+
+def request_of(*features, bugs=()):
+    return JiraTaskRequest(summary="Weekly sync", features=list(features), bugs=list(bugs))
+
+
+def test_near_duplicate_of_an_open_issue_is_skipped(jira, monkeypatch):
+    index, created, searches = jira
+    monkeypatch.setattr(jira_service, "DUPLICATE_POLICY", "skip")
+
+    asyncio.run(jira_service._create_issues(request_of(REPHRASED, UNRELATED)))
+
+    assert len(searches) == 1 and "statusCategory != Done" in searches[0]
+    assert [f["summary"] for f in created] == [UNRELATED.feature_name]
+    # The new issue is indexed at once, so asking for it again is caught without another sync.
+    assert [m.key for m in index.find(UNRELATED.feature_name, UNRELATED.feature_description)] == ["MB-101"]
+
+
+def test_flag_policy_creates_the_issue_with_a_note(jira, monkeypatch):
+    _, created, _ = jira
+    monkeypatch.setattr(jira_service, "DUPLICATE_POLICY", "flag")
+
+    asyncio.run(jira_service._create_issues(request_of(REPHRASED, bugs=[bug("Crash on join", "Bot crashes when joining")])))
+
+    story = next(f for f in created if f["summary"] == REPHRASED.feature_name)
+    note = story["description"]["content"][-1]["content"][0]["text"]
+    assert note.startswith("Possible duplicate of: MB-7 (")
+    crash = next(f for f in created if f["summary"] == "Crash on join")
+    assert "Possible duplicate" not in json.dumps(crash)
+
+
+def test_off_policy_neither_syncs_nor_checks(jira, monkeypatch):
+    index, created, searches = jira
+    monkeypatch.setattr(jira_service, "DUPLICATE_POLICY", "off")
+    index.apply([EXISTING])
+
+    asyncio.run(jira_service._create_issues(request_of(REPHRASED)))
+
+    assert searches == []
+    assert [f["summary"] for f in created] == [REPHRASED.feature_name]
+    assert "Possible duplicate" not in json.dumps(created)
+
+
+def test_duplicate_lookups_run_off_the_event_loop(jira, monkeypatch):
+    index, _, _ = jira
+    monkeypatch.setattr(jira_service, "DUPLICATE_POLICY", "skip")
+    threads = []
+    find = index.find
+
+    def recording_find(*args, **kwargs):
+        threads.append(threading.get_ident())
+        return find(*args, **kwargs)
+
+    monkeypatch.setattr(index, "find", recording_find)
+
+    async def run():
+        await jira_service._create_issues(request_of(REPHRASED, UNRELATED))
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(run())
+    assert len(threads) == 2 and loop_thread not in threads
+
+
+def test_rephrased_issue_is_found_among_thousands(workdir):
+    rng = random.Random(7)
+    vocab = [f"term{i}" for i in range(3000)]
+    index = DuplicateIndex(str(workdir / "issues.db"))
+    index.apply(
+        [IssueText(f"BULK-{i}", " ".join(rng.sample(vocab, 5)), " ".join(rng.sample(vocab, 15))) for i in range(5000)]
+        + [EXISTING]
+    )
+
+    matches = index.find(REPHRASED.feature_name, REPHRASED.feature_description)
+    assert [m.key for m in matches] == ["MB-7"] and matches[0].similarity >= index.threshold
+    assert index.find(UNRELATED.feature_name, UNRELATED.feature_description) == []
+
+    # Reloaded from SQLite, the index answers the same way.
+    reloaded = DuplicateIndex(str(workdir / "issues.db"))
+    assert len(reloaded) == 5001
+    assert [m.key for m in reloaded.find(REPHRASED.feature_name, REPHRASED.feature_description)] == ["MB-7"]
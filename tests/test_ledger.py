@@ -0,0 +1,125 @@
+import asyncio
+import sqlite3
+from datetime import datetime
+
+import httpx
+import pytest
+
+from app import main
+from app.models.MeetingLedger import MeetingLedger
+from app.models.MeetingStatusResponse import MeetingState, MeetingStatus
+from app.services.ledger_service.ledger_store import LedgerStore, merge_ledgers
+
+DAY = datetime(2026, 3, 2, 10).timestamp()
+
+
+@pytest.fixture
+def store(workdir):
+    return LedgerStore(str(workdir / "ledger.db"))
+
+
+def take(meeting_id: str, started_at: float, **costs) -> MeetingLedger:
+    return MeetingLedger(meeting_id=meeting_id, status="processed", started_at=started_at, **costs)
+
+
+def test_rejoined_meeting_keeps_every_take(store):
+    first = MeetingState(status=MeetingStatus.CRASHED, resume_url="r", meeting_id="m1")
+    second = MeetingState(status=MeetingStatus.RECORDING, resume_url="r", meeting_id="m1")
+    first.ledger.browser_cpu_s = 30.0
+    second.ledger.browser_cpu_s = 50.0
+    second.ledger.started_at = first.ledger.started_at + 600
+    store.save(first.ledger)
+    store.save(second.ledger)
+    # Saved again on the next status change: still one row per take.
+    second.status = MeetingStatus.TRANSCRIBED
+    store.save(second.ledger)
+
+    runs = store.runs("m1")
+    assert [r.run_id for r in runs] == [first.ledger.run_id, second.ledger.run_id]
+    assert [r.status for r in runs] == ["crashed", "transcribed"]
+    assert store.get("m1").run_id == second.ledger.run_id
+    assert store.get("missing") is None
+
+
+def test_rollup_sums_takes_but_counts_meetings_once(store):
+    store.save(take("m1", DAY, browser_cpu_s=30.0, stt_attempts=1, browser_peak_rss_mb=400.0))
+    store.save(take("m1", DAY + 600, browser_cpu_s=50.0, stt_attempts=2, browser_peak_rss_mb=650.0))
+    store.save(take("m2", DAY + 60, browser_cpu_s=70.0, stt_attempts=1, browser_peak_rss_mb=500.0))
+    store.save(take("m3", DAY + 86400, browser_cpu_s=5.0))
+
+    first_day, second_day = store.rollup(group_by="day")
+    assert (first_day.key, first_day.meetings, first_day.runs) == ("2026-03-02", 2, 3)
+    assert first_day.totals["browser_cpu_s"] == 150.0
+    assert first_day.totals["stt_attempts"] == 4
+    assert first_day.totals["browser_peak_rss_mb"] == 650.0
+    assert (second_day.meetings, second_day.runs) == (1, 1)
+
+    (by_status,) = store.rollup(group_by="status", since=DAY, until=DAY + 3600)
+    assert (by_status.key, by_status.meetings, by_status.runs) == ("processed", 2, 3)
+
+
+def test_top_ranks_meetings_by_their_combined_takes(store):
+    store.save(take("m1", DAY, browser_cpu_s=30.0, stt_attempts=1, browser_peak_rss_mb=400.0))
+    store.save(take("m1", DAY + 600, browser_cpu_s=50.0, stt_attempts=2, browser_peak_rss_mb=650.0))
+    store.save(take("m2", DAY + 60, browser_cpu_s=70.0, stt_attempts=1, browser_peak_rss_mb=700.0))
+    store.save(take("m3", DAY + 120, browser_cpu_s=5.0))
+
+    top = store.top("browser_cpu_s", limit=2)
+    assert [(l.meeting_id, l.browser_cpu_s) for l in top] == [("m1", 80.0), ("m2", 70.0)]
+    combined = top[0]
+    assert combined.stt_attempts == 3 and isinstance(combined.stt_attempts, int)
+    assert combined.started_at == DAY
+    assert combined.run_id == store.get("m1").run_id
+
+    # Peaks keep the maximum over takes instead of adding them up.
+    assert [l.meeting_id for l in store.top("browser_peak_rss_mb")] == ["m2", "m1", "m3"]
+    assert store.top("browser_peak_rss_mb")[1].browser_peak_rss_mb == 650.0
+
+    # Only takes started inside the window count.
+    assert [(l.meeting_id, l.browser_cpu_s) for l in store.top("browser_cpu_s", since=DAY + 300)] == [("m1", 50.0)]
+    with pytest.raises(ValueError):
+        store.top("meeting_id")
+
+
+def test_meeting_keyed_database_is_migrated(workdir):
+    path = workdir / "ledger.db"
+    old = take("m1", DAY, browser_cpu_s=12.0)
+    db = sqlite3.connect(path)
+    db.executescript(
+        "CREATE TABLE ledgers (meeting_id TEXT PRIMARY KEY, started_at REAL NOT NULL, updated_at REAL NOT NULL,"
+        " status TEXT, data TEXT NOT NULL);"
+    )
+    db.execute(
+        "INSERT INTO ledgers VALUES (?, ?, ?, ?, ?)",
+        ("m1", DAY, DAY, "processed", old.model_dump_json(exclude={"run_id", "job_id"})),
+    )
+    db.commit()
+    db.close()
+
+    store = LedgerStore(str(path))
+    store.save(take("m1", DAY + 600, browser_cpu_s=8.0))
+    runs = store.runs("m1")
+    assert [r.run_id for r in runs][0] == "m1" and len(runs) == 2
+    assert store.top("browser_cpu_s")[0].browser_cpu_s == 20.0
+    # Reopening finds nothing left to migrate.
+    assert len(LedgerStore(str(path)).runs("m1")) == 2
+
+
+def test_coordinator_merges_takes_reported_by_different_nodes(monkeypatch):
+    first = take("m1", DAY, browser_cpu_s=30.0)
+    second = take("m1", DAY + 600, browser_cpu_s=50.0)
+    other = take("m2", DAY, browser_cpu_s=70.0)
+
+    async def gather(path, params):
+        return [[first.model_dump(), other.model_dump()], [second.model_dump()]]
+
+    monkeypatch.setattr(main, "is_coordinator", lambda: True)
+    monkeypatch.setattr(main, "gather_from_nodes", gather)
+
+    async def get_top():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bot") as client:
+            return await client.get("/ledger/top", params={"metric": "browser_cpu_s"})
+
+    response = asyncio.run(get_top())
+    assert [(l["meeting_id"], l["browser_cpu_s"]) for l in response.json()] == [("m1", 80.0), ("m2", 70.0)]
+    assert merge_ledgers([second, first]).run_id == second.run_id
@@ -0,0 +1,112 @@
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from app.models.MeetingStatusResponse import MeetingStatus
+from app.utils import ResourceScope, close_open_scopes
+from app.utils import lifecycle
+from app.workers import meeting_worker
+
+MEETINGS = 10
+
+
+def child_process() -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+
+
+def stop(process: subprocess.Popen):
+    process.terminate()
+    process.wait(timeout=5)
+
+
+@pytest.fixture
+def leaky_browsers(offline_meeting, monkeypatch):
+    # Each fake driver and browser owns a real child process, the way Playwright's node driver and Chromium do.
+    processes = []
+
+    async def connect(meeting_url, diagnostics, resources):
+        driver, browser = child_process(), child_process()
+        processes.extend([driver, browser])
+        resources.add("playwright", lambda: stop(driver))
+        resources.add("browser", lambda: stop(browser))
+        resources.add("page", lambda: None, timeout_s=5.0)
+        if meeting_url.endswith("-crash"):
+            raise RuntimeError("page crashed while joining")
+        return offline_meeting.page, offline_meeting.browser
+
+    alive_at_stt = []
+
+    async def process(meeting_id, active_sessions, audio_path):
+        alive_at_stt.append(sum(p.poll() is None for p in processes[-2:]))
+        active_sessions[meeting_id].status = MeetingStatus.TRANSCRIBED
+
+    monkeypatch.setattr(meeting_worker, "connect_meeting", connect)
+    monkeypatch.setattr(meeting_worker, "process_and_send_recording", process)
+    offline_meeting.processes = processes
+    offline_meeting.alive_at_stt = alive_at_stt
+    return offline_meeting
+
+
+def test_meetings_leave_no_processes_threads_or_scopes_behind(leaky_browsers):
+    threads_before = set(threading.enumerate())
+    meeting_ids = [f"m{i}" if i % 3 else f"m{i}-crash" for i in range(MEETINGS)]
+    sessions = leaky_browsers.sessions(*meeting_ids)
+
+    async def main():
+        for meeting_id in meeting_ids:
+            await meeting_worker.join_and_record_meeting(meeting_id, sessions, batch_duration=5)
+
+    asyncio.run(main())
+
+    crashed = [m for m in meeting_ids if m.endswith("-crash")]
+    assert [m for m in meeting_ids if sessions[m].status == MeetingStatus.CRASHED] == crashed
+    # Browser and driver were gone before every STT run started.
+    assert leaky_browsers.alive_at_stt == [0] * (MEETINGS - len(crashed))
+    assert [p for p in leaky_browsers.processes if p.poll() is None] == []
+    assert len(leaky_browsers.processes) == 2 * MEETINGS
+    assert lifecycle._open_scopes == set()
+    leftover = [t for t in threading.enumerate() if t not in threads_before and not t.name.startswith("meeting-blocking")]
+    assert leftover == []
+
+
+def test_a_hanging_release_is_abandoned_and_the_rest_still_released():
+    released = []
+    hang = threading.Event()
+
+    async def main():
+        scope = ResourceScope("meeting:m1", default_timeout_s=0.2)
+        scope.add("driver", lambda: released.append("driver"))
+        scope.add("browser", hang.wait)
+        scope.add("page", lambda: released.append("page"))
+        started = time.monotonic()
+        try:
+            await scope.aclose()
+            return time.monotonic() - started
+        finally:
+            # Lets the abandoned release thread finish; asyncio.run waits for the executor on exit.
+            hang.set()
+
+    elapsed = asyncio.run(main())
+
+    assert released == ["page", "driver"]
+    assert elapsed < 1.0
+    assert lifecycle._open_scopes == set()
+
+
+def test_shutdown_closes_scopes_of_meetings_still_running():
+    processes = [child_process() for _ in range(3)]
+
+    async def main():
+        for i, process in enumerate(processes):
+            scope = ResourceScope(f"meeting:m{i}")
+            scope.add("browser", lambda p=process: stop(p))
+        await close_open_scopes(timeout_s=10)
+
+    asyncio.run(main())
+
+    assert [p.poll() is None for p in processes] == [False] * 3
+    assert lifecycle._open_scopes == set()
@@ -0,0 +1,93 @@
+import logging
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.utils import LogThrottle, meeting_context
+from app.utils import logger as logger_module
+from app.utils.logger import setup_logger
+
+
+class Recorder(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(logger_module, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+@pytest.fixture
+def recorded():
+    logger = logging.getLogger("test-throttle")
+    logger.handlers.clear()
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    handler = Recorder()
+    logger.addHandler(handler)
+    return logger, handler
+
+
+def test_throttle_emits_once_per_interval_and_counts_what_it_dropped(clock, recorded):
+    logger, handler = recorded
+    throttle = LogThrottle(logger, interval_s=5.0)
+
+    results = [throttle.warning("Audio stream status: %s", "overflow", key="status") for _ in range(4)]
+    clock[0] += 5.0
+    results.append(throttle.warning("Audio stream status: %s", "underflow", key="status"))
+
+    assert results == [True, False, False, False, True]
+    assert handler.messages == [
+        "Audio stream status: overflow",
+        "Audio stream status: underflow [3 similar messages suppressed]",
+    ]
+
+
+def test_throttle_keys_are_independent_and_disabled_levels_cost_nothing(clock, recorded):
+    logger, handler = recorded
+    throttle = LogThrottle(logger, interval_s=5.0)
+
+    assert throttle.warning("click failed", key="a")
+    assert throttle.warning("click failed", key="b")
+    assert not throttle.debug("frame %s", 1)
+    clock[0] += 1.0
+    assert not throttle.warning("click failed", key="a")
+
+    assert handler.messages == ["click failed", "click failed"]
+    assert throttle._suppressed == {"a": 1}
+
+
+def wait_for(predicate, timeout_s: float = 5.0):
+    deadline = time.monotonic() + timeout_s
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_records_are_formatted_and_written_on_the_listener_thread(workdir):
+    log_file = workdir / "logs" / "app.log"
+    logger = setup_logger("test-listener", log_file=str(log_file))
+    formatted_on = []
+
+    class Arg:
+        def __str__(self):
+            formatted_on.append(threading.current_thread())
+            return "payload"
+
+    # The file is opened with the first record that reaches it, not when the logger is built.
+    assert not log_file.parent.exists()
+    with meeting_context("abc-defg-hij"):
+        logger.info("Delivered %s", Arg())
+
+    assert wait_for(lambda: log_file.exists() and "Delivered payload" in log_file.read_text())
+    assert threading.current_thread() not in formatted_on
+    assert log_file.read_text().strip().endswith("(meeting_id=abc-defg-hij)")
@@ -0,0 +1,73 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.MeetingStatusResponse import MeetingStatus
+from app.utils import LoopLagMonitor
+from app.workers import meeting_worker
+
+RECORDER_STOP_S = 1.0
+
+
+def block_the_loop(seconds: float):
+    time.sleep(seconds)
+
+
+def test_monitor_reports_a_blocking_call_with_its_stack():
+    async def main():
+        monitor = LoopLagMonitor(interval_s=0.02, threshold_s=0.1)
+        monitor.start()
+        await asyncio.sleep(0.1)
+        block_the_loop(0.4)
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+        return monitor
+
+    monitor = asyncio.run(main())
+
+    assert monitor.stalls_total == 1
+    assert monitor.max_lag_s >= 0.3
+    assert "block_the_loop" in monitor.stalls[0].stack
+
+
+@pytest.fixture
+def slow_recorder_session(offline_meeting, monkeypatch):
+    def resolve_loopback():
+        block_the_loop(0.3)
+        return SimpleNamespace(name="Loopback")
+
+    def start(**kwargs):
+        block_the_loop(0.5)
+
+    def stop(timeout_s):
+        block_the_loop(RECORDER_STOP_S)
+        return "recording"
+
+    monkeypatch.setattr(meeting_worker.device_registry, "resolve_loopback", resolve_loopback)
+    monkeypatch.setattr(meeting_worker, "start_recording", start)
+    monkeypatch.setattr(meeting_worker, "stop_recording", stop)
+    monkeypatch.setattr(meeting_worker, "wav_duration", lambda path: 1.0)
+    offline_meeting.meeting_length_s = 0.3
+    return offline_meeting
+
+
+def test_slow_recorder_calls_do_not_stall_the_loop(slow_recorder_session):
+    sessions = slow_recorder_session.sessions("abc-defg-hij")
+
+    async def main():
+        monitor = LoopLagMonitor(interval_s=0.02, threshold_s=0.1)
+        monitor.start()
+        started = time.monotonic()
+        await meeting_worker.join_and_record_meeting("abc-defg-hij", sessions, batch_duration=5)
+        elapsed = time.monotonic() - started
+        await monitor.stop()
+        return monitor, elapsed
+
+    monitor, elapsed = asyncio.run(main())
+
+    assert elapsed >= RECORDER_STOP_S
+    assert sessions["abc-defg-hij"].status == MeetingStatus.TRANSCRIBED
+    assert monitor.stalls_total == 0, [s.stack for s in monitor.stalls]
+    assert monitor.max_lag_s < 0.1
@@ -0,0 +1,134 @@
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+from app.models.MeetingStatusResponse import MeetingStatus
+from app.services.meeting_service.participants import PARTICIPANT_OBSERVER_JS, AlonePolicy, ParticipantTracker
+from app.workers import meeting_worker
+
+FIXTURE = Path(__file__).parent / "fixtures" / "meet_participants.html"
+
+
+def test_observer_counts_participants_in_the_call_grid():
+    async_api = pytest.importorskip("playwright.async_api")
+    from app.utils import PlaywrightWrapper
+
+    async def main():
+        async with async_api.async_playwright() as p:
+            try:
+                browser = await p.chromium.launch(headless=True)
+            except Exception as e:
+                pytest.skip(f"Chromium not available: {str(e).splitlines()[0]}")
+            try:
+                page = await browser.new_page()
+                await page.goto(FIXTURE.as_uri())
+                tracker = ParticipantTracker(debounce_ms=50)
+                pushes = []
+                on_count = tracker.on_count
+                tracker.on_count = lambda source, count: (pushes.append(count), on_count(source, count))
+                await tracker.attach(PlaywrightWrapper(page, 3000))
+                await page.wait_for_timeout(150)
+                for step in ("noise()", "leave('piotr')", "leave('anna')"):
+                    await page.evaluate(step)
+                    await page.wait_for_timeout(150)
+                return pushes, tracker
+            finally:
+                await browser.close()
+
+    pushes, tracker = asyncio.run(main())
+
+    # The presenter's second tile is one participant; unrelated DOM churn pushes nothing.
+    assert pushes == [3, 2, 1]
+    assert tracker.peak == 3
+    assert tracker.alone_since is not None
+
+
+class ScriptedCallPage:
+    # Replays a participant count timeline through the binding the observer script would call.
+    def __init__(self, timeline):
+        self.timeline = timeline
+        self.page = self
+        self.failures = []
+        self._sink = None
+        self._replay = None
+
+    async def expose_binding(self, name, callback):
+        self._sink = callback
+
+    async def evaluate(self, script, arg=None):
+        assert script == PARTICIPANT_OBSERVER_JS
+        self._replay = asyncio.create_task(self._play())
+
+    async def _play(self):
+        for delay_s, count in self.timeline:
+            await asyncio.sleep(delay_s)
+            self._sink({"frame": None}, count)
+
+    async def capture_failure(self, label: str):
+        self.failures.append(label)
+
+
+@pytest.fixture
+def call(offline_meeting, monkeypatch):
+    left = []
+
+    async def leave(page):
+        left.append(page)
+
+    monkeypatch.setattr(meeting_worker, "leave_meeting", leave)
+    monkeypatch.setenv("ALONE_LEAVE_AFTER_S", "0.3")
+    monkeypatch.setenv("EMPTY_ROOM_LEAVE_AFTER_S", "0.6")
+    offline_meeting.meeting_length_s = 5.0
+    offline_meeting.left = left
+    return offline_meeting
+
+
+def run_meeting(call, timeline):
+    call.page = ScriptedCallPage(timeline)
+    sessions = call.sessions("m1")
+    started = time.monotonic()
+    asyncio.run(meeting_worker.join_and_record_meeting("m1", sessions, batch_duration=10))
+    return sessions["m1"], time.monotonic() - started
+
+
+def test_bot_leaves_once_everyone_else_has_left(call):
+    state, elapsed = run_meeting(call, [(0.0, 3), (0.1, 2), (0.1, 1)])
+
+    assert call.left == [call.page]
+    assert elapsed < 2.0
+    assert state.status == MeetingStatus.TRANSCRIBED
+    assert call.processed == [("m1", state.audio_path)]
+
+
+def test_someone_returning_resets_the_alone_timer(call):
+    state, elapsed = run_meeting(call, [(0.0, 2), (0.05, 1), (0.2, 2), (0.2, 1)])
+
+    assert call.left == [call.page]
+    assert elapsed > 0.45 + 0.3
+    assert state.status == MeetingStatus.TRANSCRIBED
+
+
+def test_empty_room_gets_the_longer_grace(call):
+    state, elapsed = run_meeting(call, [(0.0, 1)])
+
+    assert call.left == [call.page]
+    assert 0.6 <= elapsed < 2.0
+    assert state.status == MeetingStatus.TRANSCRIBED
+
+
+def test_unknown_count_never_ends_the_call(call):
+    call.meeting_length_s = 1.0
+    state, elapsed = run_meeting(call, [])
+
+    assert call.left == []
+    assert elapsed >= 1.0
+    assert state.status == MeetingStatus.TRANSCRIBED
+
+
+def test_alone_policy_reads_its_thresholds_from_the_environment(monkeypatch):
+    monkeypatch.setenv("ALONE_LEAVE_AFTER_S", "0")
+    monkeypatch.setenv("EMPTY_ROOM_LEAVE_AFTER_S", "1800")
+
+    assert AlonePolicy.from_env() == AlonePolicy(leave_after_s=0.0, empty_room_leave_after_s=1800.0)
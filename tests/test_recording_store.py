@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import os
+import time
+
+import pytest
+
+from app.models.MeetingStatusResponse import MeetingState, MeetingStatus
+from app.services.recording_service.chunked_recording import open_recording_stream
+from app.services.storage_service.recording_store import COLD, RecordingStore
+from app.services.transcription_service import transcription_service
+from app.workers import meeting_worker
+
+from .conftest import write_recording
+
+
+def fake_compress(store: RecordingStore):
+    # ffmpeg stand-in: the "cold" blob is the WAV stream itself, stored under its content hash.
+    def compress(source):
+        with open_recording_stream(source) as stream:
+            data = stream.read()
+        sha = hashlib.sha256(data).hexdigest()
+        blob = store.root / "blobs" / f"{sha}.mp3"
+        blob.write_bytes(data)
+        return blob, sha, len(data)
+
+    return compress
+
+
+@pytest.fixture
+def store(workdir, monkeypatch):
+    store = RecordingStore(str(workdir / "recordings"), cold_after_s=0)
+    monkeypatch.setattr(store, "_compress", fake_compress(store))
+    monkeypatch.setattr(transcription_service, "recording_store", store)
+    return store
+
+
+def test_download_follows_a_recording_into_the_cold_tier(store, monkeypatch):
+    job_id, hot_path = store.allocate("m1")
+    write_recording(hot_path)
+    store.mark_complete(job_id)
+    assert store.compact_once() == 1
+    assert not os.path.exists(hot_path)
+
+    uploads = []
+
+    def upload(url, open_stream, *, total, filename, **kwargs):
+        with open_stream() as stream:
+            uploads.append((url, filename, len(stream.read()), total))
+
+        class Response:
+            def json(self):
+                return {"ok": True}
+
+        return Response()
+
+    monkeypatch.setattr(transcription_service, "upload_stream", upload)
+    state = MeetingState(
+        status=MeetingStatus.FINISHED, resume_url="http://n8n.local/resume/m1", meeting_id="m1",
+        audio_path=hot_path, job_id=job_id,
+    )
+    accessed_before = store.get(job_id).last_access
+    time.sleep(0.01)
+
+    transcription_service.send_audio_for_transcription({"m1": state}, "m1", None, "multipart")
+
+    stored = store.get(job_id)
+    assert stored.tier == COLD
+    assert uploads == [("http://n8n.local/resume/m1", "m1_record.mp3", stored.size_bytes, stored.size_bytes)]
+    assert stored.last_access > accessed_before
+    assert state.status == MeetingStatus.TRANSCRIBED
+
+
+def test_active_recording_is_neither_compacted_nor_evicted(store):
+    job_id, hot_path = store.allocate("m1")
+    write_recording(hot_path)
+    store.budget_bytes = -1
+
+    assert store.compact_once() == 0
+    assert store.evict_once() == 0
+    assert os.path.exists(hot_path)
+    assert store.get(job_id).active
+
+
+def test_least_recently_read_recording_is_evicted_first(store):
+    jobs = []
+    for meeting_id in ("m1", "m2"):
+        job_id, path = store.allocate(meeting_id)
+        write_recording(path)
+        store.mark_complete(job_id)
+        jobs.append(job_id)
+    time.sleep(0.01)
+    store.touch(jobs[0])
+    store.budget_bytes = store.used_bytes() - 1
+
+    assert store.evict_once() == 1
+    assert store.get(jobs[0]) is not None
+    assert store.get(jobs[1]) is None
+
+
+def test_recording_stays_active_until_post_processing_is_done(offline_meeting, monkeypatch):
+    seen = []
+
+    async def process(meeting_id, active_sessions, audio_path):
+        state = active_sessions[meeting_id]
+        seen.append(offline_meeting.store.get(state.job_id).active)
+        active_sessions[meeting_id].status = MeetingStatus.TRANSCRIBED
+
+    monkeypatch.setattr(meeting_worker, "process_and_send_recording", process)
+    sessions = offline_meeting.sessions("m1")
+
+    asyncio.run(meeting_worker.join_and_record_meeting("m1", sessions, batch_duration=5))
+
+    assert seen == [True]
+    stored = offline_meeting.store.get(sessions["m1"].job_id)
+    assert not stored.active
+    assert stored.size_bytes > 0
+
+
+def test_a_second_process_opening_the_store_leaves_active_recordings_alone(store):
+    job_id, hot_path = store.allocate("m1")
+    write_recording(hot_path)
+
+    # What the backfill CLI does next to a live server.
+    other = RecordingStore(str(store.root), cold_after_s=0, budget_bytes=-1)
+    assert other.list_recordings() == []
+    assert other.get(job_id).active
+    assert other.evict_once() == 0
+    assert os.path.exists(hot_path)
+
+
+def test_server_startup_releases_recordings_orphaned_by_a_crash(store):
+    job_id, hot_path = store.allocate("m1")
+    write_recording(hot_path)
+
+    restarted = RecordingStore(str(store.root))
+    assert restarted.recover_orphans() == [job_id]
+
+    stored = restarted.get(job_id)
+    assert not stored.active
+    assert stored.size_bytes > 0
+    assert [r.job_id for r in restarted.list_recordings()] == [job_id]
+    assert restarted.recover_orphans() == []
@@ -0,0 +1,119 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from pydantic import ValidationError
+
+from app import main
+from app.models.MeetingRequest import ScheduledMeetingRequest
+from app.models.MeetingStatusResponse import MeetingState, MeetingStatus
+from app.services.scheduler_service import scheduler_service
+from app.services.scheduler_service.timer_wheel import TimerWheel
+
+
+def run_ticks(wheel: TimerWheel, ticks: int):
+    fired = []
+    for tick in range(1, ticks + 1):
+        fired.extend((tick, callback()) for callback in wheel._advance())
+    return fired
+
+
+def test_timers_fire_on_their_tick_across_slot_wraparound():
+    wheel = TimerWheel(slots=8)
+    run_ticks(wheel, 5)
+    for delay in (0.2, 3, 7.5, 8, 9, 16, 17, 30):
+        wheel.schedule(f"t{delay}", delay, lambda delay=delay: delay)
+
+    fired = run_ticks(wheel, 40)
+
+    assert fired == [(1, 0.2), (3, 3), (8, 7.5), (8, 8), (9, 9), (16, 16), (17, 17), (30, 30)]
+    assert len(wheel) == 0
+
+
+def test_a_join_two_hours_out_fires_after_two_trips_round_the_default_wheel():
+    wheel = TimerWheel()
+    wheel.schedule("m1", 2 * 3600 + 5, lambda: "m1")
+
+    assert run_ticks(wheel, 2 * 3600 + 4) == []
+    assert run_ticks(wheel, 1) == [(1, "m1")]
+
+
+def test_same_tick_timers_fire_in_the_order_they_were_scheduled():
+    wheel = TimerWheel(slots=4)
+    for key in ("c", "a", "b"):
+        wheel.schedule(key, 6, lambda key=key: key)
+
+    assert [key for _, key in run_ticks(wheel, 6)] == ["c", "a", "b"]
+
+
+def test_cancel_and_reschedule():
+    wheel = TimerWheel(slots=8)
+    wheel.schedule("m1", 3, lambda: "first")
+    wheel.schedule("m2", 3, lambda: "m2")
+    wheel.schedule("m1", 12, lambda: "second")
+
+    assert wheel.cancel("m2")
+    assert not wheel.cancel("m2")
+    assert not wheel.cancel("unknown")
+    assert "m1" in wheel and "m2" not in wheel
+    assert run_ticks(wheel, 20) == [(12, "second")]
+
+
+def test_running_wheel_fires_async_callbacks_and_survives_failing_ones():
+    fired = []
+
+    async def join():
+        await asyncio.sleep(0)
+        fired.append("join")
+
+    def broken():
+        raise RuntimeError("bad callback")
+
+    async def main_loop():
+        wheel = TimerWheel(tick_s=0.01)
+        wheel.start()
+        wheel.schedule("broken", 0.01, broken)
+        wheel.schedule("join", 0.03, join)
+        await asyncio.sleep(0.15)
+        await wheel.stop()
+        return wheel
+
+    wheel = asyncio.run(main_loop())
+
+    assert fired == ["join"]
+    assert len(wheel) == 0
+
+
+def request(start_at):
+    return {
+        "meeting_id": "abc-defg-hij",
+        "estimated_duration": 30,
+        "resume_url": "http://n8n.local/resume/1",
+        "start_at": start_at,
+    }
+
+
+def test_naive_start_times_are_rejected():
+    with pytest.raises(ValidationError):
+        ScheduledMeetingRequest(**request("2026-03-02T09:00:00"))
+
+    async def post():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bot") as client:
+            return await client.post("/schedule-meeting", json=request("2026-03-02T09:00:00"))
+
+    assert asyncio.run(post()).status_code == 422
+
+
+def test_offset_start_time_schedules_the_pre_warm_in_absolute_time(monkeypatch):
+    wheel = TimerWheel()
+    monkeypatch.setattr(scheduler_service, "meeting_scheduler", wheel)
+    monkeypatch.setenv("PREWARM_LEAD_S", "90")
+    start_at = datetime.now(timezone(timedelta(hours=2))) + timedelta(hours=1)
+    sessions = {"abc-defg-hij": MeetingState(status=MeetingStatus.SCHEDULED, resume_url="r", meeting_id="abc-defg-hij")}
+
+    fire_at = scheduler_service.schedule_meeting_join(ScheduledMeetingRequest(**request(start_at.isoformat())), sessions)
+
+    assert fire_at == pytest.approx(start_at.timestamp() - 90)
+    assert sessions["abc-defg-hij"].join_window == pytest.approx((fire_at, start_at.timestamp() + 40 * 60))
+    assert "abc-defg-hij" in wheel
@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+from app.services.search_service.transcript_index import (
+    MIXED,
+    RECENT,
+    RELEVANCE,
+    TranscriptIndex,
+    merge_by_rank,
+    to_match_query,
+)
+
+
+def transcript(*segments):
+    return {
+        "segments": [
+            {"speaker": speaker, "text": text, "start": float(i), "end": float(i) + 1.0}
+            for i, (speaker, text) in enumerate(segments)
+        ]
+    }
+
+
+@pytest.fixture
+def index(workdir):
+    index = TranscriptIndex(str(workdir / "index.db"))
+    index.index_transcript("m1", transcript(
+        ("speaker_0", "Budżet na wdrożenie jest zatwierdzony"),
+        ("speaker_1", "Wdrożenie wdrożenie i jeszcze raz wdrożenie"),
+        ("speaker_0", "Release w piątek"),
+    ))
+    index.index_transcript("m2", transcript(
+        ("speaker_0", "Klient pyta o wdrożenie"),
+        ("speaker_2", "   "),
+    ))
+    return index
+
+
+def test_hits_are_ranked_by_relevance_with_snippets(index):
+    hits, ranking = index.search("wdrozenie")
+
+    assert ranking == RELEVANCE
+    assert hits[0]["text"] == "Wdrożenie wdrożenie i jeszcze raz wdrożenie"
+    assert {h["meeting_id"] for h in hits} == {"m1", "m2"}
+    assert [h["score"] for h in hits] == sorted(h["score"] for h in hits)
+    assert "[Wdrożenie]" in hits[0]["snippet"]
+
+
+def test_filters_prefixes_and_hostile_input(index):
+    assert [h["meeting_id"] for h in index.search("wdrożenie", meeting_id="m2")[0]] == ["m2"]
+    assert [h["text"] for h in index.search("wdrożenie", speaker="speaker_0", meeting_id="m1")[0]] == [
+        "Budżet na wdrożenie jest zatwierdzony"
+    ]
+    assert [h["text"] for h in index.search("zatwierdz*")[0]] == ["Budżet na wdrożenie jest zatwierdzony"]
+    assert index.search('wdrożenie" OR (') == ([], RELEVANCE)
+    assert index.search(" * ") == ([], RELEVANCE)
+    assert to_match_query('say "hi" pre*') == '"say" """hi""" "pre"*'
+
+
+def test_reindexing_a_meeting_replaces_its_segments(index):
+    index.index_transcript("m1", transcript(("speaker_0", "Nowa wersja bez tamtego słowa")))
+
+    assert [h["meeting_id"] for h in index.search("wdrożenie")[0]] == ["m2"]
+    assert index.search("nowa")[0][0]["meeting_id"] == "m1"
+
+
+def test_common_terms_fall_back_to_newest_first_within_the_limit(workdir):
+    index = TranscriptIndex(str(workdir / "index.db"), relevance_budget_ms=0)
+    for m in range(40):
+        index.index_transcript(f"m{m}", transcript(*[("speaker_0", f"tak tak spotkanie {m} punkt {i}") for i in range(50)]))
+
+    hits, ranking = index.search("tak", limit=5)
+
+    assert ranking == RECENT
+    assert [(h["meeting_id"], h["text"]) for h in hits] == [("m39", f"tak tak spotkanie 39 punkt {i}") for i in range(49, 44, -1)]
+    assert len(index.search("tak", limit=10_000)[0]) == 200
+
+
+def test_newest_first_fallback_never_sorts_the_whole_match_set(index):
+    plan = index._conn().execute(
+        "EXPLAIN QUERY PLAN SELECT s.id FROM segments_fts JOIN segments s ON s.id = segments_fts.rowid"
+        " WHERE segments_fts MATCH ? AND s.speaker = ? ORDER BY segments_fts.rowid DESC LIMIT ?",
+        ['"tak"', "speaker_0", 5],
+    ).fetchall()
+
+    assert not any("TEMP B-TREE" in row[3] for row in plan)
+
+
+def test_transcripts_saved_before_the_index_are_picked_up(workdir, index):
+    directory = workdir / "transcripts"
+    directory.mkdir()
+    (directory / "m3.json").write_text(json.dumps(transcript(("speaker_0", "Retrospektywa"))), encoding="utf-8")
+    (directory / "m1.json").write_text(json.dumps(transcript(("speaker_0", "już w indeksie"))), encoding="utf-8")
+    (directory / "broken.json").write_text("{", encoding="utf-8")
+
+    assert index.index_missing(directory) == 1
+    assert index.search("retrospektywa")[0][0]["meeting_id"] == "m3"
+    assert index.search("indeksie") == ([], RELEVANCE)
+
+
+def test_node_results_are_merged_by_rank_not_by_score():
+    # Node b's index is small, so its bm25 scores look far better than node a's for equally good hits.
+    a = ([{"id": "a1", "score": -2.0}, {"id": "a2", "score": -1.5}, {"id": "a3", "score": -1.0}], RELEVANCE)
+    b = ([{"id": "b1", "score": -9.0}, {"id": "b2", "score": -8.0}], RELEVANCE)
+
+    hits, ranking = merge_by_rank([a, b], limit=4)
+
+    assert [h["id"] for h in hits] == ["a1", "b1", "a2", "b2"]
+    assert ranking == RELEVANCE
+    assert merge_by_rank([a, ([], RECENT)], limit=10)[1] == MIXED
+    assert merge_by_rank([], limit=10) == ([], RELEVANCE)
@@ -0,0 +1,55 @@
+import pytest
+
+from app.services.transcription_service.speaker_analytics import compute_speaker_stats
+from app.services.transcription_service.transcription_service import TranscriptWord, build_transcript_payload
+
+WORDS = [
+    {"text": "hi", "start": 0.0, "end": 0.5, "speaker_id": "speaker_0"},
+    {"text": "all", "start": 0.5, "end": 1.0, "speaker_id": "speaker_0"},
+    # Starts 0.2 s before speaker_0 finishes: an overlap, too short to be an interruption.
+    {"text": "hey", "start": 0.8, "end": 1.2, "speaker_id": "speaker_1"},
+    {"text": "so", "start": 1.2, "end": 2.0, "speaker_id": "speaker_1"},
+    # Cuts in 0.6 s before speaker_1 is done.
+    {"text": "wait", "start": 1.4, "end": 1.8, "speaker_id": "speaker_0"},
+    {"text": "mm", "start": 2.0, "end": 2.2, "speaker_id": None},
+    {"text": "(laughs)", "start": 2.2, "end": 2.5, "speaker_id": "speaker_0", "type": "audio_event"},
+]
+
+
+def words():
+    return [TranscriptWord(**{"type": "word", **w}) for w in WORDS]
+
+
+def test_stats_of_a_short_exchange():
+    stats = compute_speaker_stats(words())
+
+    assert [s["speaker"] for s in stats] == ["speaker_0", "speaker_1", "unknown"]
+    s0, s1, unknown = stats
+    assert (s0["talk_time_s"], s1["talk_time_s"], unknown["talk_time_s"]) == pytest.approx((1.4, 1.2, 0.2))
+    assert (s0["talk_share"], s1["talk_share"], unknown["talk_share"]) == (0.5, 0.4286, 0.0714)
+    assert [(s["word_count"], s["turn_count"]) for s in stats] == [(3, 2), (2, 1), (1, 1)]
+    assert [(s["overlap_count"], s["overlap_s"]) for s in stats] == [(1, 0.6), (1, 0.2), (0, 0.0)]
+    assert [(s["interruption_count"], s["interrupted_count"]) for s in stats] == [(1, 0), (0, 1), (0, 0)]
+    assert [(s["first_spoke_at"], s["last_spoke_at"]) for s in stats] == [(0.0, 1.8), (0.8, 2.0), (2.0, 2.2)]
+    assert s0["first_utterances"] == [{"start": 0.0, "text": "hi all"}, {"start": 1.4, "text": "wait"}]
+
+
+def test_first_utterances_are_capped():
+    stats = compute_speaker_stats(words(), first_utterances=1, utterance_max_words=1)
+
+    assert stats[0]["first_utterances"] == [{"start": 0.0, "text": "hi"}]
+
+
+def test_no_spoken_words_means_no_stats():
+    assert compute_speaker_stats([]) == []
+    assert compute_speaker_stats(words()[-1:]) == []
+
+
+def test_segments_and_stats_name_unattributed_speech_the_same_way():
+    payload = build_transcript_payload("m1", {"text": "hi all hey so wait mm", "words": WORDS})
+
+    segment_speakers = {s["speaker"] for s in payload["segments"]}
+    stat_speakers = {s["speaker"] for s in payload["speaker_stats"]}
+    assert "unknown" in segment_speakers
+    assert stat_speakers <= segment_speakers
+    assert None not in segment_speakers
@@ -0,0 +1,97 @@
+import asyncio
+import threading
+
+from app.models.MeetingStatusResponse import MeetingState, MeetingStatus, MeetingStatusEvent
+from app.services.status_service.status_service import StatusBroadcaster, stream_status_events
+
+SUBSCRIBERS = 300
+
+
+def event(meeting_id: str, status: MeetingStatus) -> MeetingStatusEvent:
+    return MeetingStatusEvent(meeting_id=meeting_id, status=status)
+
+
+def test_every_subscriber_sees_every_transition_in_order():
+    broadcaster = StatusBroadcaster()
+    transitions = [MeetingStatus.STARTING, MeetingStatus.CONNECTED, MeetingStatus.RECORDING, MeetingStatus.FINISHED]
+
+    async def main():
+        subscriptions = [broadcaster.subscribe() for _ in range(SUBSCRIBERS)]
+        assert broadcaster.subscriber_count == SUBSCRIBERS
+
+        async def consume(subscription):
+            received = []
+            while len(received) < len(transitions):
+                received.append((await subscription.get(timeout=5)).status)
+            return received
+
+        consumers = [asyncio.create_task(consume(s)) for s in subscriptions]
+        for status in transitions:
+            broadcaster.publish(event("m1", status))
+            await asyncio.sleep(0)
+        results = await asyncio.gather(*consumers)
+        for s in subscriptions:
+            s.close()
+        return results
+
+    results = asyncio.run(main())
+    assert all(r == transitions for r in results)
+    assert broadcaster.subscriber_count == 0
+
+
+def test_publish_from_worker_threads_reaches_loop_subscribers():
+    broadcaster = StatusBroadcaster()
+
+    async def main():
+        subscriptions = [broadcaster.subscribe(["m7"]) for _ in range(SUBSCRIBERS)]
+        threads = [
+            threading.Thread(target=broadcaster.publish, args=(event(f"m{i}", MeetingStatus.FINISHED),))
+            for i in range(10)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        received = await asyncio.gather(*(s.get(timeout=5) for s in subscriptions))
+        extra = await asyncio.gather(*(s.get(timeout=0.05) for s in subscriptions))
+        return received, extra
+
+    received, extra = asyncio.run(main())
+    assert all(e.meeting_id == "m7" for e in received)
+    assert extra == [None] * SUBSCRIBERS
+
+
+def test_slow_subscriber_drops_oldest_events_only():
+    broadcaster = StatusBroadcaster(max_pending=8)
+
+    async def main():
+        subscription = broadcaster.subscribe()
+        for i in range(20):
+            broadcaster.publish(event(f"m{i}", MeetingStatus.RECORDING))
+        drained = []
+        while (e := await subscription.get(timeout=0.01)) is not None:
+            drained.append(e.meeting_id)
+        return subscription.dropped, drained
+
+    dropped, drained = asyncio.run(main())
+    assert dropped == 12
+    assert drained == [f"m{i}" for i in range(12, 20)]
+
+
+def test_sse_stream_starts_with_snapshot_then_follows_transitions():
+    async def main():
+        state = MeetingState(status=MeetingStatus.RECORDING, resume_url="http://n8n.local/r", meeting_id="sse-1")
+        stream = stream_status_events(
+            lambda: [MeetingStatusEvent(meeting_id="sse-1", status=state.status)], ["sse-1"], heartbeat_s=5
+        )
+        first = await stream.__anext__()
+        pending = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        state.status = MeetingStatus.FINISHED
+        second = await asyncio.wait_for(pending, 5)
+        await stream.aclose()
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert '"status": "recording"' in first
+    assert '"status": "finished"' in second and '"previous": "recording"' in second
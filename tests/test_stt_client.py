@@ -0,0 +1,89 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.transcription_service.stt_client import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, STTClient
+
+
+def client(send, **kwargs) -> STTClient:
+    return STTClient(
+        send,
+        max_attempts=1,
+        backoff_base_s=0.0,
+        queue_timeout_s=2.0,
+        breaker=CircuitBreaker(failure_threshold=1, reset_timeout_s=0.05),
+        **kwargs,
+    )
+
+
+def http_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://stt.local")
+    return httpx.HTTPStatusError("error", request=request, response=httpx.Response(status, request=request))
+
+
+def test_cancelled_probe_lets_the_next_caller_probe():
+    hang = asyncio.Event()
+    calls = []
+
+    async def send(audio, filename):
+        calls.append(filename)
+        if filename == "outage":
+            raise httpx.ConnectError("down")
+        if filename == "probe":
+            await hang.wait()
+        return {"text": filename}
+
+    stt = client(send)
+
+    async def main():
+        with pytest.raises(httpx.ConnectError):
+            await stt.transcribe(b"audio", "outage")
+        assert stt.breaker.state == OPEN
+        await asyncio.sleep(0.06)
+
+        probe = asyncio.create_task(stt.transcribe(b"audio", "probe"))
+        await asyncio.sleep(0.01)
+        assert stt.breaker.state == HALF_OPEN
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        return await asyncio.wait_for(stt.transcribe(b"audio", "next"), timeout=1.0)
+
+    assert asyncio.run(main()) == {"text": "next"}
+    assert calls == ["outage", "probe", "next"]
+    assert stt.breaker.state == CLOSED
+
+
+def test_client_error_of_an_earlier_caller_does_not_release_the_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_s=0.05)
+    hang = asyncio.Event()
+
+    async def send(audio, filename):
+        if filename == "probe":
+            await hang.wait()
+            return {"text": filename}
+        await asyncio.sleep(0.15)
+        raise http_error(422)
+
+    stt = STTClient(send, max_attempts=1, breaker=breaker)
+
+    async def main():
+        # Admitted while the circuit was closed; it answers with a client error only once a probe is running.
+        earlier = asyncio.create_task(stt.transcribe(b"audio", "earlier"))
+        await asyncio.sleep(0.01)
+        breaker.record_failure()
+        await asyncio.sleep(0.06)
+        probe = asyncio.create_task(stt.transcribe(b"audio", "probe"))
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await earlier
+        probe_still_held = breaker._probe_in_flight
+        hang.set()
+        return probe_still_held, await probe
+
+    probe_still_held, result = asyncio.run(main())
+    assert probe_still_held
+    assert result == {"text": "probe"}
+    assert breaker.state == CLOSED
@@ -0,0 +1,111 @@
+import random
+import time
+
+import pytest
+
+from app.services.transcription_service.transcript_chunker import chunk_segments, estimate_tokens
+
+MAX_TOKENS = 2000
+OVERLAP_TOKENS = 200
+
+
+def three_hour_meeting(seed: int = 7):
+    # About 150 words a minute for three hours, four speakers, with a few long monologues over the chunk budget.
+    rng = random.Random(seed)
+    vocabulary = ["budżet", "wdrożenie", "sprint", "deadline", "klient", "release", "ok", "tak", "nie", "jira"]
+    segments, t, i = [], 0.0, 0
+    while t < 3 * 3600:
+        n = 2500 if i % 97 == 50 else rng.randint(3, 120)
+        duration = n / 2.5
+        segments.append({
+            "speaker": f"speaker_{i % 4}",
+            "text": " ".join(rng.choice(vocabulary) for _ in range(n)),
+            "start": round(t, 2),
+            "end": round(t + duration, 2),
+        })
+        t += duration + rng.uniform(0, 1.5)
+        i += 1
+    return segments
+
+
+@pytest.fixture(scope="module")
+def meeting():
+    segments = three_hour_meeting()
+    started = time.perf_counter()
+    chunks = chunk_segments(segments, max_tokens=MAX_TOKENS, overlap_tokens=OVERLAP_TOKENS)
+    return segments, chunks, time.perf_counter() - started
+
+
+def unique_units(chunks):
+    seen, units = set(), []
+    for chunk in chunks:
+        for segment in chunk["segments"]:
+            if id(segment) not in seen:
+                seen.add(id(segment))
+                units.append(segment)
+    return units
+
+
+def test_every_chunk_fits_the_token_budget(meeting):
+    _, chunks, elapsed = meeting
+
+    assert len(chunks) > 20
+    assert all(c["token_estimate"] <= MAX_TOKENS for c in chunks)
+    assert all(c["token_estimate"] == sum(estimate_tokens(s["text"]) for s in c["segments"]) for c in chunks)
+    assert [c["index"] for c in chunks] == list(range(len(chunks)))
+    assert elapsed < 2.0
+
+
+def test_chunks_cover_every_segment_once_and_in_order(meeting):
+    segments, chunks, _ = meeting
+    units = unique_units(chunks)
+
+    # Turns under budget pass through whole; longer monologues come back as consecutive pieces of the original.
+    rebuilt, k = [], 0
+    for segment in segments:
+        if estimate_tokens(segment["text"]) <= MAX_TOKENS:
+            assert units[k] is segment
+            k += 1
+            continue
+        pieces = []
+        while k < len(units) and units[k] is not segment and units[k]["start"] < segment["end"] and (
+            units[k]["speaker"] == segment["speaker"]
+        ):
+            pieces.append(units[k])
+            k += 1
+        assert len(pieces) > 1
+        assert " ".join(p["text"] for p in pieces) == segment["text"]
+        assert pieces[0]["start"] == segment["start"]
+        assert pieces[-1]["end"] == pytest.approx(segment["end"])
+    assert k == len(units)
+    assert [u["start"] for u in units] == sorted(u["start"] for u in units)
+
+
+def test_consecutive_chunks_overlap_by_whole_trailing_turns(meeting):
+    _, chunks, _ = meeting
+
+    for previous, current in zip(chunks, chunks[1:]):
+        carried = [s for s in current["segments"] if any(s is p for p in previous["segments"])]
+        assert carried == current["segments"][: len(carried)]
+        assert carried == previous["segments"][len(previous["segments"]) - len(carried):]
+        assert sum(estimate_tokens(s["text"]) for s in carried) <= OVERLAP_TOKENS
+        # Always moves forward.
+        assert len(carried) < len(previous["segments"])
+        assert current["end"] > previous["end"]
+
+
+def test_chunk_metadata_follows_its_segments(meeting):
+    _, chunks, _ = meeting
+
+    for chunk in chunks:
+        assert chunk["start"] == chunk["segments"][0]["start"]
+        assert chunk["end"] == chunk["segments"][-1]["end"]
+        assert chunk["speakers"] == sorted({s["speaker"] for s in chunk["segments"]})
+
+
+def test_small_inputs():
+    assert chunk_segments([]) == []
+    [chunk] = chunk_segments([{"speaker": None, "text": "hello", "start": 0.0, "end": 0.4}])
+    assert chunk["speakers"] == ["unknown"]
+    with pytest.raises(ValueError):
+        chunk_segments([], max_tokens=0)
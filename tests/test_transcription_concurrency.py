@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.models.MeetingStatusResponse import MeetingState, MeetingStatus
+from app.services.outbox_service.callback_outbox import CallbackOutbox
+from app.services.transcription_service import transcription_service
+from app.services.transcription_service.transcript_store import load_transcript
+
+MEETINGS = 100
+STT_LATENCY_S = 0.2
+EXECUTOR_THREADS = 4
+
+
+@pytest.fixture
+def offline_providers(monkeypatch, workdir):
+    outbox = CallbackOutbox(str(workdir / "outbox.db"))
+    calls = []
+
+    async def compress(audio_path, **kwargs):
+        await asyncio.sleep(0.01)
+        return b"ID3" + str(audio_path).encode()
+
+    async def send(audio: bytes, filename: str) -> dict:
+        calls.append(filename)
+        await asyncio.sleep(STT_LATENCY_S)
+        speaker = filename.split("_")[0]
+        return {
+            "text": f"hello from {speaker}",
+            "words": [
+                {"text": "hello", "start": 0.0, "end": 0.4, "speaker_id": "speaker_0"},
+                {"text": "from", "start": 0.5, "end": 0.7, "speaker_id": "speaker_1"},
+                {"text": speaker, "start": 0.8, "end": 1.2, "speaker_id": "speaker_1"},
+            ],
+        }
+
+    monkeypatch.setattr(transcription_service, "compress_audio_async", compress)
+    monkeypatch.setattr(transcription_service.stt_client, "send", send)
+    monkeypatch.setattr(transcription_service, "callback_outbox", outbox)
+    return outbox, calls
+
+
+def test_hundred_transcriptions_run_concurrently_without_stalling_the_loop(offline_providers):
+    outbox, calls = offline_providers
+    sessions = {
+        f"m{i}": MeetingState(
+            status=MeetingStatus.FINISHED, resume_url=f"http://n8n.local/resume/m{i}", meeting_id=f"m{i}"
+        )
+        for i in range(MEETINGS)
+    }
+
+    threads_before = threading.active_count()
+
+    async def main():
+        # Disk and SQLite work goes to the default executor; its size, not the number of meetings, bounds threads.
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=EXECUTOR_THREADS, thread_name_prefix="test-executor")
+        )
+        lags = []
+        peak_threads = [threading.active_count()]
+
+        async def probe():
+            while True:
+                started = time.perf_counter()
+                await asyncio.sleep(0.01)
+                lags.append(time.perf_counter() - started - 0.01)
+                peak_threads.append(threading.active_count())
+
+        monitor = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(
+                transcription_service.generate_transcription_async(sessions, m, f"/recordings/{m}.wav")
+                for m in sessions
+            )
+        )
+        elapsed = time.perf_counter() - started
+        monitor.cancel()
+        return elapsed, lags, max(peak_threads)
+
+    elapsed, lags, peak_threads = asyncio.run(main())
+
+    assert len(calls) == MEETINGS
+    # Serially this would take MEETINGS * STT_LATENCY_S = 20 s.
+    assert elapsed < MEETINGS * STT_LATENCY_S / 5
+    assert max(lags) < 0.5
+    assert threads_before < peak_threads <= threads_before + EXECUTOR_THREADS + 2
+    assert all(state.status == MeetingStatus.TRANSCRIBED for state in sessions.values())
+    assert outbox.counts() == {"pending": MEETINGS}
+    transcript = load_transcript("m42")
+    assert transcript["full_text"] == "hello from m42"
+    assert [s["speaker"] for s in transcript["segments"]] == ["speaker_0", "speaker_1"]
+
+
+def test_failed_transcription_marks_meeting_crashed(offline_providers, monkeypatch):
+    async def broken(audio_path, **kwargs):
+        return None
+
+    monkeypatch.setattr(transcription_service, "compress_audio_async", broken)
+    sessions = {"m1": MeetingState(status=MeetingStatus.FINISHED, resume_url="http://n8n.local/r", meeting_id="m1")}
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(transcription_service.generate_transcription_async(sessions, "m1", "/recordings/m1.wav"))
+    assert sessions["m1"].status == MeetingStatus.CRASHED
@@ -0,0 +1,189 @@
+import io
+import os
+import sys
+
+import httpx
+import pytest
+
+from app.models.MeetingStatusResponse import MeetingState, MeetingStatus
+from app.services.recording_service.chunked_recording import open_recording_stream
+from app.services.transcription_service import transcription_service
+from app.services.upload_service import upload_service
+from app.services.upload_service.upload_service import upload_stream
+
+from .conftest import write_recording
+
+
+class FlakyReceiver:
+    # Fails the first requests the way a restarting n8n does, then accepts the upload.
+    def __init__(self, failures):
+        self.failures = list(failures)
+        self.requests = []
+        self.bodies = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request.method)
+        body = request.read()
+        if self.failures:
+            failure = self.failures.pop(0)
+            if isinstance(failure, Exception):
+                raise failure
+            return httpx.Response(failure)
+        self.bodies.append(body)
+        return httpx.Response(200, json={"ok": True})
+
+
+@pytest.fixture
+def receiver(monkeypatch):
+    def install(failures):
+        handler = FlakyReceiver(failures)
+        real_client = httpx.Client
+        monkeypatch.setattr(
+            upload_service.httpx, "Client", lambda **kw: real_client(transport=httpx.MockTransport(handler), **kw)
+        )
+        monkeypatch.setattr(upload_service.time, "sleep", lambda s: None)
+        return handler
+
+    return install
+
+
+def upload(payload: bytes, **kwargs):
+    return upload_stream(
+        "http://n8n.local/webhook-waiting/1",
+        lambda: io.BytesIO(payload),
+        total=len(payload),
+        filename="m1_record.wav",
+        content_type="audio/wav",
+        data={"meeting_id": "m1"},
+        chunk_size=4096,
+        **kwargs,
+    )
+
+
+def test_upload_survives_dropped_connections_and_5xx(receiver):
+    handler = receiver([httpx.ConnectError("refused"), 503, httpx.ReadError("reset"), 502])
+    payload = bytes(range(256)) * 400
+
+    response = upload(payload, max_attempts=5)
+
+    assert response.status_code == 200
+    assert len(handler.requests) == 5
+    assert len(handler.bodies) == 1 and payload in handler.bodies[0]
+
+
+def test_upload_gives_up_after_max_attempts(receiver):
+    receiver([503] * 10)
+    with pytest.raises(httpx.HTTPStatusError):
+        upload(b"x" * 10000, max_attempts=3)
+
+
+def test_upload_does_not_retry_client_errors(receiver):
+    handler = receiver([404])
+    with pytest.raises(httpx.HTTPStatusError):
+        upload(b"x" * 10000, max_attempts=5)
+    assert len(handler.requests) == 1
+
+
+def test_upload_never_probes_a_plain_webhook(receiver):
+    handler = receiver([503])
+    upload(b"x" * 10000, max_attempts=3)
+    assert "HEAD" not in handler.requests
+
+
+class ResumableReceiver:
+    # Keeps what arrived before a connection dropped and reports it on HEAD, like a tus-style upload endpoint.
+    def __init__(self, drop_after):
+        self.drop_after = list(drop_after)
+        self.received = b""
+        self.posts = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.method == "HEAD":
+            return httpx.Response(200, headers={"Upload-Offset": str(len(self.received))})
+        offset = int(request.headers["Upload-Offset"])
+        body = request.read()
+        self.posts.append((offset, len(body)))
+        assert offset == len(self.received)
+        if self.drop_after:
+            self.received += body[: self.drop_after.pop(0)]
+            return httpx.Response(503)
+        self.received += body
+        return httpx.Response(200, json={"ok": True})
+
+
+def test_resumable_upload_continues_from_the_acknowledged_offset(monkeypatch):
+    handler = ResumableReceiver([10000, 5000])
+    real_client = httpx.Client
+    monkeypatch.setattr(
+        upload_service.httpx, "Client", lambda **kw: real_client(transport=httpx.MockTransport(handler), **kw)
+    )
+    monkeypatch.setattr(upload_service.time, "sleep", lambda s: None)
+    payload = bytes(range(256)) * 200
+
+    response = upload(payload, max_attempts=5, resumable=True)
+
+    assert response.status_code == 200
+    assert handler.posts == [(0, 51200), (10000, 41200), (15000, 36200)]
+    assert handler.received == payload
+
+
+@pytest.fixture
+def fake_ffmpeg(workdir, monkeypatch):
+    # Passes the WAV through unchanged, or fails; enough to follow where the compressed bytes go.
+    def install(exit_code=0):
+        bin_dir = workdir / "bin"
+        bin_dir.mkdir(exist_ok=True)
+        script = bin_dir / "ffmpeg"
+        script.write_text(
+            f"#!{sys.executable}\n"
+            "import shutil, sys\n"
+            "shutil.copyfileobj(sys.stdin.buffer, sys.stdout.buffer)\n"
+            f"sys.exit({exit_code})\n"
+        )
+        script.chmod(0o755)
+        monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+    return install
+
+
+def hand_off(workdir, monkeypatch):
+    uploads = []
+
+    def upload(url, open_stream, *, total, filename, content_type, **kwargs):
+        with open_stream() as stream:
+            uploads.append((filename, total, type(stream), getattr(stream, "name", None), stream.read()))
+
+        class Response:
+            def json(self):
+                return {"ok": True}
+
+        return Response()
+
+    monkeypatch.setattr(transcription_service, "upload_stream", upload)
+    audio_path = workdir / "m1_recording"
+    write_recording(audio_path)
+    state = MeetingState(
+        status=MeetingStatus.FINISHED, resume_url="http://n8n.local/resume/m1", meeting_id="m1",
+        audio_path=str(audio_path),
+    )
+    transcription_service.send_audio_for_transcription({"m1": state}, "m1", str(audio_path), "multipart")
+    with open_recording_stream(audio_path) as stream:
+        return uploads, stream.read()
+
+
+def test_handoff_uploads_the_compressed_file_straight_from_disk(workdir, monkeypatch, fake_ffmpeg):
+    fake_ffmpeg()
+
+    [(filename, total, stream_type, name, body)], wav = hand_off(workdir, monkeypatch)
+
+    assert (filename, total, body) == ("m1_record.mp3", len(wav), wav)
+    assert not issubclass(stream_type, io.BytesIO)
+    assert not os.path.exists(name)
+
+
+def test_handoff_falls_back_to_streaming_the_wav(workdir, monkeypatch, fake_ffmpeg):
+    fake_ffmpeg(exit_code=1)
+
+    [(filename, total, _, _, body)], wav = hand_off(workdir, monkeypatch)
+
+    assert (filename, total, body) == ("m1_record.wav", len(wav), wav)